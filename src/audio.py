@@ -1,17 +1,38 @@
 import subprocess
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from functools import lru_cache
 
-from pyannote.audio import Pipeline
-from typing import Dict
-import torch
-import whisper
+from typing import Dict, List, Optional, Union
+import numpy as np
 
 from dotenv import load_dotenv
 
+from transcribers import get_backend, TRANSCRIPTION_BACKEND
+from vad import VAD_ENABLED, detect_speech_regions, gate_audio, remap_transcript
+
 load_dotenv("ai-slop.env")
 
 HF_AUTH_TOKEN=os.getenv("HF_AUTH_TOKEN")
 
+# torch, whisper and pyannote take seconds to import, so they are loaded on
+# first use; importing this module (e.g. for --help or tests) stays cheap.
+
+# Whisper and pyannote both work on 16 kHz mono float32
+SAMPLE_RATE = 16000
+
+AudioInput = Union[str, np.ndarray]
+
+# extract_audio writes 16-bit mono PCM at this rate, about 690 MB for a 2-hour stream
+EXTRACT_SAMPLE_RATE = 48000
+
+# gate only when speech covers less than this share of the audio
+VAD_MAX_SPEECH_SHARE = 0.95
+
+
 def extract_audio(video_path: str, output_dir: str = "audio") -> str:
     """Extract mono 16kHz WAV audio from the downloaded video."""
     os.makedirs(output_dir, exist_ok=True)
@@ -25,7 +46,7 @@ def extract_audio(video_path: str, output_dir: str = "audio") -> str:
         "-ac",
         "1",
         "-ar",
-        "48000",
+        str(EXTRACT_SAMPLE_RATE),
         "-vn",
         audio_path,
     ]
@@ -33,18 +54,193 @@ def extract_audio(video_path: str, output_dir: str = "audio") -> str:
     return audio_path
 
 
-def transcribe_audio(audio_path: str, model_size: str = "base") -> Dict:
-    """Transcribe audio using Whisper."""
-    device = "cuda" if torch.cuda.is_available() else "cpu"
+def media_duration(path: str) -> Optional[float]:
+    """Container duration in seconds from ffprobe, None when it cannot be read."""
+    cmd = ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", path]
+    try:
+        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        return float(result.stdout.decode().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def extracted_wav_bytes(video_path: str) -> Optional[int]:
+    """Size of the WAV extract_audio will write for ``video_path``."""
+    duration = media_duration(video_path)
+    if duration is None:
+        return None
+    return 44 + 2 * int(duration * EXTRACT_SAMPLE_RATE)
+
+
+def load_audio(audio_path: str) -> np.ndarray:
+    """Decode an audio/video file once into a 16 kHz mono float32 array."""
+    import whisper
 
-    model = whisper.load_model(model_size, device=device)
-    result = model.transcribe(audio_path)
-    return result
+    return whisper.load_audio(audio_path, sr=SAMPLE_RATE)
 
 
-def diarize_audio(audio_path: str):
-    """Run speaker diarization on the audio and return pyannote results."""
+def _device() -> str:
+    import torch
+
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+@lru_cache(maxsize=1)
+def _diarization_pipeline(device: str):
+    import torch
+    from pyannote.audio import Pipeline
+
     pipeline = Pipeline.from_pretrained("pyannote/speaker-diarization-3.1", use_auth_token=HF_AUTH_TOKEN)
-    diarization = pipeline(audio_path)
-    return diarization
+    pipeline.to(torch.device(device))
+    return pipeline
+
+
+def transcribe_audio(
+    audio: AudioInput,
+    model_size: str = "base",
+    backend: str = TRANSCRIPTION_BACKEND,
+    vad: bool = VAD_ENABLED,
+) -> Dict:
+    """
+    Transcribe audio with the selected backend (see transcribers).
+
+    Accepts a file path or a decoded 16 kHz array; every backend returns the
+    openai-whisper result schema. With ``vad`` only detected speech regions
+    are transcribed and timestamps are mapped back to the original timeline.
+    """
+    if not vad:
+        return get_backend(backend).transcribe(audio, model_size)
+
+    if isinstance(audio, str):
+        audio = load_audio(audio)
+
+    regions = detect_speech_regions(audio, SAMPLE_RATE)
+    total = len(audio) / SAMPLE_RATE
+    speech = sum(end - start for start, end in regions)
+    print(f"VAD: {speech:.0f}s of speech in {total:.0f}s of audio ({len(regions)} regions)")
+
+    if not regions:
+        return {"text": "", "segments": [], "language": None}
+    if speech > VAD_MAX_SPEECH_SHARE * total:
+        # not enough non-speech to be worth the remapping
+        return get_backend(backend).transcribe(audio, model_size)
+
+    gated, gated_starts = gate_audio(audio, regions, SAMPLE_RATE)
+    result = get_backend(backend).transcribe(gated, model_size)
+    return remap_transcript(result, regions, gated_starts)
+
+
+def diarize_audio(audio: AudioInput, return_embeddings: bool = False):
+    """
+    Run speaker diarization on the audio and return pyannote results.
+
+    Accepts a file path or a decoded 16 kHz array. With ``return_embeddings``
+    returns ``(diarization, embeddings)`` where ``embeddings[i]`` is the
+    voice embedding of ``diarization.labels()[i]``.
+    """
+    pipeline = _diarization_pipeline(_device())
+    if isinstance(audio, np.ndarray):
+        import torch
+
+        # zero-copy view of the shared decode, shaped (channel, time)
+        audio = {"waveform": torch.from_numpy(audio).unsqueeze(0), "sample_rate": SAMPLE_RATE}
+    return pipeline(audio, return_embeddings=return_embeddings)
+
+
+@dataclass
+class SpeechAnalysis:
+    transcript: Dict
+    diarization: object
+    embeddings: Optional[np.ndarray] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+    labels: Optional[List[str]] = None   # speaker label of each embedding row
+
+
+def _timed(fn, timings: Dict[str, float], name: str, stream=None):
+    def run():
+        ctx = nullcontext()
+        if stream is not None:
+            import torch
+
+            ctx = torch.cuda.stream(stream)
+        start = time.perf_counter()
+        with ctx:
+            result = fn()
+            if stream is not None:
+                stream.synchronize()
+        timings[name] = time.perf_counter() - start
+        return result
+    return run
+
+
+def analyze_speech(
+    audio: AudioInput,
+    model_size: str = "base",
+    concurrent: bool = True,
+    backend: str = TRANSCRIPTION_BACKEND,
+) -> SpeechAnalysis:
+    """
+    Transcribe and diarize an audio file from a single decode.
+
+    The file is decoded once (a decoded 16 kHz array is used as is) and the
+    same array is handed to Whisper and pyannote. With ``concurrent`` both models run in parallel threads, each
+    on its own CUDA stream when a GPU is available, so their kernels can
+    overlap; ``concurrent=False`` runs them back-to-back as a baseline.
+    """
+    timings: Dict[str, float] = {}
+    start = time.perf_counter()
+
+    if isinstance(audio, str):
+        path = audio
+        audio = _timed(lambda: load_audio(path), timings, "decode")()
+
+    on_gpu = _device() == "cuda"
+    if on_gpu:
+        import torch
+    transcribe = _timed(
+        lambda: transcribe_audio(audio, model_size, backend),
+        timings,
+        "transcribe",
+        torch.cuda.Stream() if on_gpu and concurrent else None,
+    )
+    diarize = _timed(
+        lambda: diarize_audio(audio, return_embeddings=True),
+        timings,
+        "diarize",
+        torch.cuda.Stream() if on_gpu and concurrent else None,
+    )
+
+    if concurrent:
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            transcript_future = pool.submit(transcribe)
+            diarization_future = pool.submit(diarize)
+            transcript = transcript_future.result()
+            diarization, embeddings = diarization_future.result()
+    else:
+        transcript = transcribe()
+        diarization, embeddings = diarize()
+
+    timings["total"] = time.perf_counter() - start
+    return SpeechAnalysis(transcript, diarization, embeddings, timings, list(diarization.labels()))
+
+
+def benchmark_speech_analysis(
+    audio_path: str,
+    model_size: str = "base",
+    backend: str = TRANSCRIPTION_BACKEND,
+) -> Dict[str, float]:
+    """
+    Wall time of the sequential baseline vs. the concurrent single-decode stage.
+
+    Models are warmed up first so load time does not skew the comparison.
+    """
+    get_backend(backend).load(model_size)
+    _diarization_pipeline(_device())
 
+    sequential = analyze_speech(audio_path, model_size, False, backend).timings["total"]
+    concurrent = analyze_speech(audio_path, model_size, True, backend).timings["total"]
+    return {
+        "sequential_seconds": sequential,
+        "concurrent_seconds": concurrent,
+        "speedup": sequential / concurrent if concurrent else float("nan"),
+    }
@@ -0,0 +1,264 @@
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from vad import detect_speech_regions
+
+SAMPLE_RATE = 16000
+WINDOW_SECONDS = 30.0          # whisper's fixed input length
+BATCH_SIZE = int(os.getenv("TRANSCRIPTION_BATCH_SIZE", 16))
+# how long a partly filled batch waits for windows from other videos
+BATCH_MAX_LATENCY_SECONDS = float(os.getenv("BATCH_MAX_LATENCY_SECONDS", 0.5))
+
+Window = Tuple[float, float]
+# windows (16 kHz arrays, at most 30 s) -> per window, whisper-schema segments relative to its start
+DecodeFn = Callable[[List[np.ndarray]], List[List[Dict]]]
+
+
+def plan_windows(audio: np.ndarray, sr: int = SAMPLE_RATE, window_seconds: float = WINDOW_SECONDS) -> List[Window]:
+    """
+    Cut audio into windows of at most ``window_seconds``.
+
+    Speech regions are packed greedily so cuts fall into pauses and
+    long silences are skipped; regions longer than a window are split hard.
+    """
+    regions = detect_speech_regions(audio, sr)
+    windows: List[List[float]] = []
+    for start, end in regions:
+        while end - start > window_seconds:
+            windows.append([start, start + window_seconds])
+            start += window_seconds
+        if windows and end - windows[-1][0] <= window_seconds and start >= windows[-1][1]:
+            windows[-1][1] = end
+        else:
+            windows.append([start, end])
+    return [(start, end) for start, end in windows]
+
+
+@dataclass
+class _Request:
+    audio: np.ndarray
+    windows: List[Window]
+    future: Future
+    submitted: float = field(default_factory=time.monotonic)
+    results: List[Optional[List[Dict]]] = field(default_factory=list)
+    todo: Deque[int] = field(default_factory=deque)
+    remaining: int = 0
+
+
+def _stitch(request: _Request) -> Dict:
+    segments = []
+    language = None
+    for (start, _), window_segments in zip(request.windows, request.results):
+        for seg in window_segments:
+            seg = dict(seg, id=len(segments), start=seg["start"] + start, end=seg["end"] + start)
+            seg_language = seg.pop("language", None)
+            language = language or seg_language
+            if seg.get("words"):
+                seg["words"] = [
+                    dict(w, start=w["start"] + start, end=w["end"] + start) for w in seg["words"]
+                ]
+            segments.append(seg)
+    return {
+        "text": "".join(s["text"] for s in segments),
+        "segments": segments,
+        "language": language,
+    }
+
+
+class BatchTranscriptionService:
+    """
+    Transcribes audio from several callers in shared, padded model batches.
+
+    ``submit`` splits a recording into windows and returns a Future. A worker
+    thread fills each batch round-robin across pending recordings, so a long
+    video cannot starve a short one, and starts a partly filled batch once
+    its oldest window has waited ``max_latency`` seconds.
+    """
+
+    def __init__(
+        self,
+        decode: DecodeFn,
+        batch_size: int = BATCH_SIZE,
+        max_latency: float = BATCH_MAX_LATENCY_SECONDS,
+    ):
+        self.decode = decode
+        self.batch_size = batch_size
+        self.max_latency = max_latency
+        self._pending: "OrderedDict[int, _Request]" = OrderedDict()
+        self._cv = threading.Condition()
+        self._worker = threading.Thread(target=self._run, daemon=True, name="batch-transcription")
+        self._worker.start()
+
+    def submit(self, audio: np.ndarray) -> Future:
+        future: Future = Future()
+        windows = plan_windows(audio)
+        if not windows:
+            future.set_result({"text": "", "segments": [], "language": None})
+            return future
+
+        request = _Request(audio, windows, future)
+        request.results = [None] * len(windows)
+        request.todo.extend(range(len(windows)))
+        request.remaining = len(windows)
+        with self._cv:
+            self._pending[id(request)] = request
+            self._cv.notify()
+        return future
+
+    def _queued(self) -> int:
+        return sum(len(r.todo) for r in self._pending.values())
+
+    def _oldest(self) -> float:
+        return min(r.submitted for r in self._pending.values() if r.todo)
+
+    def _take_batch(self) -> List[Tuple[_Request, int]]:
+        """Round-robin one window per pending request until the batch is full."""
+        batch = []
+        while len(batch) < self.batch_size and any(r.todo for r in self._pending.values()):
+            for request in self._pending.values():
+                if request.todo and len(batch) < self.batch_size:
+                    batch.append((request, request.todo.popleft()))
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            with self._cv:
+                while True:
+                    queued = self._queued()
+                    if queued >= self.batch_size:
+                        break
+                    if queued:
+                        wait = self._oldest() + self.max_latency - time.monotonic()
+                        if wait <= 0:
+                            break
+                        self._cv.wait(wait)
+                    else:
+                        self._cv.wait()
+                batch = self._take_batch()
+
+            windows = [
+                request.audio[int(request.windows[i][0] * SAMPLE_RATE):int(request.windows[i][1] * SAMPLE_RATE)]
+                for request, i in batch
+            ]
+            try:
+                decoded = self.decode(windows)
+                if len(decoded) != len(windows):
+                    raise RuntimeError(f"decoder returned {len(decoded)} results for {len(windows)} windows")
+            except Exception as e:
+                self._fail({id(request) for request, _ in batch}, e)
+                continue
+
+            with self._cv:
+                for (request, i), segments in zip(batch, decoded):
+                    request.results[i] = segments
+                    request.remaining -= 1
+                    if request.remaining == 0 and self._pending.pop(id(request), None):
+                        request.future.set_result(_stitch(request))
+
+    def _fail(self, request_ids, error: Exception) -> None:
+        with self._cv:
+            for key in request_ids:
+                request = self._pending.pop(key, None)
+                if request is not None:
+                    request.future.set_exception(error)
+
+
+# -----------------------------
+# openai-whisper batched decoding
+# -----------------------------
+
+def segments_from_tokens(
+    tokens: List[int],
+    tokenizer,
+    language: Optional[str] = None,
+    duration: float = WINDOW_SECONDS,
+) -> List[Dict]:
+    """
+    Split a decoded token sequence into segments at its <|t|> timestamp pairs.
+
+    Text after the last timestamp (the window cut mid-sentence) ends at ``duration``.
+    """
+    segments = []
+    begin = tokenizer.timestamp_begin
+    start: Optional[float] = None
+    text_tokens: List[int] = []
+    for token in tokens:
+        if token >= begin:
+            t = (token - begin) * 0.02
+            if start is None:
+                start = t
+            elif text_tokens:
+                segments.append({
+                    "start": start,
+                    "end": t,
+                    "text": tokenizer.decode(text_tokens),
+                    "tokens": text_tokens,
+                    "language": language,
+                })
+                start, text_tokens = None, []
+            else:
+                start = t
+        elif start is not None:
+            text_tokens.append(token)
+    if start is not None and text_tokens:
+        segments.append({
+            "start": start,
+            "end": max(duration, start),
+            "text": tokenizer.decode(text_tokens),
+            "tokens": text_tokens,
+            "language": language,
+        })
+    return segments
+
+
+def whisper_decode_fn(model_size: str) -> DecodeFn:
+    """
+    Batched single-pass decoding with openai-whisper.
+
+    Windows are padded to 30 s and decoded in one forward pass per batch;
+    unlike ``model.transcribe`` there is no temperature fallback and no
+    conditioning on the previous window's text.
+    """
+    import torch
+    import whisper
+    from whisper.tokenizer import get_tokenizer
+
+    from transcribers import _device, _whisper_model
+
+    model = _whisper_model(model_size, _device())
+    options = whisper.DecodingOptions(fp16=model.device.type == "cuda", without_timestamps=False)
+
+    def decode(windows: List[np.ndarray]) -> List[List[Dict]]:
+        mels = torch.stack([
+            whisper.log_mel_spectrogram(whisper.pad_or_trim(torch.from_numpy(w)), model.dims.n_mels)
+            for w in windows
+        ]).to(model.device)
+        results = whisper.decode(model, mels, options)
+        out = []
+        for window, result in zip(windows, results):
+            tokenizer = get_tokenizer(
+                model.is_multilingual,
+                num_languages=model.num_languages,
+                language=result.language,
+                task="transcribe",
+            )
+            out.append(
+                segments_from_tokens(result.tokens, tokenizer, result.language, len(window) / SAMPLE_RATE)
+            )
+        return out
+
+    return decode
+
+
+@lru_cache(maxsize=2)
+def get_batch_service(model_size: str) -> BatchTranscriptionService:
+    """Process-wide service per model size, shared by every pipeline in the process."""
+    return BatchTranscriptionService(whisper_decode_fn(model_size))
@@ -0,0 +1,135 @@
+import argparse
+import glob
+import os
+import re
+import time
+import wave
+from typing import Dict, List
+
+from transcribers import TRANSCRIPTION_BACKENDS, get_backend
+
+_PUNCTUATION = re.compile(r"[^\w\s']")
+
+
+def normalize_words(text: str) -> List[str]:
+    return _PUNCTUATION.sub(" ", text.lower()).split()
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """(substitutions + deletions + insertions) / reference words, via word-level edit distance."""
+    ref = normalize_words(reference)
+    hyp = normalize_words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+
+    previous = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, start=1):
+        current = [i] + [0] * len(hyp)
+        for j, h in enumerate(hyp, start=1):
+            current[j] = min(
+                previous[j] + 1,               # deletion
+                current[j - 1] + 1,            # insertion
+                previous[j - 1] + (r != h),    # substitution
+            )
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def wav_duration(path: str) -> float:
+    with wave.open(path, "rb") as wf:
+        return wf.getnframes() / wf.getframerate()
+
+
+def load_corpus(corpus_dir: str) -> List[Dict]:
+    """Every ``*.wav`` in the directory with a ``*.txt`` reference transcript next to it."""
+    items = []
+    for audio_path in sorted(glob.glob(os.path.join(corpus_dir, "*.wav"))):
+        ref_path = os.path.splitext(audio_path)[0] + ".txt"
+        if not os.path.exists(ref_path):
+            print(f"[WARN] No reference for {audio_path}, skipping")
+            continue
+        with open(ref_path, "r", encoding="utf-8") as fh:
+            reference = fh.read()
+        items.append(
+            {"audio": audio_path, "reference": reference, "duration": wav_duration(audio_path)}
+        )
+    return items
+
+
+def benchmark_backend(backend_name: str, corpus: List[Dict], model_size: str) -> Dict:
+    """Real-time factor (processing seconds / audio seconds) and corpus WER for one backend."""
+    backend = get_backend(backend_name)
+    backend.load(model_size)   # keep model load time out of the measurement
+
+    processing = 0.0
+    audio_seconds = 0.0
+    error_words = 0.0
+    reference_words = 0
+    for item in corpus:
+        start = time.perf_counter()
+        result = backend.transcribe(item["audio"], model_size)
+        processing += time.perf_counter() - start
+        audio_seconds += item["duration"]
+
+        n_ref = len(normalize_words(item["reference"]))
+        error_words += word_error_rate(item["reference"], result["text"]) * n_ref
+        reference_words += n_ref
+
+    return {
+        "backend": backend_name,
+        "files": len(corpus),
+        "audio_seconds": audio_seconds,
+        "processing_seconds": processing,
+        "rtf": processing / audio_seconds if audio_seconds else float("nan"),
+        "wer": error_words / reference_words if reference_words else float("nan"),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare transcription backends on a local audio corpus"
+    )
+    parser.add_argument("corpus", help="Directory of *.wav files with *.txt references")
+    parser.add_argument(
+        "--backends",
+        nargs="+",
+        default=sorted(TRANSCRIPTION_BACKENDS),
+        choices=sorted(TRANSCRIPTION_BACKENDS),
+    )
+    parser.add_argument("--model-size", default="base")
+    parser.add_argument(
+        "--speech-analysis",
+        action="store_true",
+        help="Time transcription + diarization run sequentially vs. concurrently instead",
+    )
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    if not corpus:
+        raise SystemExit(f"No benchmark files found in {args.corpus}")
+
+    if args.speech_analysis:
+        # pulls in torch and pyannote; only needed for this mode
+        from audio import benchmark_speech_analysis
+
+        print(f"{'backend':<24} {'file':<24} {'seq s':>8} {'conc s':>8} {'speedup':>8}")
+        for name in args.backends:
+            for item in corpus:
+                r = benchmark_speech_analysis(item["audio"], args.model_size, name)
+                print(
+                    f"{name:<24} {os.path.basename(item['audio']):<24} {r['sequential_seconds']:>8.1f} "
+                    f"{r['concurrent_seconds']:>8.1f} {r['speedup']:>7.2f}x"
+                )
+        return
+
+    print(f"{'backend':<24} {'files':>5} {'audio s':>9} {'proc s':>9} {'RTF':>7} {'WER':>7}")
+    for name in args.backends:
+        r = benchmark_backend(name, corpus, args.model_size)
+        print(
+            f"{r['backend']:<24} {r['files']:>5} {r['audio_seconds']:>9.1f} "
+            f"{r['processing_seconds']:>9.1f} {r['rtf']:>7.3f} {r['wer']:>7.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
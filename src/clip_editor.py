@@ -1,10 +1,16 @@
 import os
 import subprocess
 from typing import List
-from src.models.clip import Clips, Clip  # import your Pydantic models
+from models.clip import Clips, Clip  # import your Pydantic models
+from shot_detection import SHOT_SNAP_TOLERANCE_SECONDS, shot_boundaries, snap_clips
 
 
-def generate_clips(video_path: str, clips: Clips, output_dir: str = "clips") -> List[str]:
+def generate_clips(
+    video_path: str,
+    clips: Clips,
+    output_dir: str = "clips",
+    snap_tolerance: float = SHOT_SNAP_TOLERANCE_SECONDS,
+) -> List[str]:
     """
     Generate video clips using ffmpeg.
     Accepts a Pydantic Clips object (list of Clip instances).
@@ -13,7 +19,16 @@ def generate_clips(video_path: str, clips: Clips, output_dir: str = "clips") ->
         - start_time: float
         - end_time: float
         - title: str
+
+    With ``snap_tolerance`` > 0, cut points move to the nearest shot
+    boundary (or keyframe, for starts) within that many seconds.
     """
+    if snap_tolerance > 0 and clips.clips:
+        try:
+            clips = snap_clips(clips, shot_boundaries(video_path), snap_tolerance)
+        except (OSError, RuntimeError) as e:
+            print(f"[WARN] Shot detection failed, cutting at transcript times: {e}")
+
     os.makedirs(output_dir, exist_ok=True)
     video_path = os.path.abspath(video_path)
     output_dir = os.path.abspath(output_dir)
@@ -55,3 +70,19 @@ def generate_clips(video_path: str, clips: Clips, output_dir: str = "clips") ->
             clip_paths.append(clip_path)
 
     return clip_paths
+
+
+def clips_in_window(clips: Clips, start: float, end: float) -> Clips:
+    """Clips lying inside [start, end], re-timed relative to ``start`` (for section downloads)."""
+    return Clips(
+        clips=[
+            clip.model_copy(
+                update={
+                    "start_time": clip.start_time - start,
+                    "end_time": clip.end_time - start,
+                }
+            )
+            for clip in clips.clips
+            if clip.start_time >= start and clip.end_time <= end
+        ]
+    )
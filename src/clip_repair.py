@@ -0,0 +1,181 @@
+import json
+import re
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from models.clip import Clip, Clips
+
+_CODE_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$", re.MULTILINE)
+
+
+def parse_clip_array(text: str) -> Optional[List]:
+    """
+    Best-effort parse of the LLM output into a list of raw clip dicts.
+
+    Handles plain arrays, ``{"clips": [...]}`` objects, markdown code fences
+    and leading/trailing chatter around the array. Returns None when nothing
+    usable can be recovered.
+    """
+    candidates = [text, _CODE_FENCE.sub("", text).strip()]
+    first, last = text.find("["), text.rfind("]")
+    if first != -1 and last > first:
+        candidates.append(text[first:last + 1])
+
+    for candidate in candidates:
+        try:
+            data = json.loads(candidate)
+        except (json.JSONDecodeError, TypeError):
+            continue
+        if isinstance(data, dict):
+            data = data.get("clips")
+        if isinstance(data, list):
+            return data
+    return None
+
+
+def _segment_ids_for_window(start: float, end: float, segments: List[Dict]) -> List[int]:
+    """Ids of all segments overlapping [start, end]."""
+    return [s["id"] for s in segments if s["end"] > start and s["start"] < end]
+
+
+def _contiguous_runs(ids: List[int]) -> List[List[int]]:
+    runs: List[List[int]] = []
+    for seg_id in ids:
+        if runs and seg_id == runs[-1][-1] + 1:
+            runs[-1].append(seg_id)
+        else:
+            runs.append([seg_id])
+    return runs
+
+
+def _split_long_run(run: List[int], by_id: Dict[int, Dict], max_seconds: float) -> List[List[int]]:
+    """Greedily cut a run of segment ids into blocks of at most ``max_seconds``."""
+    blocks: List[List[int]] = []
+    current: List[int] = []
+    for seg_id in run:
+        if current and by_id[seg_id]["end"] - by_id[current[0]]["start"] > max_seconds:
+            blocks.append(current)
+            current = []
+        current.append(seg_id)
+    if current:
+        blocks.append(current)
+    return blocks
+
+
+def known_segment_ids(raw: Dict, by_id: Dict[int, Dict]) -> List[int]:
+    """Sorted, de-duplicated ``segment_ids`` of a raw clip that name known segments."""
+    raw_ids = raw.get("segment_ids")
+    if not isinstance(raw_ids, list):
+        return []
+
+    ids = []
+    for value in raw_ids:
+        try:
+            ids.append(int(value))
+        except (TypeError, ValueError):
+            continue
+    return sorted({i for i in ids if i in by_id})
+
+
+def repair_clip(raw, segments: List[Dict], max_seconds: float) -> List[Clip]:
+    """
+    Validate one raw clip from the LLM, fixing what can be fixed locally.
+
+    Segment ids are de-duplicated, sorted and restricted to known segments
+    (falling back to the claimed time window when ids are missing), gaps
+    split the clip into separate blocks, blocks longer than ``max_seconds``
+    are split, and start/end are snapped to the segment boundaries.
+    Raises ValueError when the clip cannot be salvaged.
+    """
+    if not isinstance(raw, dict):
+        raise ValueError(f"clip is not an object: {raw!r}")
+
+    by_id = {s["id"]: s for s in segments}
+
+    ids = known_segment_ids(raw, by_id)
+    if not ids:
+        try:
+            start, end = float(raw["start_time"]), float(raw["end_time"])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("clip has neither valid segment_ids nor a time window")
+        ids = _segment_ids_for_window(start, end, segments)
+        if not ids:
+            raise ValueError(f"no segments within {start}-{end}")
+
+    title = str(raw.get("title") or "").strip()
+    reason = str(raw.get("reason") or "").strip()
+
+    blocks = []
+    for run in _contiguous_runs(ids):
+        blocks.extend(_split_long_run(run, by_id, max_seconds))
+
+    clips = []
+    for part, block in enumerate(blocks):
+        suffix = f" (pt {part + 1})" if len(blocks) > 1 else ""
+        try:
+            clips.append(
+                Clip(
+                    start_time=by_id[block[0]]["start"],
+                    end_time=by_id[block[-1]]["end"],
+                    segment_ids=block,
+                    reason=reason,
+                    title=(title or f"clip {block[0]}") + suffix,
+                )
+            )
+        except ValidationError as e:
+            raise ValueError(str(e)) from e
+    return clips
+
+
+def repair_clips(
+    raw_clips: List,
+    segments: List[Dict],
+    max_seconds: float,
+) -> Tuple[Clips, List]:
+    """
+    Validate every raw clip independently.
+
+    Returns the repaired, time-ordered, non-overlapping clips and the raw
+    entries that could not be salvaged locally.
+    """
+    repaired: List[Clip] = []
+    failed = []
+    for raw in raw_clips:
+        try:
+            repaired.extend(repair_clip(raw, segments, max_seconds))
+        except ValueError as e:
+            print(f"[WARN] Dropping invalid clip {raw!r}: {e}")
+            failed.append(raw)
+
+    return merge_clips(Clips(clips=repaired)), failed
+
+
+def merge_clips(*clip_sets: Clips) -> Clips:
+    """Combine clip sets in time order, dropping any clip that overlaps an earlier kept one."""
+    ordered = sorted(
+        (clip for clips in clip_sets for clip in clips.clips),
+        key=lambda c: c.start_time,
+    )
+    kept: List[Clip] = []
+    for clip in ordered:
+        if kept and clip.start_time < kept[-1].end_time:
+            continue
+        kept.append(clip)
+    return Clips(clips=kept)
+
+
+def merge_profile_clips(by_profile: Dict[str, Clips]) -> Clips:
+    """
+    One clip set for a single render pass from the clips of several interest profiles.
+
+    With more than one profile, titles are prefixed with the profile name so
+    their files never collide. Clips overlapping an earlier one, typically
+    the same moment picked by two profiles, are dropped as in merge_clips.
+    """
+    if len(by_profile) > 1:
+        by_profile = {
+            name: Clips(clips=[c.model_copy(update={"title": f"{name} - {c.title}"}) for c in clips.clips])
+            for name, clips in by_profile.items()
+        }
+    return merge_clips(*by_profile.values())
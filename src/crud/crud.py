@@ -9,11 +9,19 @@ class ChannelCRUD(CRUDBase[Channel]):
         return self.get_by(db, handle=handle)
 
 from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy import select, insert, delete
 from datetime import datetime
+from typing import TYPE_CHECKING
 
 from crud.crud_base import CRUDBase
-from models.analytics import Channel, Video
+from models.analytics import (
+    Channel, Video, SpeakerVoice, PipelineStageMetric, Transcript, AudioFingerprint, FingerprintHash,
+)
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from transcript_store import CompactTranscript
 
 
 class ChannelCRUD(CRUDBase[Channel]):
@@ -52,5 +60,100 @@ class VideoCRUD(CRUDBase[Video]):
         return video
 
 
+class SpeakerVoiceCRUD(CRUDBase[SpeakerVoice]):
+    def get_by_channel(self, db: Session, channel_id: int) -> list[SpeakerVoice]:
+        return self.get_multi_by(db, channel_id=channel_id)
+
+
+class PipelineStageMetricCRUD(CRUDBase[PipelineStageMetric]):
+    def get_by_video(self, db: Session, video_id: int) -> list[PipelineStageMetric]:
+        return self.get_multi_by(db, video_id=video_id)
+
+    def record(self, db: Session, video_id: int, stages: list[dict]) -> list[PipelineStageMetric]:
+        return self.create_many(db, [{**stage, "video_id": video_id} for stage in stages])
+
+
+class TranscriptCRUD(CRUDBase[Transcript]):
+    def get_by_video(self, db: Session, video_id: int) -> Transcript | None:
+        return self.get_by(db, video_id=video_id)
+
+    def get_by_channel(self, db: Session, channel_id: int) -> list[Transcript]:
+        return (
+            db.query(Transcript)
+            .join(Video, Transcript.video_id == Video.id)
+            .filter(Video.channel_id == channel_id)
+            .all()
+        )
+
+    def save(self, db: Session, video_id: int, transcript: dict) -> Transcript:
+        """Store (or replace) the transcript of a video in packed form."""
+        # numpy-backed, so CRUD users that never touch transcripts don't need it
+        from transcript_store import pack_transcript
+
+        packed = pack_transcript(transcript)
+        existing = self.get_by_video(db, video_id)
+        if existing is not None:
+            return self.update(db, existing, packed)
+        return self.create(db, {**packed, "video_id": video_id})
+
+    def load(self, db: Session, video_id: int) -> "CompactTranscript | None":
+        from transcript_store import CompactTranscript
+
+        row = self.get_by_video(db, video_id)
+        return CompactTranscript.from_row(row) if row is not None else None
+
+
+class AudioFingerprintCRUD(CRUDBase[AudioFingerprint]):
+    LOOKUP_CHUNK = 1000
+
+    def get_by_video(self, db: Session, video_id: int) -> AudioFingerprint | None:
+        return self.get_by(db, video_id=video_id)
+
+    def hashes(self, db: Session, video_id: int) -> "np.ndarray":
+        import numpy as np
+
+        row = self.get_by_video(db, video_id)
+        return np.frombuffer(row.hashes, dtype=np.uint32) if row is not None else np.zeros(0, np.uint32)
+
+    def save(self, db: Session, video_id: int, fingerprint, hop_seconds: float) -> AudioFingerprint:
+        """Store (or replace) a video's fingerprint.Fingerprint and its anchor keys."""
+        import numpy as np
+        from fingerprint import anchors
+
+        db.execute(delete(FingerprintHash).where(FingerprintHash.video_id == video_id))
+        keys, frames = anchors(fingerprint.keys)
+        if len(keys):
+            db.execute(insert(FingerprintHash), [
+                {"key": int(k), "video_id": video_id, "frame": int(f)} for k, f in zip(keys, frames)
+            ])
+        data = {"hashes": fingerprint.hashes.astype(np.uint32).tobytes(), "hop_seconds": hop_seconds}
+        existing = self.get_by_video(db, video_id)
+        if existing is not None:
+            return self.update(db, existing, data)
+        return self.create(db, {**data, "video_id": video_id})
+
+    def lookup(
+        self,
+        db: Session,
+        keys: "np.ndarray",
+        exclude_video_id: int | None = None,
+    ) -> list[tuple[int, int, int]]:
+        """(key, video_id, frame) of stored anchors matching any of ``keys``."""
+        unique = sorted({int(k) for k in keys})
+        rows = []
+        for i in range(0, len(unique), self.LOOKUP_CHUNK):
+            query = select(FingerprintHash.key, FingerprintHash.video_id, FingerprintHash.frame).where(
+                FingerprintHash.key.in_(unique[i:i + self.LOOKUP_CHUNK])
+            )
+            if exclude_video_id is not None:
+                query = query.where(FingerprintHash.video_id != exclude_video_id)
+            rows.extend(tuple(row) for row in db.execute(query).all())
+        return rows
+
+
 channel_crud = ChannelCRUD(Channel)
 video_crud = VideoCRUD(Video)
+speaker_voice_crud = SpeakerVoiceCRUD(SpeakerVoice)
+stage_metric_crud = PipelineStageMetricCRUD(PipelineStageMetric)
+transcript_crud = TranscriptCRUD(Transcript)
+fingerprint_crud = AudioFingerprintCRUD(AudioFingerprint)
@@ -0,0 +1,35 @@
+import os
+from functools import lru_cache
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models.analytics import Base
+
+
+def database_url() -> str:
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        raise RuntimeError("DATABASE_URL is not set in the environment")
+    return url
+
+
+@lru_cache(maxsize=None)
+def get_engine(url: str = None):
+    """Engine for ``url`` (default DATABASE_URL), created on first use rather than at import."""
+    return create_engine(url or database_url(), future=True)
+
+
+@lru_cache(maxsize=None)
+def get_sessionmaker(url: str = None) -> sessionmaker:
+    return sessionmaker(
+        autocommit=False,
+        autoflush=False,
+        bind=get_engine(url),
+        future=True,
+    )
+
+
+def init_db(url: str = None) -> None:
+    """For dev: create tables if they don't exist. In prod you'd use migrations."""
+    Base.metadata.create_all(bind=get_engine(url))
@@ -1,14 +1,227 @@
-from yt_dlp import YoutubeDL
+from concurrent.futures import Future, ThreadPoolExecutor
+from loguru import logger
+from typing import Callable, Dict, List, Tuple
 import os
+import re
+import threading
+import time
 
+MAX_VIDEO_HEIGHT = int(os.getenv("MAX_VIDEO_HEIGHT", 1080))
+# extra seconds fetched around each clip so the cut never starts before a keyframe
+KEYFRAME_PADDING_SECONDS = float(os.getenv("KEYFRAME_PADDING_SECONDS", 5.0))
+# parallel fragment (DASH/HLS segment) downloads per file
+DOWNLOAD_FRAGMENT_CONCURRENCY = int(os.getenv("DOWNLOAD_FRAGMENT_CONCURRENCY", 4))
+# videos downloaded at the same time by the DownloadManager
+DOWNLOAD_MAX_PARALLEL = int(os.getenv("DOWNLOAD_MAX_PARALLEL", 2))
 
-def download_youtube_video(url: str, output_dir: str = "downloads", dry_run: bool = False) -> str:
-    """Download a YouTube video to the specified directory."""
-    os.makedirs(output_dir, exist_ok=True)
-    ydl_opts = {"outtmpl": os.path.join(output_dir, "%(title)s.%(ext)s"), "simulate": dry_run}
+# smallest audio-only stream; speech recognition does not need more
+AUDIO_FORMAT = "worstaudio[acodec!=none]/bestaudio/worst"
+
+_YOUTUBE_ID = re.compile(r"(?:v=|youtu\.be/|shorts/|live/|embed/)([\w-]{11})")
+
+
+def video_id_from_url(url: str) -> str:
+    """YouTube video id for a watch/shorts/youtu.be URL, or the URL itself if none is found."""
+    match = _YOUTUBE_ID.search(url)
+    return match.group(1) if match else url
+
+
+def _video_format(max_height: int) -> str:
+    return (
+        f"bestvideo[height<={max_height}]+bestaudio"
+        f"/best[height<={max_height}]/best"
+    )
+
+
+class ThroughputMeter:
+    """yt-dlp progress hook that totals bytes across every file of one download."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.bytes = 0
+
+    def __call__(self, d: Dict) -> None:
+        if d.get("status") == "finished":
+            self.bytes += d.get("total_bytes") or d.get("downloaded_bytes") or 0
+
+    def report(self, what: str) -> Dict[str, float]:
+        seconds = time.perf_counter() - self.started
+        mb = self.bytes / (1024 * 1024)
+        rate = mb / seconds if seconds > 0 else 0.0
+        logger.info(f"Downloaded {mb:.1f} MB in {seconds:.1f}s ({rate:.2f} MB/s): {what}")
+        return {"bytes": self.bytes, "seconds": seconds, "mb_per_s": rate}
+
+
+def _ydl_opts(output_dir: str, template: str, dry_run: bool, meter: ThroughputMeter, **extra) -> Dict:
+    return {
+        # files are named by video id, so equal titles never collide
+        "outtmpl": os.path.join(output_dir, template),
+        "simulate": dry_run,
+        # resume .part files left behind by an interrupted run, keep finished files
+        "continuedl": True,
+        "overwrites": False,
+        # keep the local mtime so storage eviction sees when the file was fetched
+        "updatetime": False,
+        "concurrent_fragment_downloads": DOWNLOAD_FRAGMENT_CONCURRENCY,
+        "progress_hooks": [meter],
+        **extra,
+    }
+
+
+def _download(url: str, ydl_opts: Dict) -> str:
+    # yt-dlp is imported on first download to keep CLI startup fast
+    from yt_dlp import YoutubeDL
 
     with YoutubeDL(ydl_opts) as ydl:
         info = ydl.extract_info(url, download=True)
-        video_path = ydl.prepare_filename(info)
+        downloads = info.get("requested_downloads") or [{}]
+        return downloads[0].get("filepath") or ydl.prepare_filename(info)
+
 
+def download_youtube_video(
+    url: str,
+    output_dir: str = "downloads",
+    dry_run: bool = False,
+    max_height: int = MAX_VIDEO_HEIGHT,
+) -> str:
+    """Download a YouTube video (at most ``max_height`` pixels tall) to the specified directory."""
+    os.makedirs(output_dir, exist_ok=True)
+    meter = ThroughputMeter()
+    ydl_opts = _ydl_opts(
+        output_dir,
+        "%(id)s.%(ext)s",
+        dry_run,
+        meter,
+        format=_video_format(max_height),
+        merge_output_format="mp4",
+    )
+
+    video_path = _download(url, ydl_opts)
+    meter.report(video_path)
     return video_path
+
+
+def download_youtube_audio(url: str, output_dir: str = "downloads", dry_run: bool = False) -> str:
+    """Download only the lowest-bandwidth audio stream of a YouTube video."""
+    os.makedirs(output_dir, exist_ok=True)
+    meter = ThroughputMeter()
+    ydl_opts = _ydl_opts(output_dir, "%(id)s.audio.%(ext)s", dry_run, meter, format=AUDIO_FORMAT)
+
+    audio_path = _download(url, ydl_opts)
+    meter.report(audio_path)
+    return audio_path
+
+
+def clip_windows(
+    clips,
+    padding: float = KEYFRAME_PADDING_SECONDS,
+) -> List[Tuple[float, float]]:
+    """Padded (start, end) windows covering all clips, with overlapping windows merged."""
+    spans = sorted(
+        (max(0.0, clip.start_time - padding), clip.end_time + padding)
+        for clip in clips.clips
+    )
+    windows: List[List[float]] = []
+    for start, end in spans:
+        if windows and start <= windows[-1][1]:
+            windows[-1][1] = max(windows[-1][1], end)
+        else:
+            windows.append([start, end])
+    return [(start, end) for start, end in windows]
+
+
+def download_youtube_sections(
+    url: str,
+    windows: List[Tuple[float, float]],
+    output_dir: str = "downloads",
+    dry_run: bool = False,
+    max_height: int = MAX_VIDEO_HEIGHT,
+) -> List[Dict]:
+    """
+    Download only the given time windows of a YouTube video.
+
+    yt-dlp seeks into the remote stream, so only the bytes covering each
+    window are transferred. Returns ``{"path", "start", "end"}`` per window;
+    ``start`` is the position of the file's t=0 in the full video.
+    """
+    from yt_dlp.utils import download_range_func
+
+    os.makedirs(output_dir, exist_ok=True)
+    meter = ThroughputMeter()
+    sections = []
+    for start, end in windows:
+        ydl_opts = _ydl_opts(
+            output_dir,
+            "%(id)s.%(section_start)d-%(section_end)d.%(ext)s",
+            dry_run,
+            meter,
+            format=_video_format(max_height),
+            merge_output_format="mp4",
+            download_ranges=download_range_func(None, [(start, end)]),
+        )
+        sections.append({"path": _download(url, ydl_opts), "start": start, "end": end})
+
+    meter.report(f"{len(sections)} sections of {url}")
+    return sections
+
+
+class DownloadManager:
+    """
+    Runs downloads on a bounded thread pool and de-duplicates them.
+
+    Concurrent requests for the same kind of download of the same video
+    share one in-flight job instead of fetching the file twice.
+    """
+
+    def __init__(self, max_parallel: int = DOWNLOAD_MAX_PARALLEL):
+        self._pool = ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix="download")
+        self._lock = threading.Lock()
+        self._inflight: Dict[Tuple, Future] = {}
+
+    def submit(self, key: Tuple, fn: Callable, *args, **kwargs) -> Future:
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None and not future.done():
+                logger.info(f"Joining in-flight download {key}")
+                return future
+            future = self._pool.submit(fn, *args, **kwargs)
+            self._inflight[key] = future
+
+        future.add_done_callback(lambda _: self._forget(key))
+        return future
+
+    def _forget(self, key: Tuple) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    def video(self, url: str, dry_run: bool = False, max_height: int = MAX_VIDEO_HEIGHT, **kwargs) -> str:
+        key = ("video", video_id_from_url(url), max_height, dry_run)
+        return self.submit(
+            key, download_youtube_video, url, dry_run=dry_run, max_height=max_height, **kwargs
+        ).result()
+
+    def audio(self, url: str, dry_run: bool = False, **kwargs) -> str:
+        key = ("audio", video_id_from_url(url), dry_run)
+        return self.submit(key, download_youtube_audio, url, dry_run=dry_run, **kwargs).result()
+
+    def sections(
+        self,
+        url: str,
+        windows: List[Tuple[float, float]],
+        dry_run: bool = False,
+        max_height: int = MAX_VIDEO_HEIGHT,
+        **kwargs,
+    ) -> List[Dict]:
+        key = ("sections", video_id_from_url(url), tuple(windows), max_height, dry_run)
+        return self.submit(
+            key,
+            download_youtube_sections,
+            url,
+            windows,
+            dry_run=dry_run,
+            max_height=max_height,
+            **kwargs,
+        ).result()
+
+
+download_manager = DownloadManager()
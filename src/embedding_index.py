@@ -0,0 +1,276 @@
+"""
+Semantic index over stored transcript segments.
+
+    python embedding_index.py build --channel @GoogleDevelopers
+    python embedding_index.py query "heated disagreement" --channel @GoogleDevelopers --analyze
+
+Segments are embedded once with a small CPU sentence-embedding model and
+kept as one float32 ``.npy`` per video (memory-mapped on load). A new
+interestingness prompt is matched against the whole library by cosine
+similarity, and only the best segments of each video, with their
+neighbours, are sent to ``analyze_impact``.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+from functools import cached_property
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+EMBEDDING_INDEX_DIR = os.getenv("EMBEDDING_INDEX_DIR", "embeddings")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 64))
+EMBEDDING_TOP_K = int(os.getenv("EMBEDDING_TOP_K", 200))
+EMBEDDING_CONTEXT_SEGMENTS = 2   # neighbours sent along with every matched segment
+
+# (video_id, segment id, cosine similarity)
+Match = Tuple[int, int, float]
+
+
+class SentenceEncoder:
+    """sentence-transformers model on the CPU, loaded on first use."""
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL, batch_size: int = EMBEDDING_BATCH_SIZE):
+        self.model_name = model_name
+        self.batch_size = batch_size
+
+    @cached_property
+    def _model(self):
+        from sentence_transformers import SentenceTransformer
+
+        return SentenceTransformer(self.model_name, device="cpu")
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """Unit-length float32 embeddings, one row per text."""
+        vectors = self._model.encode(
+            list(texts),
+            batch_size=self.batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+        )
+        return np.asarray(vectors, dtype=np.float32)
+
+
+def transcript_version(row) -> str:
+    """Changes whenever the stored segments of a Transcript row do (times or text)."""
+    digest = hashlib.sha256(row.starts + row.ends + row.text_offsets + row.text).hexdigest()
+    return f"{row.segment_count}:{digest[:16]}"
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class SegmentEmbeddingIndex:
+    """
+    Per-video segment embeddings under ``<directory>/<model>/<video_id>.npy``.
+
+    The model name is part of the path, so switching ``EMBEDDING_MODEL``
+    starts a fresh index instead of mixing incompatible vectors. A
+    ``<video_id>.json`` next to the vectors records the transcript version
+    they were computed from.
+    """
+
+    def __init__(self, encoder, directory: str = EMBEDDING_INDEX_DIR, model_name: str = EMBEDDING_MODEL):
+        self.encoder = encoder
+        self.directory = os.path.join(directory, re.sub(r"[^\w.-]", "_", model_name))
+        os.makedirs(self.directory, exist_ok=True)
+        self._vectors: Dict[int, np.ndarray] = {}
+
+    def _path(self, video_id: int) -> str:
+        return os.path.join(self.directory, f"{video_id}.npy")
+
+    def video_ids(self) -> List[int]:
+        return sorted(int(name[:-4]) for name in os.listdir(self.directory) if name.endswith(".npy"))
+
+    def _meta_path(self, video_id: int) -> str:
+        return os.path.join(self.directory, f"{video_id}.json")
+
+    def has(self, video_id: int) -> bool:
+        return os.path.exists(self._path(video_id))
+
+    def version(self, video_id: int) -> Optional[str]:
+        """Transcript version the stored vectors belong to (None if unknown)."""
+        try:
+            with open(self._meta_path(video_id), "r", encoding="utf-8") as fh:
+                return json.load(fh).get("version")
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def add(self, video_id: int, texts: Sequence[str], version: Optional[str] = None) -> np.ndarray:
+        """Embed the segment texts of one video, replacing any earlier vectors."""
+        vectors = _normalize(self.encoder.encode(texts)) if len(texts) else np.zeros((0, 0), np.float32)
+        tmp = self._path(video_id) + ".tmp"
+        with open(tmp, "wb") as fh:
+            np.save(fh, vectors.astype(np.float32))
+        os.replace(tmp, self._path(video_id))
+        tmp = self._meta_path(video_id) + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({"version": version, "segments": len(vectors)}, fh)
+        os.replace(tmp, self._meta_path(video_id))
+        self._vectors.pop(video_id, None)
+        return vectors
+
+    def vectors(self, video_id: int) -> np.ndarray:
+        if video_id not in self._vectors:
+            self._vectors[video_id] = np.load(self._path(video_id), mmap_mode="r")
+        return self._vectors[video_id]
+
+    def search(
+        self,
+        prompt: str,
+        top_k: int = EMBEDDING_TOP_K,
+        video_ids: Optional[Iterable[int]] = None,
+    ) -> List[Match]:
+        """The ``top_k`` segments across the library most similar to ``prompt``, best first."""
+        query = _normalize(self.encoder.encode([prompt]))[0]
+        matches: List[Match] = []
+        for video_id in (self.video_ids() if video_ids is None else video_ids):
+            if not self.has(video_id):
+                continue
+            vectors = self.vectors(video_id)
+            if not len(vectors):
+                continue
+            scores = vectors @ query
+            k = min(top_k, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k]
+            matches.extend((video_id, int(i), float(scores[i])) for i in top)
+            # keep only the running top_k so memory stays bounded on large libraries
+            if len(matches) > 4 * top_k:
+                matches = sorted(matches, key=lambda m: -m[2])[:top_k]
+        return sorted(matches, key=lambda m: -m[2])[:top_k]
+
+
+def candidates_by_video(matches: Iterable[Match]) -> Dict[int, List[Tuple[int, float]]]:
+    result: Dict[int, List[Tuple[int, float]]] = {}
+    for video_id, segment_id, score in matches:
+        result.setdefault(video_id, []).append((segment_id, score))
+    return result
+
+
+def reduce_transcript(
+    transcript: Dict,
+    segment_ids: Iterable[int],
+    context: int = EMBEDDING_CONTEXT_SEGMENTS,
+) -> Dict:
+    """Copy of ``transcript`` with only ``segment_ids`` and their neighbours (ids unchanged)."""
+    segments = transcript["segments"]
+    ids = np.fromiter(segment_ids, dtype=np.int64)
+    ids = ids[(ids >= 0) & (ids < len(segments))]
+    keep = np.zeros(len(segments), dtype=bool)
+    if len(segments):
+        for offset in range(-context, context + 1):
+            keep[np.clip(ids + offset, 0, len(segments) - 1)] = True
+    reduced = dict(transcript)
+    reduced["segments"] = [segments[i] for i in np.flatnonzero(keep)]
+    return reduced
+
+
+def build(db, index: SegmentEmbeddingIndex, channel_id: Optional[int] = None, rebuild: bool = False) -> int:
+    """
+    Embed every stored transcript that is not in the index, or whose vectors
+    were computed from an older version of it; returns the number of videos embedded.
+    """
+    from crud.crud import transcript_crud
+    from transcript_store import CompactTranscript
+
+    rows = (
+        transcript_crud.get_by_channel(db, channel_id)
+        if channel_id is not None
+        else transcript_crud.get_multi_by(db)
+    )
+    added = 0
+    for row in rows:
+        version = transcript_version(row)
+        if not rebuild and index.has(row.video_id) and index.version(row.video_id) == version:
+            continue
+        transcript = CompactTranscript.from_row(row)
+        index.add(row.video_id, [transcript.text(i) for i in range(len(transcript))], version)
+        added += 1
+    return added
+
+
+def load_indexed_transcript(db, index: SegmentEmbeddingIndex, video_id: int) -> Optional[Dict]:
+    """
+    Stored transcript of ``video_id`` if the index was built from this version
+    of it, else None: segment ids from stale vectors point at the wrong segments.
+    """
+    from crud.crud import transcript_crud
+    from transcript_store import CompactTranscript
+
+    row = transcript_crud.get_by_video(db, video_id)
+    if row is None or index.version(video_id) != transcript_version(row):
+        return None
+    return CompactTranscript.from_row(row).to_transcript()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Semantic search over stored transcripts")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build_parser = sub.add_parser("build", help="Embed transcripts that are not indexed yet")
+    build_parser.add_argument("--channel")
+    build_parser.add_argument("--rebuild", action="store_true")
+    query_parser = sub.add_parser("query", help="Find segments matching an interestingness prompt")
+    query_parser.add_argument("prompt")
+    query_parser.add_argument("--channel")
+    query_parser.add_argument("--top-k", type=int, default=EMBEDDING_TOP_K)
+    query_parser.add_argument("--analyze", action="store_true",
+                              help="Send the matched segments of each video to the LLM")
+    query_parser.add_argument("--cut", action="store_true", help="Download and cut the LLM's clips")
+    args = parser.parse_args()
+
+    from crud.crud import channel_crud, video_crud
+    from database import get_sessionmaker
+
+    index = SegmentEmbeddingIndex(SentenceEncoder())
+    with get_sessionmaker()() as db:
+        channel_id = None
+        if args.channel:
+            channel = channel_crud.get_by_handle(db, args.channel)
+            if channel is None:
+                print(f"Channel not found: {args.channel}")
+                return
+            channel_id = channel.id
+
+        if args.command == "build":
+            print(f"Embedded {build(db, index, channel_id, args.rebuild)} transcripts")
+            return
+
+        video_ids = None
+        if channel_id is not None:
+            video_ids = [v.id for v in video_crud.get_by_channel(db, channel_id)]
+        by_video = candidates_by_video(index.search(args.prompt, args.top_k, video_ids))
+
+        for video_id, hits in by_video.items():
+            video = video_crud.get(db, video_id)
+            transcript = load_indexed_transcript(db, index, video_id)
+            if transcript is None:
+                print(f"[WARN] {video.title} ({video.url}): transcript changed since it was embedded, "
+                      "run `embedding_index.py build` first")
+                continue
+            hits = [(i, score) for i, score in hits if 0 <= i < len(transcript["segments"])]
+            print(f"{video.title} ({video.url}): {len(hits)} matching segments")
+            for segment_id, score in hits[:5]:
+                seg = transcript["segments"][segment_id]
+                print(f"  {score:.2f} [{seg['start']:.1f}-{seg['end']:.1f}]{seg['text']}")
+
+            if not args.analyze:
+                continue
+            from llm_requests import analyze_impact
+
+            reduced = reduce_transcript(transcript, [segment_id for segment_id, _ in hits])
+            clips = analyze_impact(reduced, args.prompt)
+            print(f"  LLM selected {len(clips.clips)} clips from {len(reduced['segments'])} segments")
+            if args.cut and clips.clips:
+                from clip_editor import generate_clips
+                from download import download_manager
+
+                generate_clips(download_manager.video(video.url), clips)
+
+
+if __name__ == "__main__":
+    main()
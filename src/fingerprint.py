@@ -0,0 +1,353 @@
+import os
+import wave
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from vad import GAP_SECONDS, Region, remap_transcript
+
+FINGERPRINT_SAMPLE_RATE = 8000
+FINGERPRINT_HOP_SECONDS = 0.1
+FINGERPRINT_WINDOW = 2048            # samples at 8 kHz (256 ms)
+FINGERPRINT_BANDS = (300.0, 2000.0)  # 33 log-spaced edges -> 32 bands -> 32 bits
+KEY_STEP = 2                         # hops between the frames packed into a key
+ANCHOR_MASK = 0x1                    # keys with these bits clear are indexed (~1/2)
+SILENCE_RATIO = 0.01                 # frames quieter than this share of the median get no key
+MIN_VOTES = 8                        # anchor hits at one offset before a candidate is verified
+MAX_BIT_ERROR = 0.4                  # mean bit error rate of a matching stretch
+MATCH_SMOOTH_SECONDS = 2.0
+MIN_MATCH_SECONDS = float(os.getenv("FINGERPRINT_MIN_MATCH_SECONDS", 10))
+DUPLICATE_COVERAGE = float(os.getenv("FINGERPRINT_DUPLICATE_COVERAGE", 0.9))
+_CHUNK_FRAMES = 4096
+
+
+# -----------------------------
+# Fingerprints
+# -----------------------------
+
+def _read_wav(audio_path: str, sr: int = FINGERPRINT_SAMPLE_RATE) -> np.ndarray:
+    """Mono float32 at ``sr`` from a 16-bit PCM WAV, decimated by block averaging while streaming."""
+    with wave.open(audio_path, "rb") as wf:
+        if wf.getsampwidth() != 2:
+            raise ValueError(f"Expected 16-bit PCM audio, got {8 * wf.getsampwidth()}-bit: {audio_path}")
+        channels = wf.getnchannels()
+        factor = max(1, wf.getframerate() // sr)
+        chunks = []
+        carry = np.empty(0, dtype=np.float32)
+        while True:
+            raw = wf.readframes(factor * 65536)
+            if not raw:
+                break
+            samples = np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0
+            if channels > 1:
+                samples = samples.reshape(-1, channels).mean(axis=1)
+            samples = np.concatenate([carry, samples])
+            usable = (len(samples) // factor) * factor
+            carry = samples[usable:]
+            chunks.append(samples[:usable].reshape(-1, factor).mean(axis=1))
+    return np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
+
+
+class Fingerprint(NamedTuple):
+    hashes: np.ndarray   # uint32 sub-fingerprint per hop, for bitwise alignment
+    keys: np.ndarray     # int32 lookup key per hop (-1 in silence), for finding candidates
+
+
+def _band_energies(signal: np.ndarray, sr: int) -> np.ndarray:
+    hop = int(sr * FINGERPRINT_HOP_SECONDS)
+    freqs = np.fft.rfftfreq(FINGERPRINT_WINDOW, 1 / sr)
+    band = np.digitize(freqs, np.geomspace(*FINGERPRINT_BANDS, 34)) - 1
+    in_range = (band >= 0) & (band < 33)
+    window = np.hanning(FINGERPRINT_WINDOW).astype(np.float32)
+
+    frames = np.lib.stride_tricks.sliding_window_view(signal, FINGERPRINT_WINDOW)[::hop]
+    energies = []
+    for i in range(0, len(frames), _CHUNK_FRAMES):
+        power = np.abs(np.fft.rfft(frames[i:i + _CHUNK_FRAMES] * window, axis=1)) ** 2
+        e = np.zeros((len(power), 33), dtype=np.float64)
+        np.add.at(e.T, band[in_range], power[:, in_range].T)
+        energies.append(e)
+    return np.concatenate(energies)
+
+
+def fingerprint_signal(signal: np.ndarray, sr: int = FINGERPRINT_SAMPLE_RATE) -> Fingerprint:
+    """
+    Per ``FINGERPRINT_HOP_SECONDS``: a 32-bit sub-fingerprint and a lookup key.
+
+    Hash bit m is the sign of the change over time of the energy difference
+    between bands m and m+1 (Haitsma-Kalker); it survives re-encoding and
+    volume changes, but too many bits flip for exact lookups. The key packs
+    the loudest band of three frames spread over half a second, which stays
+    stable enough to find candidates that the hashes then verify.
+    """
+    if len(signal) < FINGERPRINT_WINDOW + 2 * int(sr * FINGERPRINT_HOP_SECONDS):
+        return Fingerprint(np.zeros(0, dtype=np.uint32), np.zeros(0, dtype=np.int32))
+
+    energy = _band_energies(signal, sr)
+    diff = energy[:, :-1] - energy[:, 1:]
+    bits = (diff[1:] - diff[:-1]) > 0
+    hashes = (bits.astype(np.uint64) << np.arange(32, dtype=np.uint64)).sum(axis=1).astype(np.uint32)
+
+    # frame i of the hashes is energy frame i + 1
+    total = energy[1:].sum(axis=1)
+    peaks = energy[1:, :32].argmax(axis=1).astype(np.int32)
+    keys = np.full(len(hashes), -1, dtype=np.int32)
+    span = 2 * KEY_STEP
+    if len(peaks) > span:
+        keys[:-span] = peaks[:-span] | (peaks[KEY_STEP:-KEY_STEP] << 5) | (peaks[span:] << 10)
+        quiet = total < SILENCE_RATIO * np.median(total)
+        keys[quiet] = -1
+    return Fingerprint(hashes, keys)
+
+
+def fingerprint_audio(audio_path: str) -> Fingerprint:
+    return fingerprint_signal(_read_wav(audio_path))
+
+
+def anchors(keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(key, frame) pairs that go into the lookup index; every other key value is sampled."""
+    frames = np.flatnonzero((keys >= 0) & ((keys & ANCHOR_MASK) == 0))
+    return keys[frames], frames
+
+
+# -----------------------------
+# Matching
+# -----------------------------
+
+@dataclass
+class Overlap:
+    video_id: int
+    start: float        # seconds in the new audio
+    end: float
+    offset: float       # add to a new-audio time to get the matched video's time
+
+
+def vote_offsets(
+    keys: np.ndarray,
+    postings: List[Tuple[int, int, int]],
+    min_votes: int = MIN_VOTES,
+) -> List[Tuple[int, int]]:
+    """
+    Candidate (video_id, frame offset) pairs from anchor lookups.
+
+    ``postings`` are (key, video_id, frame) rows of stored anchors. Votes
+    of neighbouring offsets are pooled to absorb misaligned hops.
+    """
+    query_frames: Dict[int, List[int]] = defaultdict(list)
+    for key, frame in zip(*anchors(keys)):
+        query_frames[int(key)].append(int(frame))
+
+    votes: Counter = Counter()
+    for key, video_id, frame in postings:
+        for q in query_frames.get(key, ()):
+            votes[(video_id, frame - q)] += 1
+
+    pooled = {
+        key: sum(votes.get((key[0], key[1] + d), 0) for d in (-1, 0, 1))
+        for key in votes
+    }
+    candidates = []
+    for (video_id, offset), n in sorted(pooled.items(), key=lambda kv: -kv[1]):
+        if n < min_votes:
+            break
+        if any(v == video_id and abs(o - offset) <= 1 for v, o in candidates):
+            continue
+        candidates.append((video_id, offset))
+    return candidates
+
+
+def _runs(mask: np.ndarray) -> List[Tuple[int, int]]:
+    padded = np.concatenate([[False], mask, [False]])
+    edges = np.flatnonzero(np.diff(padded.astype(np.int8)))
+    return list(zip(edges[::2], edges[1::2]))
+
+
+def aligned_regions(
+    query: np.ndarray,
+    stored: np.ndarray,
+    offset: int,
+    max_bit_error: float = MAX_BIT_ERROR,
+    min_seconds: float = MIN_MATCH_SECONDS,
+) -> List[Tuple[int, int]]:
+    """Frame ranges of ``query`` that match ``stored`` shifted by ``offset`` frames."""
+    lo = max(0, -offset)
+    hi = min(len(query), len(stored) - offset)
+    if hi - lo <= 0:
+        return []
+    errors = np.bitwise_count(query[lo:hi] ^ stored[lo + offset:hi + offset]) / 32.0
+    width = max(1, int(MATCH_SMOOTH_SECONDS / FINGERPRINT_HOP_SECONDS))
+    smoothed = np.convolve(errors, np.ones(width) / width, mode="same")
+    min_frames = int(min_seconds / FINGERPRINT_HOP_SECONDS)
+    return [(lo + s, lo + e) for s, e in _runs(smoothed < max_bit_error) if e - s >= min_frames]
+
+
+def find_overlaps(query: Fingerprint, postings, load_hashes, min_votes: int = MIN_VOTES) -> List[Overlap]:
+    """
+    Stretches of ``query`` that re-use audio of stored videos.
+
+    ``load_hashes(video_id)`` returns a stored video's sub-fingerprints.
+    """
+    overlaps = []
+    stored: Dict[int, np.ndarray] = {}
+    for video_id, offset in vote_offsets(query.keys, postings, min_votes):
+        if video_id not in stored:
+            stored[video_id] = load_hashes(video_id)
+        # the pooled offset can be one hop off; keep whichever aligns best
+        best = max(
+            (offset + d for d in (-1, 0, 1)),
+            key=lambda o: sum(e - s for s, e in aligned_regions(query.hashes, stored[video_id], o)),
+        )
+        for s, e in aligned_regions(query.hashes, stored[video_id], best):
+            overlaps.append(Overlap(
+                video_id,
+                s * FINGERPRINT_HOP_SECONDS,
+                e * FINGERPRINT_HOP_SECONDS,
+                best * FINGERPRINT_HOP_SECONDS,
+            ))
+    return _disjoint(overlaps)
+
+
+def _disjoint(overlaps: List[Overlap]) -> List[Overlap]:
+    """Longest overlaps first; later ones are trimmed to the parts not yet covered."""
+    kept: List[Overlap] = []
+    for o in sorted(overlaps, key=lambda o: o.start - o.end):
+        start, end = o.start, o.end
+        for k in kept:
+            if k.start <= start < k.end:
+                start = k.end
+            if k.start < end <= k.end:
+                end = k.start
+        if end - start >= MIN_MATCH_SECONDS and not any(k.start < end and start < k.end for k in kept):
+            kept.append(Overlap(o.video_id, start, end, o.offset))
+    return sorted(kept, key=lambda o: o.start)
+
+
+# -----------------------------
+# Transcript reuse
+# -----------------------------
+
+@dataclass
+class ReusePlan:
+    """Transcript segments borrowed from matched videos, on the new audio's timeline."""
+    duration: float
+    overlaps: List[Overlap] = field(default_factory=list)
+    segments: List[Dict] = field(default_factory=list)
+
+    @property
+    def covered_seconds(self) -> float:
+        return sum(o.end - o.start for o in self.overlaps)
+
+    @property
+    def is_duplicate(self) -> bool:
+        return self.duration > 0 and self.covered_seconds >= DUPLICATE_COVERAGE * self.duration
+
+    def uncovered(self) -> List[Region]:
+        regions = []
+        position = 0.0
+        for o in self.overlaps:
+            if o.start > position:
+                regions.append((position, o.start))
+            position = max(position, o.end)
+        if position < self.duration:
+            regions.append((position, self.duration))
+        return regions
+
+    def transcript(self, transcribed: Optional[Dict] = None) -> Dict:
+        """Borrowed segments merged with ``transcribed`` (already on the original timeline)."""
+        segments = sorted(
+            [dict(s) for s in self.segments] + [dict(s) for s in (transcribed or {}).get("segments", [])],
+            key=lambda s: s["start"],
+        )
+        for i, seg in enumerate(segments):
+            seg["id"] = i
+        return {
+            "text": "".join(s["text"] for s in segments),
+            "segments": segments,
+            "language": (transcribed or {}).get("language"),
+        }
+
+
+def borrow_segments(overlap: Overlap, transcript) -> List[Dict]:
+    """Segments of a stored CompactTranscript inside ``overlap``, moved onto the new timeline."""
+    segments = []
+    for seg in transcript.segments(overlap.start + overlap.offset, overlap.end + overlap.offset):
+        start = max(seg["start"] - overlap.offset, overlap.start)
+        end = min(seg["end"] - overlap.offset, overlap.end)
+        # segments straddling the edge stay with the side holding most of them
+        if end - start >= (seg["end"] - seg["start"]) / 2:
+            segments.append(dict(seg, start=start, end=end))
+    return segments
+
+
+def write_regions(audio_path: str, regions: List[Region], output_path: str) -> np.ndarray:
+    """
+    Copy ``regions`` of a WAV into ``output_path``, separated by short silences.
+
+    Streams frame ranges, so the source is never fully loaded. Returns the
+    start of every region in the new file for ``vad.remap_transcript``.
+    """
+    with wave.open(audio_path, "rb") as src, wave.open(output_path, "wb") as dst:
+        dst.setparams(src.getparams())
+        sr = src.getframerate()
+        gap = b"\x00" * (int(sr * GAP_SECONDS) * src.getsampwidth() * src.getnchannels())
+        starts = []
+        position = 0
+        for start, end in regions:
+            src.setpos(min(int(start * sr), src.getnframes()))
+            data = src.readframes(max(0, int(end * sr) - int(start * sr)))
+            starts.append(position / sr)
+            dst.writeframes(data + gap)
+            position += (len(data) + len(gap)) // (src.getsampwidth() * src.getnchannels())
+    return np.asarray(starts)
+
+
+def transcribe_uncovered(transcriber, audio_path: str, model_size: str, plan: ReusePlan) -> Dict:
+    """Transcribe only the parts of ``audio_path`` no stored video covers and merge with ``plan``."""
+    regions = plan.uncovered()
+    if not regions:
+        return plan.transcript()
+    base, ext = os.path.splitext(audio_path)
+    gated_path = f"{base}.uncovered{ext}"
+    try:
+        starts = write_regions(audio_path, regions, gated_path)
+        transcribed = transcriber.transcribe(gated_path, model_size)
+    finally:
+        if os.path.exists(gated_path):
+            os.remove(gated_path)
+    return plan.transcript(remap_transcript(transcribed, regions, starts))
+
+
+class FingerprintDeduplicator:
+    """
+    Fingerprints each new audio track, stores it for the video with the
+    same URL and plans transcript reuse from already-processed videos.
+    """
+
+    def __init__(self, session_factory):
+        self.session_factory = session_factory
+
+    def plan(self, url: str, audio_path: str) -> ReusePlan:
+        from crud.crud import fingerprint_crud, transcript_crud, video_crud
+
+        fingerprint = fingerprint_audio(audio_path)
+        plan = ReusePlan(duration=len(fingerprint.hashes) * FINGERPRINT_HOP_SECONDS)
+        with self.session_factory() as db:
+            video = video_crud.get_by(db, url=url)
+            own_id = video.id if video is not None else None
+            postings = fingerprint_crud.lookup(db, anchors(fingerprint.keys)[0], exclude_video_id=own_id)
+
+            def load(video_id: int) -> np.ndarray:
+                return fingerprint_crud.hashes(db, video_id)
+
+            for overlap in find_overlaps(fingerprint, postings, load):
+                transcript = transcript_crud.load(db, overlap.video_id)
+                if transcript is None:
+                    continue
+                plan.overlaps.append(overlap)
+                plan.segments.extend(borrow_segments(overlap, transcript))
+
+            if own_id is not None:
+                fingerprint_crud.save(db, own_id, fingerprint, FINGERPRINT_HOP_SECONDS)
+        return plan
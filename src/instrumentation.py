@@ -0,0 +1,209 @@
+import os
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, Optional
+
+from loguru import logger
+
+METRICS_PORT = int(os.getenv("METRICS_PORT", 0))
+RSS_SAMPLE_SECONDS = float(os.getenv("RSS_SAMPLE_SECONDS", 0.05))
+
+
+@dataclass
+class StageMetrics:
+    stage: str
+    wall_seconds: float = 0.0
+    # process-wide, so stages running side by side each include the other's CPU time
+    cpu_seconds: float = 0.0
+    # highest process RSS sampled while the stage ran (also process-wide)
+    peak_rss_bytes: int = 0
+    gpu_peak_bytes: Optional[int] = None
+    bytes_processed: int = 0
+
+    def add_file(self, path: Optional[str]) -> None:
+        """Count a stage's input/output file towards ``bytes_processed``."""
+        if path and os.path.isfile(path):
+            self.bytes_processed += os.path.getsize(path)
+
+
+def _peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _current_rss_bytes() -> Optional[int]:
+    """Resident set size right now, from /proc (None where that does not exist)."""
+    try:
+        with open("/proc/self/statm", "rb") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class _RssSampler:
+    """
+    Peak RSS over a stage, polled every ``interval`` seconds in a daemon thread.
+
+    ru_maxrss is the lifetime high-water mark of the process, so it cannot
+    tell stages apart; without /proc it is still the fallback.
+    """
+
+    def __init__(self, interval: float = RSS_SAMPLE_SECONDS):
+        self.interval = interval
+        self.peak = _current_rss_bytes()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self) -> None:
+        rss = _current_rss_bytes()
+        if rss is not None and rss > self.peak:
+            self.peak = rss
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self) -> "_RssSampler":
+        if self.peak is not None:
+            self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> int:
+        if self._thread is None:
+            return _peak_rss_bytes()
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+        return self.peak
+
+
+def _cuda():
+    """torch.cuda if torch is already loaded and a GPU is present; never imports torch itself."""
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_available():
+        return torch.cuda
+    return None
+
+
+class PipelineMetrics:
+    """Per-stage measurements for one pipeline run."""
+
+    def __init__(self, video: str = "", registry: Optional["MetricsRegistry"] = None):
+        self.video = video
+        self.registry = registry
+        self.stages: List[StageMetrics] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageMetrics]:
+        m = StageMetrics(name)
+        cuda = _cuda()
+        if cuda is not None:
+            cuda.reset_peak_memory_stats()
+        rss = _RssSampler().start()
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield m
+        finally:
+            m.wall_seconds = time.perf_counter() - wall
+            m.cpu_seconds = time.process_time() - cpu
+            m.peak_rss_bytes = rss.stop()
+            if cuda is not None:
+                m.gpu_peak_bytes = cuda.max_memory_allocated()
+            self._record(m)
+
+    def timed(self, name: str, fn: Callable, *args, **kwargs):
+        """Call ``fn`` inside a stage; handy for work submitted to another thread."""
+        with self.stage(name):
+            return fn(*args, **kwargs)
+
+    def _record(self, m: StageMetrics) -> None:
+        with self._lock:
+            self.stages.append(m)
+        logger.bind(video=self.video, **asdict(m)).info(
+            f"stage={m.stage} wall={m.wall_seconds:.2f}s cpu={m.cpu_seconds:.2f}s "
+            f"rss={m.peak_rss_bytes / 2**20:.0f}MB bytes={m.bytes_processed}"
+        )
+        if self.registry is not None:
+            self.registry.observe(m)
+
+    def as_dicts(self) -> List[Dict]:
+        return [asdict(m) for m in self.stages]
+
+
+class MetricsRegistry:
+    """Process-wide stage totals, rendered in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._runs: Dict[str, int] = {}
+        self._sums: Dict[str, Dict[str, float]] = {}
+        self._gauges: Dict[str, float] = {}
+
+    def observe(self, m: StageMetrics) -> None:
+        with self._lock:
+            self._runs[m.stage] = self._runs.get(m.stage, 0) + 1
+            sums = self._sums.setdefault(m.stage, {"wall": 0.0, "cpu": 0.0, "bytes": 0.0})
+            sums["wall"] += m.wall_seconds
+            sums["cpu"] += m.cpu_seconds
+            sums["bytes"] += m.bytes_processed
+            self._gauges["process_peak_rss_bytes"] = _peak_rss_bytes()
+            if m.gpu_peak_bytes is not None:
+                self._gauges[f'stage_gpu_peak_bytes{{stage="{m.stage}"}}'] = m.gpu_peak_bytes
+
+    def set_gauge(self, name: str, value: float) -> None:
+        with self._lock:
+            self._gauges[name] = value
+
+    def render(self) -> str:
+        with self._lock:
+            lines = [
+                "# TYPE pipeline_stage_runs_total counter",
+                *(f'pipeline_stage_runs_total{{stage="{s}"}} {n}' for s, n in self._runs.items()),
+            ]
+            for key, name, help_text in (
+                ("wall", "pipeline_stage_wall_seconds_total", "wall time"),
+                ("cpu", "pipeline_stage_cpu_seconds_total", "process CPU time"),
+                ("bytes", "pipeline_stage_bytes_total", "bytes read or written"),
+            ):
+                lines.append(f"# HELP {name} Summed {help_text} per stage")
+                lines.append(f"# TYPE {name} counter")
+                lines.extend(f'{name}{{stage="{s}"}} {v[key]:g}' for s, v in self._sums.items())
+            for name, value in sorted(self._gauges.items()):
+                lines.append(f"pipeline_{name} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+def serve_metrics(registry: "MetricsRegistry", port: int = METRICS_PORT) -> ThreadingHTTPServer:
+    """Serve ``registry`` at ``http://0.0.0.0:<port>/metrics`` from a daemon thread."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info(f"Serving metrics on :{server.server_port}/metrics")
+    return server
+
+
+metrics_registry = MetricsRegistry()
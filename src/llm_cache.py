@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+import time
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv("ai-slop.env")
+
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", ".llm_cache")
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", 30 * 24 * 3600))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 1000))
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", 256))
+LLM_CACHE_DISABLED = os.getenv("LLM_CACHE_DISABLED", "").lower() in ("1", "true", "yes")
+
+
+def hash_transcript(transcript: Dict) -> str:
+    """Stable hash of the transcript segments sent to the LLM."""
+    payload = json.dumps(transcript["segments"], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def make_cache_key(
+    model: str,
+    template_version: str,
+    interesting_prompt: str,
+    transcript_hash: str,
+) -> str:
+    """Combine everything that influences the LLM answer into one key."""
+    raw = "\x1f".join([model, template_version, interesting_prompt, transcript_hash])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    On-disk cache of LLM responses, one JSON file per key.
+
+    Entries older than ``ttl_seconds`` are treated as misses. When the cache
+    grows past ``max_entries`` or ``max_bytes`` the least recently used
+    entries (by file mtime, refreshed on every hit) are removed.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = LLM_CACHE_DIR,
+        ttl_seconds: float = LLM_CACHE_TTL_SECONDS,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        max_bytes: int = int(LLM_CACHE_MAX_MB * 1024 * 1024),
+    ):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                entry = json.load(fh)
+            if time.time() - entry.get("created_at", 0) > self.ttl_seconds:
+                self._remove(path)
+                return None
+            # touch for LRU ordering
+            os.utime(path, None)
+        except (OSError, json.JSONDecodeError):
+            # another process may evict the entry at any point
+            return None
+        return entry["response"]
+
+    def set(self, key: str, response: str, **metadata) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(key)
+        entry = {"created_at": time.time(), "response": response, **metadata}
+
+        # write to a temp file first so concurrent readers never see half a file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(entry, fh)
+        os.replace(tmp_path, path)
+
+        self.evict()
+
+    def evict(self) -> int:
+        """Drop expired entries, then LRU entries until within limits."""
+        if not os.path.isdir(self.cache_dir):
+            return 0
+
+        now = time.time()
+        entries = []
+        removed = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            # mtime is never older than created_at, so this is certainly expired
+            if now - st.st_mtime > self.ttl_seconds:
+                removed += self._remove(path)
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+
+        entries.sort()
+        total_bytes = sum(size for _, size, _ in entries)
+        while entries and (
+            len(entries) > self.max_entries or total_bytes > self.max_bytes
+        ):
+            _, size, path = entries.pop(0)
+            total_bytes -= size
+            removed += self._remove(path)
+
+        return removed
+
+    def clear(self) -> None:
+        if not os.path.isdir(self.cache_dir):
+            return
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".json"):
+                self._remove(os.path.join(self.cache_dir, name))
+
+    @staticmethod
+    def _remove(path: str) -> int:
+        try:
+            os.remove(path)
+            return 1
+        except FileNotFoundError:
+            return 0
+
+
+llm_cache = LLMResponseCache()
@@ -1,49 +1,162 @@
-from openai import OpenAI
 import os
 import json
-from typing import List, Dict
+from typing import TYPE_CHECKING, List, Dict, Optional
 from dotenv import load_dotenv
 from models.clip import Clips 
+from transcript_merge import compact_segments, format_speaker_transcript, merge_speakers
+from clip_repair import known_segment_ids, parse_clip_array, repair_clips, merge_clips
+from llm_cache import llm_cache, hash_transcript, make_cache_key, LLM_CACHE_DISABLED
 
 load_dotenv("ai-slop.env")
 
 OPENAI_API_KEY = os.getenv("OPEN_AI_KEY")
 
+if TYPE_CHECKING:
+    from openai import OpenAI
+
 MIN_BLOCKS = 4                 # at least this many if content allows
 TARGET_BLOCKS = 8              # try to hit this (ok to exceed)
 MAX_BLOCK_SECONDS = 30.0       # per-block cap so long moments get split
 MIN_BLOCK_SECONDS = 15.0        # avoid ultra-short clips when possible
 MIN_SCORE = 7                  # 0–10 threshold for “interesting enough”
 
+IMPACT_MODEL = "gpt-5-mini"
+# Bump whenever the analyze_impact prompt changes so cached answers are not reused
+IMPACT_PROMPT_VERSION = "2"
+IMPACT_CONCURRENCY = int(os.getenv("IMPACT_CONCURRENCY", 4))  # prompts analysed at once per transcript
+REPAIR_CONTEXT_SECONDS = 30.0  # transcript padding re-sent around clips that failed validation
+NAME_SPEAKERS_MAX_SEGMENTS = 200  # transcript lines sent when naming unknown speakers
+
+# Named definitions of interestingness for analyze_impact; a video can be cut for several at once
+INTEREST_PROFILES = {
+    "highlights": "humor, novelty, conflict resolution, surprising claims, strong emotions",
+    "humor": "jokes, funny stories, witty banter, absurd or awkward moments",
+    "conflict": "disagreements, heated debates, pointed criticism, tension and how it is resolved",
+    "educational": "clear explanations, practical advice, surprising facts, insightful answers",
+}
+DEFAULT_INTEREST_PROFILES = ("highlights",)
+
+def _client(api_key: Optional[str] = OPENAI_API_KEY) -> "OpenAI":
+    # the openai package takes most of a second to import; load it on first request
+    from openai import OpenAI
+
+    return OpenAI(api_key=api_key)
+
+
 def refine_transcript(transcript: Dict, diarization) -> str:
     """Use OpenAI API to map speaker IDs to names and clean the transcript."""
 
     api_key = OPENAI_API_KEY 
     if not api_key:
         raise RuntimeError("OPENAI_API_KEY environment variable not set")
-    openai.api_key = api_key
+    client = _client(api_key)
 
-    diarization_text = str(diarization)
+    labelled = format_speaker_transcript(merge_speakers(transcript, diarization))
     prompt = (
-        "Given the following transcript and diarization output, replace speaker "
+        "Given the following speaker-labelled transcript, replace speaker "
         "IDs with human friendly names and clean up the text.\n\nTranscript:\n"
-        f"{json.dumps(transcript)}\n\nDiarization:\n{diarization_text}"
+        f"{labelled}"
     )
 
-    response = openai.responses.create(
+    response = client.responses.create(
+        model="gpt-5-nano",
+        input=prompt,
+    )
+    return response.output_text
+
+
+def name_speakers(transcript: Dict, speakers: List[str]) -> Dict[str, str]:
+    """
+    Ask the LLM for the real names of the given diarization labels.
+
+    ``transcript`` must carry speaker labels (see merge_speakers). Only an
+    excerpt of each speaker's lines is sent. Returns label -> name for the
+    speakers the model could identify.
+    """
+    client = _client()
+
+    wanted = set(speakers)
+    excerpt = {
+        "segments": [
+            s for s in transcript["segments"] if s.get("speaker") in wanted
+        ][:NAME_SPEAKERS_MAX_SEGMENTS]
+    }
+    prompt = (
+        "Below are lines from a video transcript labelled with anonymous speaker IDs. "
+        f"Identify the real names of these speakers: {', '.join(speakers)}. "
+        "Use names mentioned in the conversation or well-known voices. "
+        "Return JSON ONLY as an object mapping each speaker ID to a name, or null "
+        "if the name cannot be determined.\n\n"
+        f"{format_speaker_transcript(excerpt)}"
+    )
+
+    response = client.responses.create(
         model="gpt-5-nano",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.2,
+        input=prompt,
+    )
+    try:
+        data = json.loads(response.output_text)
+    except json.JSONDecodeError:
+        print(f"[WARN] Could not parse speaker names: {response.output_text!r}")
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    return {k: v for k, v in data.items() if k in wanted and isinstance(v, str)}
+
+
+def analyze_impact(transcript_text: str, interesting_prompt: str, use_cache: bool = True) -> Clips:
+    """
+    Ask the OpenAI API for a list of impactful segments.
+
+    Responses are cached on disk by model, prompt version, interesting_prompt
+    and transcript hash; pass ``use_cache=False`` (or set LLM_CACHE_DISABLED)
+    to force a fresh request.
+    """
+    use_cache = use_cache and not LLM_CACHE_DISABLED
+    cache_key = make_cache_key(
+        IMPACT_MODEL,
+        IMPACT_PROMPT_VERSION,
+        interesting_prompt,
+        hash_transcript(transcript_text),
     )
-    return response.choices[0].message.content
+    if use_cache:
+        cached = llm_cache.get(cache_key)
+        if cached is not None:
+            return Clips(clips=json.loads(cached))
 
+    client = _client()
+    segments = transcript_text["segments"]
 
-def analyze_impact(transcript_text: str, interesting_prompt: str) -> Clips:
-    """Ask the OpenAI API for a list of impactful segments."""
-    client = OpenAI(api_key = OPENAI_API_KEY)
+    response = client.responses.create(
+        model=IMPACT_MODEL,
+        input=_impact_prompt(segments, interesting_prompt),
+    )
 
+    raw_clips = parse_clip_array(response.output_text)
+    if raw_clips is None:
+        print("[WARN] LLM output was not valid JSON, asking for a reformat")
+        raw_clips = _reask_for_json(client, response.output_text)
+    if raw_clips is None:
+        print("[ERROR] Could not recover clips from LLM output")
+        return Clips(clips=[])
+
+    clips, failed = repair_clips(raw_clips, segments, MAX_BLOCK_SECONDS)
+    if failed:
+        clips = merge_clips(clips, _reanalyze_failed(client, failed, segments, interesting_prompt))
+
+    # only cache answers that survived validation
+    llm_cache.set(
+        cache_key,
+        json.dumps([clip.model_dump() for clip in clips.clips]),
+        model=IMPACT_MODEL,
+    )
+    return clips
+
+
+def _impact_prompt(segments: List[Dict], interesting_prompt: str) -> str:
     prompt_header = f"""
-    You are given a list of transcript segments, each with start, end, and text.
+    You are given a list of transcript segments, each with id, start, end, text
+    and (when known) the speaker.
 
     Goal: select MULTIPLE contiguous blocks of segments (e.g., [2,3,4] valid; [2,4] invalid)
     that represent the most interesting parts of the transcript. There is NO LIMIT on total
@@ -80,15 +193,59 @@ def analyze_impact(transcript_text: str, interesting_prompt: str) -> Clips:
     Segments:
     """
 
-    segments_json = json.dumps(transcript_text["segments"], indent=2)
+    segments_json = json.dumps(compact_segments(segments), ensure_ascii=False)
 
-    prompt = prompt_header + segments_json
+    return prompt_header + segments_json
 
-    response = client.responses.create(
-        model="gpt-5-mini",
-        input=prompt,
+
+def _reask_for_json(client: "OpenAI", bad_output: str) -> Optional[List]:
+    """Ask the model to reformat its own malformed output; the transcript is not resent."""
+    prompt = (
+        "The following text was supposed to be a JSON array of objects with keys "
+        "start_time, end_time, segment_ids, reason and title. Return ONLY the "
+        "corrected JSON array, no extra text.\n\n"
+        f"{bad_output}"
     )
+    response = client.responses.create(model=IMPACT_MODEL, input=prompt)
+    return parse_clip_array(response.output_text)
+
+
+def _reanalyze_failed(
+    client: "OpenAI",
+    failed: List,
+    segments: List[Dict],
+    interesting_prompt: str,
+) -> Clips:
+    """Re-run the analysis only over the segments around clips that failed validation."""
+    by_id = {s["id"]: s for s in segments}
+    windows = []
+    for raw in failed:
+        if not isinstance(raw, dict):
+            continue
+        try:
+            windows.append((float(raw["start_time"]), float(raw["end_time"])))
+            continue
+        except (KeyError, TypeError, ValueError):
+            pass
+        known = known_segment_ids(raw, by_id)
+        if known:
+            windows.append((by_id[known[0]]["start"], by_id[known[-1]]["end"]))
+
+    portion = [
+        s for s in segments
+        if any(
+            s["end"] > lo - REPAIR_CONTEXT_SECONDS and s["start"] < hi + REPAIR_CONTEXT_SECONDS
+            for lo, hi in windows
+        )
+    ]
+    if not portion:
+        return Clips(clips=[])
 
-    data = {"clips": json.loads(response.output_text)}
-    clips = Clips(**data)
-    return clips 
+    print(f"Re-analyzing {len(portion)} segments around {len(failed)} invalid clips")
+    response = client.responses.create(
+        model=IMPACT_MODEL,
+        input=_impact_prompt(portion, interesting_prompt),
+    )
+    raw_clips = parse_clip_array(response.output_text) or []
+    clips, _ = repair_clips(raw_clips, portion, MAX_BLOCK_SECONDS)
+    return clips
@@ -0,0 +1,288 @@
+"""
+Local model server: one process per node owns the Whisper and pyannote
+weights and serves every pipeline worker on that node.
+
+    python model_server.py --socket /tmp/models.sock --preload base
+    python model_server.py --port 8765
+
+Workers set MODEL_SERVER_URL (``unix:///tmp/models.sock`` or
+``http://127.0.0.1:8765``) and use the thin clients below. Audio is passed
+as a file path on a shared filesystem, or as a float32 array in shared
+memory when the caller already holds the decoded samples.
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import socketserver
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+import numpy as np
+from loguru import logger
+
+MODEL_SERVER_URL = os.getenv("MODEL_SERVER_URL")
+MODEL_SERVER_TIMEOUT = float(os.getenv("MODEL_SERVER_TIMEOUT", 3600))
+# inference requests run at the same time on the server; the rest queue
+MODEL_SERVER_CONCURRENCY = int(os.getenv("MODEL_SERVER_CONCURRENCY", 2))
+
+AudioInput = Union[str, np.ndarray]
+
+
+def _to_json(obj) -> bytes:
+    # numpy scalars/arrays can leak out of the models
+    return json.dumps(obj, default=lambda o: o.tolist() if hasattr(o, "tolist") else str(o)).encode()
+
+
+# -----------------------------
+# Server
+# -----------------------------
+
+def _open_audio(payload: Dict) -> Tuple[AudioInput, Optional[shared_memory.SharedMemory]]:
+    """The request's audio: a path, or a read-only view of the caller's shared memory."""
+    if "path" in payload:
+        return payload["path"], None
+    shm = shared_memory.SharedMemory(name=payload["shm"])
+    if payload.get("pid") != os.getpid():
+        # the client owns the segment; stop this process's resource tracker from unlinking it
+        resource_tracker.unregister(shm._name, "shared_memory")
+    audio = np.ndarray((payload["samples"],), dtype=np.float32, buffer=shm.buf)
+    audio.flags.writeable = False
+    return audio, shm
+
+
+def _diarization_payload(diarization, embeddings) -> Dict:
+    from transcript_merge import diarization_to_turns
+
+    return {
+        "turns": [list(turn) for turn in diarization_to_turns(diarization)],
+        "labels": list(diarization.labels()),
+        "embeddings": None if embeddings is None else np.asarray(embeddings).tolist(),
+    }
+
+
+def _transcribe(payload: Dict, audio: AudioInput) -> Dict:
+    from audio import transcribe_audio
+    from transcribers import TRANSCRIPTION_BACKEND
+
+    return transcribe_audio(
+        audio, payload.get("model_size", "base"), payload.get("backend", TRANSCRIPTION_BACKEND)
+    )
+
+
+def _analyze(payload: Dict, audio: AudioInput) -> Dict:
+    from audio import analyze_speech
+    from transcribers import TRANSCRIPTION_BACKEND
+
+    analysis = analyze_speech(
+        audio, payload.get("model_size", "base"), backend=payload.get("backend", TRANSCRIPTION_BACKEND)
+    )
+    return {
+        "transcript": analysis.transcript,
+        "timings": analysis.timings,
+        **_diarization_payload(analysis.diarization, analysis.embeddings),
+    }
+
+
+ENDPOINTS = {
+    "/transcribe": _transcribe,
+    "/analyze": _analyze,
+}
+
+
+class ModelRequestHandler(BaseHTTPRequestHandler):
+    server: "ModelServer"
+
+    def _reply(self, status: int, body: Dict) -> None:
+        data = _to_json(body)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path != "/health":
+            self._reply(404, {"error": f"unknown endpoint {self.path}"})
+            return
+        from audio import HF_AUTH_TOKEN
+
+        self._reply(200, {"status": "ok", "diarization": bool(HF_AUTH_TOKEN)})
+
+    def do_POST(self):
+        handler = ENDPOINTS.get(self.path)
+        if handler is None:
+            self._reply(404, {"error": f"unknown endpoint {self.path}"})
+            return
+
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        try:
+            audio, shm = _open_audio(payload)
+        except (KeyError, FileNotFoundError) as e:
+            self._reply(400, {"error": f"bad audio reference: {e}"})
+            return
+        try:
+            with self.server.slots:
+                self._reply(200, handler(payload, audio))
+        except Exception as e:
+            logger.exception(f"{self.path} failed")
+            self._reply(500, {"error": str(e)})
+        finally:
+            if shm is not None:
+                del audio
+                shm.close()
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+class ModelServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, handler=ModelRequestHandler, concurrency: int = MODEL_SERVER_CONCURRENCY):
+        self.slots = threading.BoundedSemaphore(concurrency)
+        super().__init__(address, handler)
+
+
+class UnixModelServer(ModelServer):
+    address_family = socket.AF_UNIX
+
+    def server_bind(self):
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+        socketserver.TCPServer.server_bind(self)
+        self.server_name, self.server_port = "localhost", 0
+
+
+def serve(socket_path: str = None, port: int = 8765, preload: str = None) -> None:
+    if preload:
+        from audio import _device, _diarization_pipeline, HF_AUTH_TOKEN
+        from transcribers import get_backend
+
+        logger.info(f"Loading models ({preload})")
+        get_backend().load(preload)
+        if HF_AUTH_TOKEN:
+            _diarization_pipeline(_device())
+
+    if socket_path:
+        server = UnixModelServer(socket_path)
+        logger.info(f"Model server listening on unix://{socket_path}")
+    else:
+        server = ModelServer(("127.0.0.1", port))
+        logger.info(f"Model server listening on http://127.0.0.1:{server.server_port}")
+    server.serve_forever()
+
+
+# -----------------------------
+# Clients
+# -----------------------------
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self._path = path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self._path)
+        self.sock = sock
+
+
+class ModelServerClient:
+    def __init__(self, url: str = None, timeout: float = MODEL_SERVER_TIMEOUT):
+        self.url = urlparse(url or MODEL_SERVER_URL)
+        self.timeout = timeout
+
+    def _connection(self) -> http.client.HTTPConnection:
+        if self.url.scheme == "unix":
+            return _UnixHTTPConnection(self.url.path, self.timeout)
+        return http.client.HTTPConnection(self.url.hostname, self.url.port, timeout=self.timeout)
+
+    def _request(self, method: str, endpoint: str, payload: Dict = None) -> Dict:
+        conn = self._connection()
+        try:
+            body = None if payload is None else _to_json(payload)
+            conn.request(method, endpoint, body=body, headers={"Content-Type": "application/json"})
+            response = conn.getresponse()
+            result = json.loads(response.read())
+        finally:
+            conn.close()
+        if response.status != 200:
+            raise RuntimeError(f"model server {endpoint}: {result.get('error', response.status)}")
+        return result
+
+    def health(self) -> Dict:
+        return self._request("GET", "/health")
+
+    def call(self, endpoint: str, audio: AudioInput, **options) -> Dict:
+        """POST ``audio`` (path or 16 kHz float32 array, sent via shared memory) to ``endpoint``."""
+        if isinstance(audio, str):
+            return self._request("POST", endpoint, {"path": os.path.abspath(audio), **options})
+
+        samples = np.ascontiguousarray(audio, dtype=np.float32)
+        shm = shared_memory.SharedMemory(create=True, size=max(samples.nbytes, 1))
+        try:
+            np.ndarray(samples.shape, dtype=np.float32, buffer=shm.buf)[:] = samples
+            return self._request(
+                "POST", endpoint, {"shm": shm.name, "samples": len(samples), "pid": os.getpid(), **options}
+            )
+        finally:
+            shm.close()
+            shm.unlink()
+
+
+class RemoteTranscriber:
+    """Transcriber that runs on the model server."""
+
+    def __init__(self, backend: str = None, client: ModelServerClient = None):
+        self.backend = backend
+        self.client = client or ModelServerClient()
+
+    def transcribe(self, audio_path: AudioInput, model_size: str) -> Dict:
+        options = {"model_size": model_size}
+        if self.backend:
+            options["backend"] = self.backend
+        return self.client.call("/transcribe", audio_path, **options)
+
+
+class RemoteSpeechAnalyzer:
+    """SpeechAnalyzer running transcription and diarization together on the model server."""
+
+    def __init__(self, backend: str = None, client: ModelServerClient = None):
+        self.backend = backend
+        self.client = client or ModelServerClient()
+
+    def analyze(self, audio_path: AudioInput, model_size: str):
+        from audio import SpeechAnalysis
+
+        options = {"model_size": model_size}
+        if self.backend:
+            options["backend"] = self.backend
+        result = self.client.call("/analyze", audio_path, **options)
+        embeddings = result["embeddings"]
+        return SpeechAnalysis(
+            transcript=result["transcript"],
+            # (start, end, speaker) turns; everything downstream accepts them like an Annotation
+            diarization=[tuple(turn) for turn in result["turns"]],
+            embeddings=None if embeddings is None else np.asarray(embeddings, dtype=np.float32),
+            timings=result["timings"],
+            labels=result["labels"],
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve Whisper and pyannote to local pipeline workers")
+    parser.add_argument("--socket", help="Listen on this Unix socket instead of TCP")
+    parser.add_argument("--port", type=int, default=8765, help="TCP port on 127.0.0.1")
+    parser.add_argument("--preload", metavar="MODEL_SIZE", help="Load the models before accepting requests")
+    args = parser.parse_args()
+    serve(args.socket, args.port, args.preload)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, Float, String, DateTime, ForeignKey, LargeBinary, JSON
 from sqlalchemy.orm import declarative_base, relationship
 from datetime import datetime
 
@@ -10,6 +10,7 @@ class Channel(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     handle = Column(String, unique=True, nullable=False)
     videos = relationship("Video", back_populates="channel", cascade="all, delete")
+    speakers = relationship("SpeakerVoice", back_populates="channel", cascade="all, delete")
 
 class Video(Base):
     __tablename__ = "video"
@@ -25,3 +26,81 @@ class Video(Base):
     processed_at = Column(DateTime, nullable=True, default=None)
 
     channel = relationship("Channel", back_populates="videos")
+    stage_metrics = relationship("PipelineStageMetric", back_populates="video", cascade="all, delete")
+    transcript = relationship("Transcript", back_populates="video", uselist=False, cascade="all, delete")
+    fingerprint = relationship("AudioFingerprint", back_populates="video", uselist=False, cascade="all, delete")
+
+
+class SpeakerVoice(Base):
+    __tablename__ = "speaker_voice"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    channel_id = Column(Integer, ForeignKey("channel.id"), nullable=False, index=True)
+    name = Column(String, nullable=False)
+    embedding = Column(LargeBinary, nullable=False)   # float32 bytes
+    dim = Column(Integer, nullable=False)
+    # number of embeddings averaged into `embedding`
+    samples = Column(Integer, nullable=False, default=1)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    channel = relationship("Channel", back_populates="speakers")
+
+
+class PipelineStageMetric(Base):
+    __tablename__ = "pipeline_stage_metric"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    video_id = Column(Integer, ForeignKey("video.id"), nullable=False, index=True)
+    stage = Column(String, nullable=False)
+    wall_seconds = Column(Float, nullable=False)
+    cpu_seconds = Column(Float, nullable=False)
+    peak_rss_bytes = Column(BigInteger, nullable=False)    # sampled during the stage, not ru_maxrss
+    gpu_peak_bytes = Column(BigInteger, nullable=True)
+    bytes_processed = Column(BigInteger, nullable=False, default=0)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    video = relationship("Video", back_populates="stage_metrics")
+
+
+class Transcript(Base):
+    """Columnar transcript, see transcript_store.pack_transcript."""
+    __tablename__ = "transcript"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    video_id = Column(Integer, ForeignKey("video.id"), nullable=False, unique=True)
+    language = Column(String, nullable=True)
+    segment_count = Column(Integer, nullable=False)
+    duration = Column(Float, nullable=False)
+    starts = Column(LargeBinary, nullable=False)        # float32 seconds, sorted
+    ends = Column(LargeBinary, nullable=False)          # float32 seconds
+    speaker_ids = Column(LargeBinary, nullable=False)   # int16 index into speakers, -1 = none
+    speakers = Column(JSON, nullable=False, default=list)
+    text_offsets = Column(LargeBinary, nullable=False)  # uint32 byte offsets, segment_count + 1
+    text = Column(LargeBinary, nullable=False)          # concatenated segment texts, compressed
+    codec = Column(String, nullable=False)              # "zstd" or "zlib"
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    video = relationship("Video", back_populates="transcript")
+
+
+class AudioFingerprint(Base):
+    """Full audio fingerprint of a video, see fingerprint.fingerprint_signal."""
+    __tablename__ = "audio_fingerprint"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    video_id = Column(Integer, ForeignKey("video.id"), nullable=False, unique=True)
+    hop_seconds = Column(Float, nullable=False)
+    hashes = Column(LargeBinary, nullable=False)        # uint32 sub-fingerprint per hop
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    video = relationship("Video", back_populates="fingerprint")
+
+
+class FingerprintHash(Base):
+    """Lookup index of sampled fingerprint keys (fingerprint.anchors)."""
+    __tablename__ = "fingerprint_hash"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    key = Column(Integer, nullable=False, index=True)
+    video_id = Column(Integer, ForeignKey("video.id", ondelete="CASCADE"), nullable=False, index=True)
+    frame = Column(Integer, nullable=False)
@@ -0,0 +1,216 @@
+import re
+import wave
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from transcript_merge import diarization_to_turns
+
+FRAME_SECONDS = 0.05            # energy frame size
+KEEP_FRACTION = 0.3             # share of segments forwarded to the LLM
+MIN_KEEP_SEGMENTS = 40          # never forward fewer than this many
+CONTEXT_SEGMENTS = 2            # neighbours kept around every selected segment
+TURN_WINDOW_SECONDS = 10.0      # window for speaker-turn density
+
+# relative weight of each z-scored signal in the final score
+SIGNAL_WEIGHTS = {
+    "loudness": 1.0,
+    "burst": 0.75,
+    "speech_rate": 0.5,
+    "reaction": 1.5,
+    "turn_density": 0.75,
+}
+
+# whisper tends to transcribe audience reactions as "(laughs)", "[Applause]" etc.
+REACTION_PATTERN = re.compile(
+    r"laugh|applause|cheer|clapping|\bha(ha)+\b|\blol\b|\bwow\b|\boh my god\b",
+    re.IGNORECASE,
+)
+
+
+def frame_energy(audio_path: str, frame_seconds: float = FRAME_SECONDS) -> tuple[np.ndarray, float]:
+    """
+    Compute per-frame RMS energy (dBFS) of a 16-bit PCM WAV file.
+
+    The file is streamed in chunks so hour-long 48 kHz audio never has to be
+    held in memory at once. Returns (energy_db, frame_seconds).
+    """
+    with wave.open(audio_path, "rb") as wf:
+        if wf.getsampwidth() != 2:
+            raise ValueError(f"Expected 16-bit PCM audio, got {8 * wf.getsampwidth()}-bit: {audio_path}")
+        channels = wf.getnchannels()
+        frame_len = max(1, int(round(wf.getframerate() * frame_seconds)))
+        frames_per_chunk = frame_len * 2048
+
+        energies = []
+        carry = np.empty(0, dtype=np.float32)
+        while True:
+            raw = wf.readframes(frames_per_chunk)
+            if not raw:
+                break
+            samples = np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0
+            if channels > 1:
+                samples = samples.reshape(-1, channels).mean(axis=1)
+            samples = np.concatenate([carry, samples])
+            usable = (len(samples) // frame_len) * frame_len
+            carry = samples[usable:]
+            if usable:
+                frames = samples[:usable].reshape(-1, frame_len)
+                energies.append(np.sqrt(np.mean(frames * frames, axis=1)))
+
+    if not energies:
+        return np.empty(0, dtype=np.float32), frame_seconds
+    rms = np.concatenate(energies)
+    return 20.0 * np.log10(np.maximum(rms, 1e-6)), frame_seconds
+
+
+def _zscore(values: np.ndarray) -> np.ndarray:
+    std = values.std()
+    if not np.isfinite(std) or std == 0:
+        return np.zeros_like(values)
+    return (values - values.mean()) / std
+
+
+def _segment_energy_stats(
+    starts: np.ndarray,
+    ends: np.ndarray,
+    energy_db: np.ndarray,
+    frame_seconds: float,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Mean and peak frame energy for every segment, vectorized."""
+    n_frames = len(energy_db)
+    lo = np.clip((starts / frame_seconds).astype(np.int64), 0, n_frames)
+    hi = np.clip(np.ceil(ends / frame_seconds).astype(np.int64), 0, n_frames)
+    hi = np.maximum(hi, np.minimum(lo + 1, n_frames))
+
+    csum = np.concatenate([[0.0], np.cumsum(energy_db, dtype=np.float64)])
+    counts = np.maximum(hi - lo, 1)
+    mean_db = (csum[hi] - csum[lo]) / counts
+
+    peak_db = _range_max(energy_db, lo, np.maximum(hi, lo + 1))
+
+    # segments past the end of the decoded audio have no frames; rank them as the quietest
+    outside = lo >= n_frames
+    floor = energy_db.min()
+    mean_db[outside] = floor
+    peak_db[outside] = floor
+    return mean_db, peak_db
+
+
+def _range_max(values: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    """max(values[lo:hi]) for many ranges at once using a sparse table (O(n log n) build)."""
+    table = [values]
+    span = 1
+    while 2 * span <= len(values):
+        prev = table[-1]
+        table.append(np.maximum(prev[:-span], prev[span:]))
+        span *= 2
+
+    lo = np.minimum(lo, len(values) - 1)
+    hi = np.minimum(hi, len(values))
+    level = np.floor(np.log2(np.maximum(hi - lo, 1))).astype(np.int64)
+    out = np.empty(len(lo), dtype=values.dtype)
+    for k in np.unique(level):
+        mask = level == k
+        width = 1 << int(k)
+        out[mask] = np.maximum(table[k][lo[mask]], table[k][hi[mask] - width])
+    return out
+
+
+def score_segments(
+    segments: List[Dict],
+    energy_db: Optional[np.ndarray] = None,
+    frame_seconds: float = FRAME_SECONDS,
+    diarization=None,
+    weights: Dict[str, float] = SIGNAL_WEIGHTS,
+) -> np.ndarray:
+    """
+    Score transcript segments with cheap local signals.
+
+    Every signal is z-scored across the video and combined with ``weights``;
+    higher is more likely to be interesting. Missing inputs (no audio
+    energy, no diarization) simply contribute nothing.
+    """
+    n = len(segments)
+    if n == 0:
+        return np.empty(0)
+
+    starts = np.fromiter((s["start"] for s in segments), dtype=np.float64, count=n)
+    ends = np.fromiter((s["end"] for s in segments), dtype=np.float64, count=n)
+    durations = np.maximum(ends - starts, 1e-3)
+    texts = [s.get("text", "") for s in segments]
+
+    score = np.zeros(n)
+
+    if energy_db is not None and len(energy_db):
+        mean_db, peak_db = _segment_energy_stats(starts, ends, energy_db, frame_seconds)
+        score += weights["loudness"] * _zscore(mean_db)
+        score += weights["burst"] * _zscore(peak_db - mean_db)
+
+    word_counts = np.fromiter((len(t.split()) for t in texts), dtype=np.float64, count=n)
+    score += weights["speech_rate"] * _zscore(word_counts / durations)
+
+    reactions = np.fromiter((bool(REACTION_PATTERN.search(t)) for t in texts), dtype=np.float64, count=n)
+    score += weights["reaction"] * _zscore(reactions)
+
+    if diarization is not None:
+        turn_starts = np.sort([start for start, _, _ in diarization_to_turns(diarization)])
+    else:
+        # fall back to speaker labels already merged onto the segments
+        labels = [s.get("speaker") for s in segments]
+        changes = [i for i in range(1, n) if labels[i] and labels[i] != labels[i - 1]]
+        turn_starts = starts[changes]
+    if len(turn_starts):
+        half = TURN_WINDOW_SECONDS / 2
+        lo = np.searchsorted(turn_starts, starts - half, side="left")
+        hi = np.searchsorted(turn_starts, ends + half, side="right")
+        density = (hi - lo) / (durations + TURN_WINDOW_SECONDS)
+        score += weights["turn_density"] * _zscore(density)
+
+    return score
+
+
+def select_candidate_indices(
+    scores: np.ndarray,
+    keep_fraction: float = KEEP_FRACTION,
+    min_keep: int = MIN_KEEP_SEGMENTS,
+    context: int = CONTEXT_SEGMENTS,
+) -> np.ndarray:
+    """Indices of the top scoring segments, widened by ``context`` neighbours, in order."""
+    n = len(scores)
+    if n <= min_keep:
+        return np.arange(n)
+
+    k = min(n, max(min_keep, int(np.ceil(n * keep_fraction))))
+    top = np.argpartition(-scores, k - 1)[:k]
+
+    keep = np.zeros(n, dtype=bool)
+    for offset in range(-context, context + 1):
+        keep[np.clip(top + offset, 0, n - 1)] = True
+    return np.flatnonzero(keep)
+
+
+def prescore_transcript(
+    transcript: Dict,
+    audio_path: Optional[str] = None,
+    diarization=None,
+    keep_fraction: float = KEEP_FRACTION,
+) -> Dict:
+    """
+    Return a copy of ``transcript`` containing only the candidate segments.
+
+    Segment ids are left untouched so clips chosen by the LLM still refer to
+    the original transcript.
+    """
+    segments = transcript["segments"]
+    energy_db = None
+    frame_seconds = FRAME_SECONDS
+    if audio_path is not None:
+        energy_db, frame_seconds = frame_energy(audio_path)
+
+    scores = score_segments(segments, energy_db, frame_seconds, diarization)
+    keep = select_candidate_indices(scores, keep_fraction)
+
+    reduced = dict(transcript)
+    reduced["segments"] = [segments[i] for i in keep]
+    return reduced
@@ -1,7 +1,8 @@
 import argparse
 import json
+from concurrent.futures import Future, ThreadPoolExecutor
 
-from typing import Protocol, Dict, List
+from typing import Protocol, Dict, List, Optional, Tuple
 
 
 # -----------------------------
@@ -11,6 +12,12 @@ from typing import Protocol, Dict, List
 class VideoDownloader(Protocol):
     def download(self, url: str, dry_run: bool = False) -> str: ...
 
+    def download_audio(self, url: str, dry_run: bool = False) -> str: ...
+
+    def download_sections(
+        self, url: str, windows: List[Tuple[float, float]], dry_run: bool = False
+    ) -> List[Dict]: ...
+
 
 class AudioExtractor(Protocol):
     def extract(self, video_path: str) -> str: ...
@@ -20,8 +27,20 @@ class Transcriber(Protocol):
     def transcribe(self, audio_path: str, model_size: str) -> Dict: ...
 
 
+class SpeechAnalyzer(Protocol):
+    def analyze(self, audio_path: str, model_size: str) -> "SpeechAnalysis": ...
+
+
+class Deduplicator(Protocol):
+    def plan(self, url: str, audio_path: str) -> "ReusePlan": ...
+
+
+class SegmentScorer(Protocol):
+    def select(self, transcript: Dict, audio_path: str) -> Dict: ...
+
+
 class Analyzer(Protocol):
-    def analyze(self, transcript: Dict, interesting_prompt: str) -> List[Dict]: ...
+    def analyze(self, transcript: Dict, interesting_prompt: str) -> "Clips": ...
 
 
 class ClipGenerator(Protocol):
@@ -33,30 +52,71 @@ class ClipGenerator(Protocol):
 # (thin wrappers around your current modules)
 # -----------------------------
 
-from download import download_youtube_video
-from audio import extract_audio, transcribe_audio
-from llm_requests import analyze_impact
-from clip_editor import generate_clips
+from download import download_manager, clip_windows, video_id_from_url, MAX_VIDEO_HEIGHT
+from audio import extract_audio, extracted_wav_bytes, transcribe_audio, analyze_speech, SpeechAnalysis, HF_AUTH_TOKEN
+from llm_requests import analyze_impact, INTEREST_PROFILES, DEFAULT_INTEREST_PROFILES, IMPACT_CONCURRENCY
+from clip_repair import merge_profile_clips
+from models.clip import Clips
+from prescore import prescore_transcript
+from transcribers import TRANSCRIPTION_BACKEND, TRANSCRIPTION_BACKENDS
+from transcript_merge import merge_speakers
+from clip_editor import generate_clips, clips_in_window
+from storage import StorageManager, storage_manager, audio_scratch_dir, is_scratch
+from instrumentation import MetricsRegistry, PipelineMetrics, metrics_registry
+from profiling import PROFILE_MODES, StageProfiler, profile_pipeline
+from fingerprint import ReusePlan, transcribe_uncovered
+from model_server import MODEL_SERVER_URL, ModelServerClient, RemoteSpeechAnalyzer, RemoteTranscriber
 
 
 class DefaultDownloader(VideoDownloader):
+    def __init__(self, max_height: int = MAX_VIDEO_HEIGHT):
+        self.max_height = max_height
+
     def download(self, url: str, dry_run: bool = False) -> str:
-        return download_youtube_video(url, dry_run=dry_run)
+        return download_manager.video(url, dry_run=dry_run, max_height=self.max_height)
+
+    def download_audio(self, url: str, dry_run: bool = False) -> str:
+        return download_manager.audio(url, dry_run=dry_run)
+
+    def download_sections(
+        self, url: str, windows: List[Tuple[float, float]], dry_run: bool = False
+    ) -> List[Dict]:
+        return download_manager.sections(url, windows, dry_run=dry_run, max_height=self.max_height)
 
 
 class DefaultAudioExtractor(AudioExtractor):
     def extract(self, video_path: str) -> str:
-        return extract_audio(video_path)
+        with audio_scratch_dir(extracted_wav_bytes(video_path)) as output_dir:
+            return extract_audio(video_path, output_dir)
 
 
 class DefaultTranscriber(Transcriber):
+    def __init__(self, backend: str = TRANSCRIPTION_BACKEND):
+        self.backend = backend
+
     def transcribe(self, audio_path: str, model_size: str) -> Dict:
-        return transcribe_audio(audio_path, model_size)
+        return transcribe_audio(audio_path, model_size, self.backend)
+
+
+class DefaultSpeechAnalyzer(SpeechAnalyzer):
+    def __init__(self, backend: str = TRANSCRIPTION_BACKEND):
+        self.backend = backend
+
+    def analyze(self, audio_path: str, model_size: str) -> SpeechAnalysis:
+        return analyze_speech(audio_path, model_size, backend=self.backend)
+
+
+class DefaultSegmentScorer(SegmentScorer):
+    def select(self, transcript: Dict, audio_path: str) -> Dict:
+        return prescore_transcript(transcript, audio_path)
 
 
 class DefaultAnalyzer(Analyzer):
-    def analyze(self, transcript: Dict, interesting_prompt: str) -> List[Dict]:
-        return analyze_impact(transcript, interesting_prompt)
+    def __init__(self, use_cache: bool = True):
+        self.use_cache = use_cache
+
+    def analyze(self, transcript: Dict, interesting_prompt: str) -> Clips:
+        return analyze_impact(transcript, interesting_prompt, use_cache=self.use_cache)
 
 
 class DefaultClipGenerator(ClipGenerator):
@@ -68,6 +128,13 @@ class DefaultClipGenerator(ClipGenerator):
 # Pipeline Orchestrator (fully DI)
 # -----------------------------
 
+# When to fetch the video stream, which is only needed for the final cut:
+#   "parallel"  - in the background while the audio is analysed
+#   "on-demand" - after analysis, and only if clips were selected
+#   "sections"  - after analysis, only the time windows around the selected clips
+VIDEO_MODES = ("parallel", "on-demand", "sections")
+
+
 class VideoPipeline:
     def __init__(
         self,
@@ -76,38 +143,204 @@ class VideoPipeline:
         transcriber: Transcriber,
         analyzer: Analyzer,
         clip_generator: ClipGenerator,
+        segment_scorer: Optional[SegmentScorer] = None,
+        speech_analyzer: Optional[SpeechAnalyzer] = None,
+        video_mode: str = "parallel",
+        storage: Optional[StorageManager] = None,
+        registry: Optional[MetricsRegistry] = None,
+        deduplicator: Optional[Deduplicator] = None,
+        prompts: Optional[Dict[str, str]] = None,
     ):
         self.downloader = downloader
         self.audio_extractor = audio_extractor
         self.transcriber = transcriber
         self.analyzer = analyzer
         self.clip_generator = clip_generator
+        self.segment_scorer = segment_scorer
+        # when set, replaces the transcriber with combined transcription + diarization
+        self.speech_analyzer = speech_analyzer
+        if video_mode not in VIDEO_MODES:
+            raise ValueError(f"video_mode must be one of {VIDEO_MODES}, got {video_mode!r}")
+        self.video_mode = video_mode
+        # when set, intermediates are pinned while in use and evicted by quota afterwards
+        self.storage = storage
+        # process-wide totals behind the Prometheus endpoint; per-run metrics are always returned
+        self.registry = registry
+        # when set, audio already transcribed for another video is not transcribed again
+        self.deduplicator = deduplicator
+        # interest profile name -> interesting_prompt; every profile is analysed on the same transcript
+        self.prompts = prompts or {name: INTEREST_PROFILES[name] for name in DEFAULT_INTEREST_PROFILES}
+
+    def _pin(self, held: List[str], *paths: Optional[str]) -> None:
+        paths = [p for p in paths if p]
+        if self.storage is not None:
+            self.storage.pin(*paths)
+        held.extend(paths)
+
+    def _release(self, held: List[str], *paths: Optional[str]) -> None:
+        for path in paths:
+            if path in held:
+                held.remove(path)
+                if self.storage is not None:
+                    self.storage.release(path, delete=is_scratch(path))
+
+    def _download_video(self, metrics: PipelineMetrics, url: str, dry_run: bool) -> str:
+        with metrics.stage("download_video") as m:
+            video_path = self.downloader.download(url, dry_run)
+            m.add_file(video_path)
+        return video_path
+
+    def _analyze(self, transcript: Dict) -> Dict[str, Clips]:
+        """Clips per interest profile; the LLM requests run concurrently."""
+        if len(self.prompts) == 1:
+            return {name: self.analyzer.analyze(transcript, prompt) for name, prompt in self.prompts.items()}
+        with ThreadPoolExecutor(max_workers=min(IMPACT_CONCURRENCY, len(self.prompts))) as pool:
+            futures = {
+                name: pool.submit(self.analyzer.analyze, transcript, prompt)
+                for name, prompt in self.prompts.items()
+            }
+            return {name: future.result() for name, future in futures.items()}
 
     def run(self, url: str, model_size: str = "base", dry_run: bool = False):
-        print("Downloading youtube video")
-        video_path = self.downloader.download(url, dry_run)
-        print("Finished Downloading Youtube Video")
-
+        metrics = PipelineMetrics(url, self.registry)
+
+        print("Downloading youtube audio")
+        with metrics.stage("download_audio") as m:
+            audio_source = self.downloader.download_audio(url, dry_run)
+            m.add_file(audio_source)
+        print("Finished Downloading Youtube Audio")
+        held: List[str] = []
+        self._pin(held, audio_source)
+
+        video_pool = ThreadPoolExecutor(max_workers=1)
+        video_future: Optional[Future] = None
+        if self.video_mode == "parallel":
+            print("Downloading youtube video in the background")
+            video_future = video_pool.submit(self._download_video, metrics, url, dry_run)
+        try:
+            result = self._process(url, model_size, dry_run, audio_source, video_future, held, metrics)
+        finally:
+            video_pool.shutdown(wait=False)
+            self._release(held, *list(held))
+            if self.storage is not None:
+                self.storage.enforce()
+                usage = self.storage.log_usage()
+                if self.registry is not None:
+                    for directory, stats in usage.items():
+                        self.registry.set_gauge(f'storage_bytes{{dir="{directory}"}}', stats["bytes"])
+        result["metrics"] = metrics.as_dicts()
+        return result
+
+    def _process(
+        self,
+        url: str,
+        model_size: str,
+        dry_run: bool,
+        audio_source: str,
+        video_future: Optional[Future],
+        held: List[str],
+        metrics: PipelineMetrics,
+    ):
         print("Extracting Audio")
-        audio_path = self.audio_extractor.extract(video_path)
+        with metrics.stage("extract_audio") as m:
+            audio_path = self.audio_extractor.extract(audio_source)
+            m.add_file(audio_path)
+        self._pin(held, audio_path)
         print("Finished Extracting Audio")
 
-        print("Transcribing Audio")
-        transcript = self.transcriber.transcribe(audio_path, model_size)
-        with open("transcript.json", "w") as fh:
-            json.dump(transcript, fh, indent=2)
+        plan: Optional[ReusePlan] = None
+        if self.deduplicator is not None:
+            with metrics.stage("fingerprint") as m:
+                plan = self.deduplicator.plan(url, audio_path)
+                m.add_file(audio_path)
+            print(f"Audio matches processed videos for {plan.covered_seconds:.0f}s of {plan.duration:.0f}s")
+
+        diarization = None
+        speaker_labels: Optional[List[str]] = None
+        speaker_embeddings = None
+        if plan is not None and plan.is_duplicate:
+            print("Duplicate audio, reusing the stored transcript")
+            transcript = plan.transcript()
+        elif self.speech_analyzer is not None:
+            print("Transcribing and diarizing Audio")
+            with metrics.stage("speech_analysis") as m:
+                analysis = self.speech_analyzer.analyze(audio_path, model_size)
+                diarization = analysis.diarization
+                speaker_labels, speaker_embeddings = analysis.labels, analysis.embeddings
+                transcript = merge_speakers(analysis.transcript, diarization)
+                m.add_file(audio_path)
+            print(f"Speech analysis timings: {analysis.timings}")
+        else:
+            print("Transcribing Audio")
+            with metrics.stage("transcribe") as m:
+                if plan is not None and plan.overlaps:
+                    transcript = transcribe_uncovered(self.transcriber, audio_path, model_size, plan)
+                else:
+                    transcript = self.transcriber.transcribe(audio_path, model_size)
+                m.add_file(audio_path)
         print("Finished Transcription")
 
-        interesting_prompt = (
-            "humor, novelty, conflict resolution, surprising claims, strong emotions"
-        )
-
-        print("Analyzing transcript")
-        segments = self.analyzer.analyze(transcript, interesting_prompt)
+        candidates = transcript
+        if self.segment_scorer is not None:
+            print("Pre-scoring transcript segments")
+            with metrics.stage("prescore") as m:
+                candidates = self.segment_scorer.select(transcript, audio_path)
+                m.add_file(audio_path)
+            print(
+                f"Forwarding {len(candidates['segments'])}/{len(transcript['segments'])} "
+                "segments to the analyzer"
+            )
+        # nothing downstream reads the audio anymore
+        self._release(held, audio_source, audio_path)
+
+        print(f"Analyzing transcript for {', '.join(self.prompts)}")
+        with metrics.stage("analyze"):
+            by_profile = self._analyze(candidates)
+            segments = merge_profile_clips(by_profile)
+        if len(by_profile) > 1:
+            found = sum(len(clips.clips) for clips in by_profile.values())
+            print(f"Kept {len(segments.clips)} of {found} clips after removing overlaps between profiles")
         print(f"The most interesting segments are: {segments}")
 
-        print("Generating clips")
-        clips = self.clip_generator.generate(video_path, segments)
+        video_path = video_future.result() if video_future is not None else None
+        self._pin(held, video_path)
+        sections: List[Dict] = []
+        clips = []
+        if not getattr(segments, "clips", segments):
+            print("No clips selected, nothing to cut")
+        elif self.video_mode == "sections":
+            windows = clip_windows(segments)
+            print(f"Downloading {len(windows)} video sections")
+            with metrics.stage("download_sections") as m:
+                sections = self.downloader.download_sections(url, windows, dry_run)
+                for section in sections:
+                    m.add_file(section["path"])
+            self._pin(held, *(section["path"] for section in sections))
+            print("Finished Downloading Youtube Video Sections")
+
+            print("Generating clips")
+            with metrics.stage("generate_clips") as m:
+                for section in sections:
+                    clips.extend(
+                        self.clip_generator.generate(
+                            section["path"],
+                            clips_in_window(segments, section["start"], section["end"]),
+                        )
+                    )
+                for clip in clips:
+                    m.add_file(clip)
+        else:
+            if video_path is None:
+                print("Downloading youtube video")
+                video_path = self._download_video(metrics, url, dry_run)
+                self._pin(held, video_path)
+            print("Finished Downloading Youtube Video")
+
+            print("Generating clips")
+            with metrics.stage("generate_clips") as m:
+                clips = self.clip_generator.generate(video_path, segments)
+                for clip in clips:
+                    m.add_file(clip)
 
         print("Generated clips:")
         for clip in clips:
@@ -115,9 +348,15 @@ class VideoPipeline:
 
         return {
             "video": video_path,
+            "video_sections": sections,
             "audio": audio_path,
             "transcript": transcript,
+            "diarization": diarization,
+            # voice embedding per diarization label, for speaker_identity
+            "speaker_labels": speaker_labels,
+            "speaker_embeddings": speaker_embeddings,
             "segments": segments,
+            "profiles": by_profile,
             "clips": clips,
         }
 
@@ -126,15 +365,50 @@ class VideoPipeline:
 # CLI entrypoint
 # -----------------------------
 
-def run_pipeline_from_url(url: str, model_size: str = "base", dry_run: bool = False):
+def run_pipeline_from_url(
+    url: str,
+    model_size: str = "base",
+    dry_run: bool = False,
+    use_llm_cache: bool = True,
+    diarize: Optional[bool] = None,
+    backend: str = TRANSCRIPTION_BACKEND,
+    video_mode: str = "parallel",
+    max_height: int = MAX_VIDEO_HEIGHT,
+    profile: Optional[str] = None,
+    deduplicator: Optional[Deduplicator] = None,
+    interests: Optional[List[str]] = None,
+):
+    # with MODEL_SERVER_URL set, the node's model server runs Whisper and pyannote
+    if MODEL_SERVER_URL:
+        transcriber, speech_analyzer = RemoteTranscriber(backend), RemoteSpeechAnalyzer(backend)
+    else:
+        transcriber, speech_analyzer = DefaultTranscriber(backend), DefaultSpeechAnalyzer(backend)
+
+    # diarization needs a Hugging Face token for the pyannote weights
+    if diarize is None:
+        diarize = ModelServerClient().health()["diarization"] if MODEL_SERVER_URL else bool(HF_AUTH_TOKEN)
+
     pipeline = VideoPipeline(
-        downloader=DefaultDownloader(),
+        downloader=DefaultDownloader(max_height),
         audio_extractor=DefaultAudioExtractor(),
-        transcriber=DefaultTranscriber(),
-        analyzer=DefaultAnalyzer(),
+        transcriber=transcriber,
+        analyzer=DefaultAnalyzer(use_cache=use_llm_cache),
         clip_generator=DefaultClipGenerator(),
+        segment_scorer=DefaultSegmentScorer(),
+        speech_analyzer=speech_analyzer if diarize else None,
+        video_mode=video_mode,
+        storage=storage_manager,
+        registry=metrics_registry,
+        deduplicator=deduplicator,
+        prompts={name: INTEREST_PROFILES[name] for name in interests} if interests else None,
     )
-    return pipeline.run(url, model_size, dry_run)
+    if profile is None:
+        return pipeline.run(url, model_size, dry_run)
+
+    profiler = StageProfiler(profile)
+    profile_pipeline(pipeline, profiler)
+    with profiler.video(video_id_from_url(url)):
+        return pipeline.run(url, model_size, dry_run)
 
 
 # KEEP this around if you still want CLI access
@@ -144,7 +418,63 @@ def main() -> None:
     )
     parser.add_argument("url", help="YouTube video URL")
     parser.add_argument("--model-size", default="base")
+    parser.add_argument(
+        "--backend",
+        default=TRANSCRIPTION_BACKEND,
+        choices=sorted(TRANSCRIPTION_BACKENDS),
+        help="Transcription engine",
+    )
     parser.add_argument("--dry-run", default=False, action="store_true")
+    parser.add_argument(
+        "--no-llm-cache",
+        default=False,
+        action="store_true",
+        help="Ignore cached LLM responses and always query the API",
+    )
+    parser.add_argument(
+        "--no-diarize",
+        default=False,
+        action="store_true",
+        help="Skip speaker diarization and only transcribe",
+    )
+    parser.add_argument(
+        "--video-mode",
+        default="parallel",
+        choices=VIDEO_MODES,
+        help="Fetch the video alongside analysis, or only once clips were selected",
+    )
+    parser.add_argument(
+        "--max-height",
+        type=int,
+        default=MAX_VIDEO_HEIGHT,
+        help="Maximum video resolution (height in pixels) to download",
+    )
+    parser.add_argument(
+        "--profile",
+        default=None,
+        choices=PROFILE_MODES,
+        help="Profile every pipeline stage and write captures to profiles/<video id>/",
+    )
+    parser.add_argument(
+        "--interest",
+        action="append",
+        choices=sorted(INTEREST_PROFILES),
+        help="Interest profile to cut clips for; repeat for several (default: highlights)",
+    )
     args = parser.parse_args()
 
-    run_pipeline_from_url(args.url, args.model_size, args.dry_run)
+    result = run_pipeline_from_url(
+        args.url,
+        args.model_size,
+        args.dry_run,
+        use_llm_cache=not args.no_llm_cache,
+        diarize=False if args.no_diarize else None,
+        backend=args.backend,
+        video_mode=args.video_mode,
+        max_height=args.max_height,
+        profile=args.profile,
+        interests=args.interest,
+    )
+    # the service stores transcripts per video (transcript_crud); a one-off run leaves a copy here
+    with open("transcript.json", "w") as fh:
+        json.dump(result["transcript"], fh, indent=2)
@@ -0,0 +1,161 @@
+import cProfile
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from loguru import logger
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+SAMPLE_INTERVAL_SECONDS = float(os.getenv("PROFILE_SAMPLE_INTERVAL", 0.005))
+
+# "cprofile": deterministic, written as <stage>.<method>.prof (pstats; snakeviz, flameprof)
+# "sampling": wall-clock stack samples, written as <stage>.<method>.folded
+#             (collapsed stacks for flamegraph.pl, speedscope, inferno)
+PROFILE_MODES = ("cprofile", "sampling")
+
+
+class StackSampler:
+    """Samples one thread's Python stack at a fixed interval into collapsed-stack counts."""
+
+    def __init__(self, thread_id: int, interval: float = SAMPLE_INTERVAL_SECONDS):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.counts[";".join(reversed(stack))] += 1
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as fh:
+            for stack, count in self.counts.most_common():
+                fh.write(f"{stack} {count}\n")
+
+
+class StageProfiler:
+    """
+    Opt-in profiling for pipeline stages.
+
+    ``wrap`` returns a proxy whose public methods run under the profiler;
+    captures land in ``<output_dir>/<video>/`` for the video set with ``video``.
+    """
+
+    def __init__(
+        self,
+        mode: str = "cprofile",
+        output_dir: str = PROFILE_DIR,
+        interval: float = SAMPLE_INTERVAL_SECONDS,
+    ):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"profile mode must be one of {PROFILE_MODES}, got {mode!r}")
+        self.mode = mode
+        self.output_dir = output_dir
+        self.interval = interval
+        self.current_video = "unknown"
+
+    @contextmanager
+    def video(self, key: str):
+        previous, self.current_video = self.current_video, key
+        try:
+            yield
+        finally:
+            self.current_video = previous
+
+    def wrap(self, stage: str, impl):
+        if impl is None:
+            return None
+        return _ProfiledStage(self, stage, impl)
+
+    def _path(self, label: str, ext: str) -> str:
+        directory = os.path.join(self.output_dir, self.current_video)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{label}.{ext}")
+        # stages called more than once per video (e.g. per section) get numbered captures
+        n = 1
+        while os.path.exists(path):
+            path = os.path.join(directory, f"{label}.{n}.{ext}")
+            n += 1
+        return path
+
+    def call(self, label: str, fn: Callable, *args, **kwargs):
+        if self.mode == "sampling":
+            sampler = StackSampler(threading.get_ident(), self.interval)
+            try:
+                with sampler:
+                    return fn(*args, **kwargs)
+            finally:
+                sampler.write(self._path(label, "folded"))
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # only one deterministic profiler can be active per process (e.g. parallel stages)
+            logger.warning(f"Profiler busy, running {label} unprofiled")
+            return fn(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profile.disable()
+            path = self._path(label, "prof")
+            profile.dump_stats(path)
+            logger.info(f"Profiled {label} in {time.perf_counter() - start:.2f}s -> {path}")
+
+
+class _ProfiledStage:
+    """Proxy forwarding attribute access to a stage, profiling its public methods."""
+
+    def __init__(self, profiler: StageProfiler, stage: str, impl):
+        self._profiler = profiler
+        self._stage = stage
+        self._impl = impl
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._impl, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        def profiled(*args, **kwargs):
+            return self._profiler.call(f"{self._stage}.{name}", attr, *args, **kwargs)
+
+        return profiled
+
+
+def profile_pipeline(pipeline, profiler: Optional[StageProfiler]):
+    """Wrap every injected stage of a VideoPipeline in ``profiler`` (no-op for ``None``)."""
+    if profiler is None:
+        return pipeline
+    for attr in (
+        "downloader",
+        "audio_extractor",
+        "transcriber",
+        "speech_analyzer",
+        "segment_scorer",
+        "analyzer",
+        "clip_generator",
+        "deduplicator",
+    ):
+        setattr(pipeline, attr, profiler.wrap(attr, getattr(pipeline, attr)))
+    return pipeline
@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os
+import subprocess
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional
+
+import numpy as np
+
+from models.clip import Clips
+
+SHOT_CACHE_DIR = os.getenv("SHOT_CACHE_DIR", ".shot_cache")
+SHOT_SAMPLE_FPS = float(os.getenv("SHOT_SAMPLE_FPS", 4))
+SHOT_FRAME_SIZE = (64, 36)       # decode resolution (width, height)
+SHOT_HIST_BINS = 16              # per colour channel
+SHOT_THRESHOLD = float(os.getenv("SHOT_THRESHOLD", 0.35))
+SHOT_MIN_SECONDS = 1.0           # ignore cuts closer than this to the previous one (flashes)
+SHOT_SNAP_TOLERANCE_SECONDS = float(os.getenv("SHOT_SNAP_TOLERANCE_SECONDS", 1.0))
+_CHUNK_FRAMES = 1024
+
+
+@dataclass
+class ShotBoundaries:
+    shots: List[float] = field(default_factory=list)       # seconds where a new shot starts
+    keyframes: List[float] = field(default_factory=list)   # seconds of video keyframes
+
+
+def frame_histograms(frames: np.ndarray, bins: int = SHOT_HIST_BINS) -> np.ndarray:
+    """Normalised per-channel colour histograms of (n, h, w, 3) uint8 frames, shape (n, 3 * bins)."""
+    n = len(frames)
+    shift = 8 - int(np.log2(bins))
+    idx = (frames >> shift).astype(np.int64) + np.arange(3) * bins
+    idx = idx.reshape(n, -1) + (np.arange(n) * 3 * bins)[:, None]
+    counts = np.bincount(idx.ravel(), minlength=n * 3 * bins).reshape(n, 3 * bins)
+    return counts / (frames.shape[1] * frames.shape[2])
+
+
+def shot_boundaries_from_histograms(
+    histograms: np.ndarray,
+    fps: float = SHOT_SAMPLE_FPS,
+    threshold: float = SHOT_THRESHOLD,
+    min_seconds: float = SHOT_MIN_SECONDS,
+) -> List[float]:
+    """Times of sampled frames whose histogram differs from the previous one by more than ``threshold``."""
+    if len(histograms) < 2:
+        return []
+    # L1 distance per channel is in [0, 2]; averaged over 3 channels and halved -> [0, 1]
+    distance = np.abs(np.diff(histograms, axis=0)).sum(axis=1) / 6
+    cuts = np.flatnonzero(distance > threshold) + 1
+
+    boundaries: List[float] = []
+    for i in cuts:
+        t = float(i / fps)
+        if not boundaries or t - boundaries[-1] >= min_seconds:
+            boundaries.append(t)
+    return boundaries
+
+
+def _decode_frames(video_path: str, fps: float = SHOT_SAMPLE_FPS) -> Iterator[np.ndarray]:
+    """Downscaled RGB frames at ``fps`` from ffmpeg, in chunks of (n, h, w, 3)."""
+    width, height = SHOT_FRAME_SIZE
+    frame_bytes = width * height * 3
+    cmd = [
+        "ffmpeg", "-v", "error",
+        "-i", video_path,
+        "-an",
+        "-vf", f"fps={fps},scale={width}:{height}",
+        "-f", "rawvideo", "-pix_fmt", "rgb24",
+        "-",
+    ]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        while True:
+            data = proc.stdout.read(frame_bytes * _CHUNK_FRAMES)
+            if not data:
+                break
+            n = len(data) // frame_bytes
+            yield np.frombuffer(data[:n * frame_bytes], dtype=np.uint8).reshape(n, height, width, 3)
+    finally:
+        proc.stdout.close()
+        stderr = proc.stderr.read()
+        if proc.wait() != 0:
+            raise RuntimeError(f"ffmpeg failed to decode {video_path}: {stderr.decode(errors='replace')}")
+
+
+def _keyframes(video_path: str) -> List[float]:
+    """Keyframe timestamps from the container's packet flags (no decoding)."""
+    cmd = [
+        "ffprobe", "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries", "packet=pts_time,flags",
+        "-of", "csv=p=0",
+        video_path,
+    ]
+    result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffprobe failed for {video_path}: {result.stderr.decode(errors='replace')}")
+    times = []
+    for line in result.stdout.decode().splitlines():
+        pts, _, flags = line.partition(",")
+        if "K" in flags and pts not in ("", "N/A"):
+            times.append(float(pts))
+    return sorted(times)
+
+
+def detect_shot_boundaries(video_path: str) -> ShotBoundaries:
+    histograms = [frame_histograms(chunk) for chunk in _decode_frames(video_path)]
+    shots = shot_boundaries_from_histograms(np.concatenate(histograms)) if histograms else []
+    return ShotBoundaries(shots, _keyframes(video_path))
+
+
+def _cache_path(video_path: str, cache_dir: str) -> str:
+    # downloads are named by video id; size guards against a re-download in another format.
+    # mtime is not part of the key because the storage manager touches pinned files.
+    raw = "\x1f".join([
+        os.path.basename(video_path),
+        str(os.path.getsize(video_path)),
+        str(SHOT_SAMPLE_FPS),
+        str(SHOT_THRESHOLD),
+    ])
+    return os.path.join(cache_dir, hashlib.sha256(raw.encode("utf-8")).hexdigest() + ".json")
+
+
+def shot_boundaries(video_path: str, cache_dir: str = SHOT_CACHE_DIR) -> ShotBoundaries:
+    """Shot boundaries and keyframes of a video, detected once and cached on disk."""
+    path = _cache_path(video_path, cache_dir)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as fh:
+            return ShotBoundaries(**json.load(fh))
+
+    boundaries = detect_shot_boundaries(video_path)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump({"shots": boundaries.shots, "keyframes": boundaries.keyframes}, fh)
+    os.replace(tmp, path)
+    return boundaries
+
+
+def _nearest(t: float, points: List[float], tolerance: float) -> Optional[float]:
+    if not points:
+        return None
+    arr = np.asarray(points)
+    i = int(np.abs(arr - t).argmin())
+    return float(arr[i]) if abs(arr[i] - t) <= tolerance else None
+
+
+def snap_clips(
+    clips: Clips,
+    boundaries: ShotBoundaries,
+    tolerance: float = SHOT_SNAP_TOLERANCE_SECONDS,
+) -> Clips:
+    """
+    Move clip starts and ends onto the nearest shot boundary within ``tolerance``.
+
+    Starts without a nearby shot change fall back to the nearest keyframe,
+    where a stream copy can begin cleanly. Clips that would collapse keep
+    their original times.
+    """
+    snapped = []
+    for clip in clips.clips:
+        start = _nearest(clip.start_time, boundaries.shots, tolerance)
+        if start is None:
+            start = _nearest(clip.start_time, boundaries.keyframes, tolerance)
+        end = _nearest(clip.end_time, boundaries.shots, tolerance)
+        start = clip.start_time if start is None else start
+        end = clip.end_time if end is None else end
+        if end <= start:
+            start, end = clip.start_time, clip.end_time
+        snapped.append(clip.model_copy(update={"start_time": start, "end_time": end}))
+    return Clips(clips=snapped)
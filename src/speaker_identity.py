@@ -0,0 +1,129 @@
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from crud.crud import speaker_voice_crud
+from llm_requests import name_speakers
+from models.analytics import SpeakerVoice
+
+# cosine similarity above which a voice counts as a known speaker
+SPEAKER_MATCH_THRESHOLD = float(os.getenv("SPEAKER_MATCH_THRESHOLD", 0.6))
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class SpeakerIndex:
+    """Brute-force cosine nearest-neighbour index over a channel's known voices."""
+
+    def __init__(self, names: Sequence[str], embeddings: np.ndarray):
+        self.names = list(names)
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        self.matrix = _normalize(embeddings) if len(self.names) else embeddings
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[SpeakerVoice]) -> "SpeakerIndex":
+        if not rows:
+            return cls([], np.empty((0, 0), dtype=np.float32))
+        embeddings = np.stack([np.frombuffer(r.embedding, dtype=np.float32) for r in rows])
+        return cls([r.name for r in rows], embeddings)
+
+    def match(
+        self,
+        embeddings: np.ndarray,
+        threshold: float = SPEAKER_MATCH_THRESHOLD,
+    ) -> List[Optional[Tuple[int, float]]]:
+        """(row index, similarity) of the closest known voice per query, or None below threshold."""
+        queries = np.asarray(embeddings, dtype=np.float32)
+        if len(self.names) == 0 or len(queries) == 0:
+            return [None] * len(queries)
+
+        valid = np.isfinite(queries).all(axis=1)
+        sims = _normalize(np.nan_to_num(queries)) @ self.matrix.T
+        best = sims.argmax(axis=1)
+        best_sim = sims[np.arange(len(queries)), best]
+        return [
+            (int(b), float(s)) if ok and s >= threshold else None
+            for b, s, ok in zip(best, best_sim, valid)
+        ]
+
+
+def _is_real_name(name: Optional[str], label: str) -> bool:
+    return bool(name) and name != label and name.lower() not in ("unknown", "null", "none")
+
+
+def identify_speakers(
+    db: Session,
+    channel_id: int,
+    labels: Sequence[str],
+    embeddings: np.ndarray,
+    transcript: Dict,
+    threshold: float = SPEAKER_MATCH_THRESHOLD,
+) -> Dict[str, str]:
+    """
+    Map diarization labels (SPEAKER_00, ...) to names for one video.
+
+    Voices already known on the channel are resolved locally; only the rest
+    are sent to the LLM, and any names it finds are stored for next time.
+    ``transcript`` must already carry speaker labels (see merge_speakers).
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    rows = [
+        r for r in speaker_voice_crud.get_by_channel(db, channel_id)
+        if r.dim == embeddings.shape[1]
+    ]
+    index = SpeakerIndex.from_rows(rows)
+
+    names: Dict[str, str] = {}
+    unknown: List[int] = []
+    for i, (label, match) in enumerate(zip(labels, index.match(embeddings, threshold))):
+        if match is None:
+            unknown.append(i)
+            continue
+        row = rows[match[0]]
+        names[label] = row.name
+        _absorb(db, row, embeddings[i])
+
+    if unknown:
+        print(f"Asking LLM to name {len(unknown)} unknown speakers")
+        llm_names = name_speakers(transcript, [labels[i] for i in unknown])
+        for i in unknown:
+            label = labels[i]
+            name = llm_names.get(label)
+            if not _is_real_name(name, label):
+                continue
+            names[label] = name
+            if np.isfinite(embeddings[i]).all():
+                speaker_voice_crud.create(
+                    db,
+                    {
+                        "channel_id": channel_id,
+                        "name": name,
+                        "embedding": embeddings[i].tobytes(),
+                        "dim": int(embeddings.shape[1]),
+                    },
+                )
+
+    return names
+
+
+def _absorb(db: Session, row: SpeakerVoice, embedding: np.ndarray) -> None:
+    """Fold a new sighting into the stored running-mean embedding."""
+    if not np.isfinite(embedding).all():
+        return
+    current = np.frombuffer(row.embedding, dtype=np.float32)
+    updated = (current * row.samples + embedding) / (row.samples + 1)
+    speaker_voice_crud.update(
+        db,
+        row,
+        {
+            "embedding": updated.astype(np.float32).tobytes(),
+            "samples": row.samples + 1,
+            "updated_at": datetime.utcnow(),
+        },
+    )
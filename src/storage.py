@@ -0,0 +1,201 @@
+import os
+import shutil
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from loguru import logger
+
+MB = 1024 * 1024
+
+
+def _quota_mb(name: str) -> int:
+    return int(float(os.getenv(f"STORAGE_QUOTA_MB_{name.upper()}", 0)) * MB)
+
+
+# Working directories the pipeline writes to; a quota of 0 means unlimited.
+DOWNLOAD_DIR = "downloads"
+AUDIO_DIR = "audio"
+CLIP_DIR = "clips"
+STORAGE_QUOTAS = {
+    DOWNLOAD_DIR: _quota_mb("downloads") or 20 * 1024 * MB,
+    AUDIO_DIR: _quota_mb("audio") or 5 * 1024 * MB,
+    CLIP_DIR: _quota_mb("clips"),
+}
+
+# Optional RAM-backed directory (e.g. /dev/shm/audio) for the extracted WAV,
+# used only while the WAV fits and leaves at least STORAGE_SCRATCH_MIN_FREE_MB free.
+AUDIO_SCRATCH_DIR = os.getenv("AUDIO_SCRATCH_DIR")
+SCRATCH_MIN_FREE_BYTES = int(float(os.getenv("STORAGE_SCRATCH_MIN_FREE_MB", 512)) * MB)
+
+# files written more recently than this are never evicted (e.g. yt-dlp .part files)
+EVICT_GRACE_SECONDS = float(os.getenv("STORAGE_EVICT_GRACE_SECONDS", 600))
+
+
+class StorageManager:
+    """
+    Per-directory disk quotas with LRU eviction.
+
+    Stages ``pin`` the files they still need and ``release`` them once the
+    downstream stages are done. Released files stay on disk as a cache
+    (a re-run of the same video reuses its download) until ``enforce``
+    evicts the least recently used ones to bring a directory under quota.
+    """
+
+    def __init__(
+        self,
+        quotas: Optional[Dict[str, int]] = None,
+        grace_seconds: float = EVICT_GRACE_SECONDS,
+    ):
+        self.quotas = dict(STORAGE_QUOTAS if quotas is None else quotas)
+        self.grace_seconds = grace_seconds
+        self._pins: Counter = Counter()
+        self._lock = threading.Lock()
+        self.evicted_files = 0
+        self.evicted_bytes = 0
+
+    @staticmethod
+    def _key(path: str) -> str:
+        return os.path.realpath(path)
+
+    def pin(self, *paths: Optional[str]) -> None:
+        """Protect files from eviction and mark them as recently used."""
+        with self._lock:
+            for path in filter(None, paths):
+                self._pins[self._key(path)] += 1
+                if os.path.exists(path):
+                    os.utime(path)
+
+    def release(self, *paths: Optional[str], delete: bool = False) -> None:
+        """
+        Drop one pin per path; unpinned files become eviction candidates.
+
+        With ``delete`` files nobody else has pinned are removed right away,
+        which is what scratch files (e.g. audio on tmpfs) want.
+        """
+        with self._lock:
+            for path in filter(None, paths):
+                key = self._key(path)
+                self._pins[key] -= 1
+                if self._pins[key] > 0:
+                    continue
+                del self._pins[key]
+                if delete and os.path.exists(path):
+                    os.remove(path)
+
+    def _files(self, directory: str) -> List[os.DirEntry]:
+        if not os.path.isdir(directory):
+            return []
+        return [entry for entry in os.scandir(directory) if entry.is_file(follow_symlinks=False)]
+
+    def enforce(self, directories: Optional[Iterable[str]] = None) -> int:
+        """Evict least recently used unpinned files until each directory fits its quota."""
+        freed = 0
+        now = time.time()
+        with self._lock:
+            for directory in directories or self.quotas:
+                quota = self.quotas.get(directory, 0)
+                if not quota:
+                    continue
+
+                files = self._files(directory)
+                used = sum(entry.stat().st_size for entry in files)
+                candidates = sorted(
+                    (
+                        entry for entry in files
+                        if self._key(entry.path) not in self._pins
+                        and now - entry.stat().st_mtime > self.grace_seconds
+                    ),
+                    key=lambda entry: entry.stat().st_mtime,
+                )
+                for entry in candidates:
+                    if used <= quota:
+                        break
+                    size = entry.stat().st_size
+                    try:
+                        os.remove(entry.path)
+                    except FileNotFoundError:
+                        continue
+                    logger.info(f"Evicted {entry.path} ({size / MB:.1f} MB)")
+                    used -= size
+                    freed += size
+                    self.evicted_files += 1
+                    self.evicted_bytes += size
+
+                if used > quota:
+                    logger.warning(
+                        f"{directory} uses {used / MB:.0f} MB of its {quota / MB:.0f} MB quota "
+                        "with nothing left to evict"
+                    )
+        return freed
+
+    def usage(self) -> Dict[str, Dict[str, int]]:
+        """Files, bytes and quota per managed directory."""
+        stats = {}
+        for directory, quota in self.quotas.items():
+            files = self._files(directory)
+            stats[directory] = {
+                "files": len(files),
+                "bytes": sum(entry.stat().st_size for entry in files),
+                "quota_bytes": quota,
+                "pinned": sum(1 for entry in files if self._key(entry.path) in self._pins),
+            }
+        return stats
+
+    def log_usage(self) -> Dict[str, Dict[str, int]]:
+        usage = self.usage()
+        for directory, s in usage.items():
+            quota = f"{s['quota_bytes'] / MB:.0f} MB" if s["quota_bytes"] else "unlimited"
+            logger.info(
+                f"Storage {directory}: {s['files']} files, {s['bytes'] / MB:.1f} MB "
+                f"of {quota}, {s['pinned']} pinned"
+            )
+        return usage
+
+
+def is_scratch(path: Optional[str]) -> bool:
+    if not AUDIO_SCRATCH_DIR or not path:
+        return False
+    return os.path.realpath(path).startswith(os.path.realpath(AUDIO_SCRATCH_DIR) + os.sep)
+
+
+# bytes promised to extractions still writing into AUDIO_SCRATCH_DIR
+_scratch_reserved = 0
+_scratch_lock = threading.Lock()
+
+
+@contextmanager
+def audio_scratch_dir(needed_bytes: Optional[int] = 0, default: str = AUDIO_DIR) -> Iterator[str]:
+    """
+    Directory to extract ``needed_bytes`` of audio into.
+
+    AUDIO_SCRATCH_DIR when the file fits next to the extractions already
+    writing there and still leaves STORAGE_SCRATCH_MIN_FREE_MB free, else the
+    on-disk audio directory (also when the size is unknown). The space stays
+    reserved until the block exits; by then the file occupies it itself.
+    """
+    global _scratch_reserved
+    if not AUDIO_SCRATCH_DIR:
+        yield default
+        return
+    os.makedirs(AUDIO_SCRATCH_DIR, exist_ok=True)
+    with _scratch_lock:
+        free = shutil.disk_usage(AUDIO_SCRATCH_DIR).free - _scratch_reserved
+        fits = needed_bytes is not None and free - needed_bytes >= SCRATCH_MIN_FREE_BYTES
+        if fits:
+            _scratch_reserved += needed_bytes
+    if not fits:
+        need = "an unknown size" if needed_bytes is None else f"{needed_bytes / MB:.0f} MB"
+        logger.warning(f"{AUDIO_SCRATCH_DIR} has {free / MB:.0f} MB free for {need}, extracting audio to {default}")
+        yield default
+        return
+    try:
+        yield AUDIO_SCRATCH_DIR
+    finally:
+        with _scratch_lock:
+            _scratch_reserved -= needed_bytes
+
+
+storage_manager = StorageManager()
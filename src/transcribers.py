@@ -0,0 +1,161 @@
+import os
+from functools import lru_cache
+from typing import Dict, Iterable, Protocol, Union
+
+import numpy as np
+
+AudioInput = Union[str, np.ndarray]
+
+TRANSCRIPTION_BACKEND = os.getenv("TRANSCRIPTION_BACKEND", "whisper")
+BATCH_SIZE = int(os.getenv("TRANSCRIPTION_BATCH_SIZE", 16))
+
+
+def _device() -> str:
+    import torch
+
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+class TranscriptionBackend(Protocol):
+    def load(self, model_size: str) -> None: ...
+
+    def transcribe(self, audio: AudioInput, model_size: str) -> Dict: ...
+
+
+# -----------------------------
+# openai-whisper (reference implementation)
+# -----------------------------
+
+@lru_cache(maxsize=2)
+def _whisper_model(model_size: str, device: str):
+    import whisper
+
+    return whisper.load_model(model_size, device=device)
+
+
+class WhisperBackend:
+    def load(self, model_size: str) -> None:
+        _whisper_model(model_size, _device())
+
+    def transcribe(self, audio: AudioInput, model_size: str) -> Dict:
+        model = _whisper_model(model_size, _device())
+        return model.transcribe(audio)
+
+
+# -----------------------------
+# faster-whisper (CTranslate2, int8 on CPU / fp16 on GPU)
+# -----------------------------
+
+@lru_cache(maxsize=2)
+def _faster_whisper_model(model_size: str, device: str, compute_type: str):
+    try:
+        from faster_whisper import WhisperModel
+    except ImportError as e:
+        raise RuntimeError(
+            "faster-whisper is not installed; `pip install faster-whisper` "
+            "or use the 'whisper' transcription backend"
+        ) from e
+    return WhisperModel(model_size, device=device, compute_type=compute_type)
+
+
+def _to_whisper_schema(segments: Iterable, language: str) -> Dict:
+    """Convert faster-whisper segments to the dict openai-whisper returns."""
+    out = []
+    for i, seg in enumerate(segments):
+        item = {
+            "id": i,
+            "seek": seg.seek,
+            "start": seg.start,
+            "end": seg.end,
+            "text": seg.text,
+            "tokens": list(seg.tokens),
+            "temperature": seg.temperature,
+            "avg_logprob": seg.avg_logprob,
+            "compression_ratio": seg.compression_ratio,
+            "no_speech_prob": seg.no_speech_prob,
+        }
+        if seg.words:
+            item["words"] = [
+                {"word": w.word, "start": w.start, "end": w.end, "probability": w.probability}
+                for w in seg.words
+            ]
+        out.append(item)
+
+    return {
+        "text": "".join(s["text"] for s in out),
+        "segments": out,
+        "language": language,
+    }
+
+
+class FasterWhisperBackend:
+    def __init__(self, compute_type: str = None):
+        self.compute_type = compute_type
+
+    def _model(self, model_size: str):
+        device = _device()
+        compute_type = self.compute_type or ("float16" if device == "cuda" else "int8")
+        return _faster_whisper_model(model_size, device, compute_type)
+
+    def load(self, model_size: str) -> None:
+        self._model(model_size)
+
+    def transcribe(self, audio: AudioInput, model_size: str) -> Dict:
+        segments, info = self._model(model_size).transcribe(audio)
+        return _to_whisper_schema(segments, info.language)
+
+
+class BatchedFasterWhisperBackend(FasterWhisperBackend):
+    """faster-whisper's batched pipeline: 30 s windows decoded ``batch_size`` at a time."""
+
+    def __init__(self, compute_type: str = None, batch_size: int = BATCH_SIZE):
+        super().__init__(compute_type)
+        self.batch_size = batch_size
+
+    def transcribe(self, audio: AudioInput, model_size: str) -> Dict:
+        from faster_whisper import BatchedInferencePipeline
+
+        pipeline = BatchedInferencePipeline(model=self._model(model_size))
+        segments, info = pipeline.transcribe(audio, batch_size=self.batch_size)
+        return _to_whisper_schema(segments, info.language)
+
+
+# -----------------------------
+# openai-whisper, batched across concurrent pipelines (see batch_transcription)
+# -----------------------------
+
+class SharedBatchBackend:
+    """Queues audio on the process-wide batch service so concurrent videos share GPU batches."""
+
+    def load(self, model_size: str) -> None:
+        from batch_transcription import get_batch_service
+
+        get_batch_service(model_size)
+
+    def transcribe(self, audio: AudioInput, model_size: str) -> Dict:
+        from batch_transcription import SAMPLE_RATE, get_batch_service
+
+        if isinstance(audio, str):
+            import whisper
+
+            audio = whisper.load_audio(audio, sr=SAMPLE_RATE)
+        return get_batch_service(model_size).submit(audio).result()
+
+
+TRANSCRIPTION_BACKENDS = {
+    "whisper": WhisperBackend,
+    "faster-whisper": FasterWhisperBackend,
+    "faster-whisper-batched": BatchedFasterWhisperBackend,
+    "whisper-shared-batch": SharedBatchBackend,
+}
+
+
+@lru_cache(maxsize=None)
+def get_backend(name: str = TRANSCRIPTION_BACKEND) -> TranscriptionBackend:
+    try:
+        return TRANSCRIPTION_BACKENDS[name]()
+    except KeyError:
+        raise ValueError(
+            f"Unknown transcription backend {name!r}; "
+            f"choose one of {', '.join(TRANSCRIPTION_BACKENDS)}"
+        )
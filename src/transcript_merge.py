@@ -0,0 +1,159 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+Turn = Tuple[float, float, str]
+
+
+def diarization_to_turns(diarization) -> List[Turn]:
+    """
+    Normalise diarization output to a list of (start, end, speaker) tuples.
+
+    Accepts a pyannote ``Annotation``, tuples, or dicts with start/end/speaker.
+    """
+    if diarization is None:
+        return []
+    if hasattr(diarization, "itertracks"):
+        return [
+            (float(turn.start), float(turn.end), str(speaker))
+            for turn, _, speaker in diarization.itertracks(yield_label=True)
+        ]
+
+    turns = []
+    for item in diarization:
+        if isinstance(item, dict):
+            turns.append((float(item["start"]), float(item["end"]), str(item["speaker"])))
+        else:
+            start, end, speaker = item
+            turns.append((float(start), float(end), str(speaker)))
+    return turns
+
+
+def _speaker_coverage(turns: Iterable[Turn], speaker: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Merged, sorted turns of one speaker plus the cumulative speech time before each turn.
+
+    Overlapping turns of the same speaker are unioned first so the coverage
+    function is monotonic.
+    """
+    spans = sorted((s, e) for s, e, spk in turns if spk == speaker and e > s)
+    merged: List[List[float]] = []
+    for s, e in spans:
+        if merged and s <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], e)
+        else:
+            merged.append([s, e])
+
+    arr = np.asarray(merged, dtype=np.float64).reshape(-1, 2)
+    starts, ends = arr[:, 0], arr[:, 1]
+    before = np.concatenate([[0.0], np.cumsum(ends - starts)[:-1]])
+    return starts, ends, before
+
+
+def _covered_until(t: np.ndarray, starts: np.ndarray, ends: np.ndarray, before: np.ndarray) -> np.ndarray:
+    """Seconds of speech in [-inf, t] for every t, by binary search over the turns."""
+    idx = np.searchsorted(starts, t, side="right") - 1
+    safe = np.maximum(idx, 0)
+    inside = np.clip(t - starts[safe], 0.0, ends[safe] - starts[safe])
+    return np.where(idx >= 0, before[safe] + inside, 0.0)
+
+
+def assign_speakers(
+    starts: np.ndarray,
+    ends: np.ndarray,
+    turns: List[Turn],
+) -> List[Optional[str]]:
+    """
+    Speaker with the largest overlap for every [start, end] interval.
+
+    Per speaker, overlap is the difference of the cumulative coverage at the
+    interval end and start, so the whole join is O((n + m) log m) per speaker.
+    Intervals that overlap no turn get ``None``.
+    """
+    starts = np.asarray(starts, dtype=np.float64)
+    ends = np.asarray(ends, dtype=np.float64)
+    speakers = sorted({spk for s, e, spk in turns if e > s})
+    if not speakers or len(starts) == 0:
+        return [None] * len(starts)
+
+    overlap = np.empty((len(starts), len(speakers)))
+    for col, speaker in enumerate(speakers):
+        cov = _speaker_coverage(turns, speaker)
+        overlap[:, col] = _covered_until(ends, *cov) - _covered_until(starts, *cov)
+
+    best = overlap.argmax(axis=1)
+    has_overlap = overlap[np.arange(len(starts)), best] > 0
+    return [speakers[b] if ok else None for b, ok in zip(best, has_overlap)]
+
+
+def merge_speakers(transcript: Dict, diarization) -> Dict:
+    """
+    Return a copy of a Whisper transcript with a ``speaker`` on every segment.
+
+    Word timestamps (when present) are labelled too; words that fall in a
+    diarization gap inherit their segment's speaker.
+    """
+    turns = diarization_to_turns(diarization)
+    segments = [dict(s) for s in transcript["segments"]]
+
+    seg_speakers = assign_speakers(
+        np.array([s["start"] for s in segments]),
+        np.array([s["end"] for s in segments]),
+        turns,
+    )
+    for seg, speaker in zip(segments, seg_speakers):
+        seg["speaker"] = speaker
+
+    words = [(seg, dict(w)) for seg in segments for w in seg.get("words") or []]
+    if words:
+        word_speakers = assign_speakers(
+            np.array([w["start"] for _, w in words]),
+            np.array([w["end"] for _, w in words]),
+            turns,
+        )
+        for seg in segments:
+            if "words" in seg:
+                seg["words"] = []
+        for (seg, word), speaker in zip(words, word_speakers):
+            word["speaker"] = speaker or seg["speaker"]
+            seg["words"].append(word)
+
+    merged = dict(transcript)
+    merged["segments"] = segments
+    return merged
+
+
+def compact_segments(segments: List[Dict]) -> List[Dict]:
+    """Only the fields the LLM needs, with rounded times, to keep prompts small."""
+    compact = []
+    for s in segments:
+        item = {
+            "id": s["id"],
+            "start": round(float(s["start"]), 2),
+            "end": round(float(s["end"]), 2),
+        }
+        if s.get("speaker"):
+            item["speaker"] = s["speaker"]
+        item["text"] = s["text"].strip()
+        compact.append(item)
+    return compact
+
+
+def format_speaker_transcript(transcript: Dict) -> str:
+    """Readable transcript with consecutive segments of the same speaker joined into one line."""
+    lines = []
+    current = None
+    for seg in transcript["segments"]:
+        speaker = seg.get("speaker") or "UNKNOWN"
+        text = seg["text"].strip()
+        if current and current[1] == speaker:
+            current[2].append(text)
+        else:
+            current = [seg["start"], speaker, [text]]
+            lines.append(current)
+
+    return "\n".join(
+        f"[{int(start) // 3600:02d}:{int(start) % 3600 // 60:02d}:{int(start) % 60:02d}] "
+        f"{speaker}: {' '.join(texts)}"
+        for start, speaker, texts in lines
+    )
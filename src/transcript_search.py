@@ -0,0 +1,225 @@
+"""
+Full-text and time-range search over stored transcripts.
+
+    python transcript_search.py "open source" --channel @GoogleDevelopers
+    python transcript_search.py "open source" --channel @GoogleDevelopers --cut
+"""
+import argparse
+import re
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set
+
+from models.clip import Clip, Clips
+from transcript_store import CompactTranscript
+
+SEARCH_PAD_SECONDS = 2.0
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.casefold())
+
+
+def contains_phrase(tokens: List[str], phrase: List[str]) -> bool:
+    """Whether ``phrase`` occurs in ``tokens`` as consecutive whole tokens."""
+    n = len(phrase)
+    return any(tokens[i:i + n] == phrase for i in range(len(tokens) - n + 1))
+
+
+@dataclass
+class SearchHit:
+    video_id: int
+    segment_id: int
+    start: float
+    end: float
+    text: str
+    speaker: Optional[str] = None
+
+
+class TranscriptSearchIndex:
+    """
+    In-memory inverted index from terms to transcript segments.
+
+    A query matches segments containing all of its terms; with ``phrase``
+    the terms must also appear in order. Built once from the transcript
+    table, queries only touch the postings of their terms.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Set[int]] = defaultdict(set)
+        self._docs: List[tuple] = []                  # global id -> (video_id, segment id)
+        self._transcripts: Dict[int, CompactTranscript] = {}
+        self._video_docs: Dict[int, List[int]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(docs) for docs in self._video_docs.values())
+
+    def add(self, video_id: int, transcript: CompactTranscript) -> None:
+        """Index (or re-index) the transcript of one video."""
+        self.remove(video_id)
+        self._transcripts[video_id] = transcript
+        docs = []
+        for i in range(len(transcript)):
+            doc = len(self._docs)
+            self._docs.append((video_id, i))
+            for term in set(tokenize(transcript.text(i))):
+                self._postings[term].add(doc)
+            docs.append(doc)
+        self._video_docs[video_id] = docs
+
+    def remove(self, video_id: int) -> None:
+        docs = self._video_docs.pop(video_id, None)
+        if not docs:
+            return
+        transcript = self._transcripts.pop(video_id)
+        for doc in docs:
+            _, i = self._docs[doc]
+            for term in set(tokenize(transcript.text(i))):
+                self._postings[term].discard(doc)
+
+    def search(
+        self,
+        query: str,
+        start: float = 0.0,
+        end: float = float("inf"),
+        video_ids: Optional[Iterable[int]] = None,
+        phrase: bool = False,
+        limit: Optional[int] = None,
+    ) -> List[SearchHit]:
+        """Segments matching ``query`` that overlap [start, end), ordered by video and time."""
+        terms = tokenize(query)
+        if not terms:
+            return []
+        postings = sorted((self._postings.get(term, set()) for term in set(terms)), key=len)
+        docs = set(postings[0]).intersection(*postings[1:])
+        wanted = set(video_ids) if video_ids is not None else None
+
+        candidates = []
+        for doc in docs:
+            video_id, i = self._docs[doc]
+            if wanted is not None and video_id not in wanted:
+                continue
+            transcript = self._transcripts[video_id]
+            if transcript.ends[i] <= start or transcript.starts[i] >= end:
+                continue
+            candidates.append((video_id, transcript.starts[i], i))
+        candidates.sort()
+
+        # texts are only decoded for the hits that are returned
+        hits = []
+        for video_id, _, i in candidates:
+            if limit is not None and len(hits) >= limit:
+                break
+            transcript = self._transcripts[video_id]
+            if phrase and not contains_phrase(tokenize(transcript.text(i)), terms):
+                continue
+            seg = transcript.segment(i)
+            hits.append(SearchHit(video_id, i, seg["start"], seg["end"], seg["text"], seg.get("speaker")))
+        return hits
+
+    @classmethod
+    def from_db(cls, db, channel_id: Optional[int] = None) -> "TranscriptSearchIndex":
+        from crud.crud import transcript_crud
+
+        index = cls()
+        rows = (
+            transcript_crud.get_by_channel(db, channel_id)
+            if channel_id is not None
+            else transcript_crud.get_multi_by(db)
+        )
+        for row in rows:
+            index.add(row.video_id, CompactTranscript.from_row(row))
+        return index
+
+
+def hits_to_clips(
+    hits: List[SearchHit],
+    query: str,
+    pad: float = SEARCH_PAD_SECONDS,
+) -> Dict[int, Clips]:
+    """
+    Clips per video for ``generate_clips``.
+
+    Each hit is padded by ``pad`` seconds; hits whose padded windows overlap
+    become one clip spanning every segment between them.
+    """
+    by_video: Dict[int, List[SearchHit]] = defaultdict(list)
+    for hit in hits:
+        by_video[hit.video_id].append(hit)
+
+    result = {}
+    for video_id, video_hits in by_video.items():
+        video_hits.sort(key=lambda h: h.start)
+        groups: List[List[SearchHit]] = []
+        for hit in video_hits:
+            if groups and hit.start - pad < max(h.end for h in groups[-1]) + pad:
+                groups[-1].append(hit)
+            else:
+                groups.append([hit])
+
+        clips = []
+        for group in groups:
+            start = max(0.0, min(h.start for h in group) - pad)
+            end = max(h.end for h in group) + pad
+            ids = [h.segment_id for h in group]
+            clips.append(Clip(
+                start_time=start,
+                end_time=end,
+                segment_ids=list(range(min(ids), max(ids) + 1)),
+                reason=f'Transcript match for "{query}"',
+                # generate_clips names files by title; keep them unique across videos
+                title=f"{query} v{video_id} {start:.0f}s",
+            ))
+        result[video_id] = Clips(clips=clips)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Search stored transcripts")
+    parser.add_argument("query")
+    parser.add_argument("--channel", help="Channel handle to search (default: all)")
+    parser.add_argument("--start", type=float, default=0.0, help="Only hits after this second")
+    parser.add_argument("--end", type=float, default=float("inf"), help="Only hits before this second")
+    parser.add_argument("--phrase", action="store_true", help="Terms must appear in order")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--cut", action="store_true", help="Download the matched videos and cut the hits")
+    args = parser.parse_args()
+
+    from crud.crud import channel_crud, video_crud
+    from database import get_sessionmaker
+
+    with get_sessionmaker()() as db:
+        channel_id = None
+        if args.channel:
+            channel = channel_crud.get_by_handle(db, args.channel)
+            if channel is None:
+                print(f"Channel not found: {args.channel}")
+                return
+            channel_id = channel.id
+
+        started = time.perf_counter()
+        index = TranscriptSearchIndex.from_db(db, channel_id)
+        print(f"Indexed {len(index)} segments in {time.perf_counter() - started:.2f}s")
+
+        started = time.perf_counter()
+        hits = index.search(args.query, args.start, args.end, phrase=args.phrase, limit=args.limit)
+        print(f"{len(hits)} hits in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+        urls = {}
+        for hit in hits:
+            if hit.video_id not in urls:
+                urls[hit.video_id] = video_crud.get(db, hit.video_id).url
+            print(f"{urls[hit.video_id]}  [{hit.start:.1f}-{hit.end:.1f}]{hit.text}")
+
+    if args.cut:
+        from clip_editor import generate_clips
+        from download import download_manager
+
+        for video_id, clips in hits_to_clips(hits, args.query).items():
+            generate_clips(download_manager.video(urls[video_id]), clips)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import os
+import zlib
+from functools import cached_property
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+TRANSCRIPT_ZSTD_LEVEL = int(os.getenv("TRANSCRIPT_ZSTD_LEVEL", 9))
+
+
+def _compress(data: bytes) -> Tuple[str, bytes]:
+    """(codec, blob); zstd when zstandard is installed, zlib otherwise."""
+    try:
+        import zstandard
+    except ImportError:
+        return "zlib", zlib.compress(data, 9)
+    return "zstd", zstandard.ZstdCompressor(level=TRANSCRIPT_ZSTD_LEVEL).compress(data)
+
+
+def _decompress(codec: str, blob: bytes) -> bytes:
+    if codec == "zstd":
+        import zstandard
+
+        return zstandard.ZstdDecompressor().decompress(blob)
+    if codec == "zlib":
+        return zlib.decompress(blob)
+    raise ValueError(f"unknown transcript codec {codec!r}")
+
+
+def pack_transcript(transcript: Dict) -> Dict:
+    """
+    Columnar form of a whisper-schema transcript, as Transcript column values.
+
+    Segment times become float32 arrays and speakers int16 ids into
+    ``speakers`` (-1 for none). The segment texts are concatenated into one
+    compressed blob and ``text_offsets`` holds the n+1 byte offsets into it.
+    Word timings are not kept.
+    """
+    segments = sorted(transcript.get("segments") or [], key=lambda s: s["start"])
+    speakers: List[str] = []
+    speaker_ids = []
+    for seg in segments:
+        speaker = seg.get("speaker")
+        if speaker is None:
+            speaker_ids.append(-1)
+            continue
+        if speaker not in speakers:
+            speakers.append(speaker)
+        speaker_ids.append(speakers.index(speaker))
+
+    texts = [seg["text"].encode("utf-8") for seg in segments]
+    offsets = np.zeros(len(texts) + 1, dtype=np.uint32)
+    np.cumsum([len(t) for t in texts], out=offsets[1:])
+    codec, text = _compress(b"".join(texts))
+    ends = np.array([seg["end"] for seg in segments], dtype=np.float32)
+
+    return {
+        "language": transcript.get("language"),
+        "segment_count": len(segments),
+        "duration": float(ends.max()) if len(ends) else 0.0,
+        "starts": np.array([seg["start"] for seg in segments], dtype=np.float32).tobytes(),
+        "ends": ends.tobytes(),
+        "speaker_ids": np.array(speaker_ids, dtype=np.int16).tobytes(),
+        "speakers": speakers,
+        "text_offsets": offsets.tobytes(),
+        "text": text,
+        "codec": codec,
+    }
+
+
+class CompactTranscript:
+    """
+    Read side of a packed transcript.
+
+    Times are numpy views over the stored bytes; the text blob is
+    decompressed once, on the first access that needs it.
+    """
+
+    def __init__(
+        self,
+        starts: bytes,
+        ends: bytes,
+        speaker_ids: bytes,
+        speakers: List[str],
+        text_offsets: bytes,
+        text: bytes,
+        codec: str,
+        language: Optional[str] = None,
+    ):
+        self.starts = np.frombuffer(starts, dtype=np.float32)
+        self.ends = np.frombuffer(ends, dtype=np.float32)
+        self.speaker_ids = np.frombuffer(speaker_ids, dtype=np.int16)
+        self.speakers = list(speakers or [])
+        self.text_offsets = np.frombuffer(text_offsets, dtype=np.uint32)
+        self._blob = text
+        self.codec = codec
+        self.language = language
+        # segments are sorted by start, so a running max of the ends is sorted too
+        self._max_ends = np.maximum.accumulate(self.ends) if len(self.ends) else self.ends
+
+    @classmethod
+    def from_row(cls, row) -> "CompactTranscript":
+        return cls(
+            row.starts,
+            row.ends,
+            row.speaker_ids,
+            row.speakers,
+            row.text_offsets,
+            row.text,
+            row.codec,
+            row.language,
+        )
+
+    @classmethod
+    def from_transcript(cls, transcript: Dict) -> "CompactTranscript":
+        packed = pack_transcript(transcript)
+        return cls(**{k: v for k, v in packed.items() if k not in ("segment_count", "duration")})
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @cached_property
+    def _text(self) -> bytes:
+        return _decompress(self.codec, self._blob)
+
+    def indices(self, start: float = 0.0, end: float = float("inf")) -> np.ndarray:
+        """Indices of the segments overlapping [start, end), by binary search."""
+        lo = int(np.searchsorted(self._max_ends, start, side="right"))
+        hi = int(np.searchsorted(self.starts, end, side="left"))
+        idx = np.arange(lo, max(lo, hi))
+        return idx[self.ends[idx] > start]
+
+    def text(self, i: int) -> str:
+        return self._text[self.text_offsets[i]:self.text_offsets[i + 1]].decode("utf-8")
+
+    def segment(self, i: int) -> Dict:
+        speaker_id = int(self.speaker_ids[i])
+        seg = {
+            "id": int(i),
+            "start": float(self.starts[i]),
+            "end": float(self.ends[i]),
+            "text": self.text(i),
+        }
+        if speaker_id >= 0:
+            seg["speaker"] = self.speakers[speaker_id]
+        return seg
+
+    def segments(self, start: float = 0.0, end: float = float("inf")) -> List[Dict]:
+        return [self.segment(i) for i in self.indices(start, end)]
+
+    def text_between(self, start: float, end: float) -> str:
+        return "".join(seg["text"] for seg in self.segments(start, end))
+
+    def to_transcript(self) -> Dict:
+        """The whisper result schema (without word timings)."""
+        segments = self.segments()
+        return {
+            "text": "".join(seg["text"] for seg in segments),
+            "segments": segments,
+            "language": self.language,
+        }
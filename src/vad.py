@@ -0,0 +1,157 @@
+import os
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+Region = Tuple[float, float]
+
+VAD_ENABLED = os.getenv("VAD_ENABLED", "1").lower() in ("1", "true", "yes")
+
+FRAME_SECONDS = 0.03
+MARGIN_DB = 10.0            # frame must be this far above the noise floor
+MIN_LEVEL_DB = -50.0        # ...and above this absolute level
+MIN_SPEECH_BAND_RATIO = 0.5 # share of energy in the 300-3400 Hz speech band
+MIN_SPEECH_SECONDS = 0.25   # shorter bursts are dropped
+MIN_SILENCE_SECONDS = 0.6   # shorter pauses are bridged
+PAD_SECONDS = 0.2           # context kept around every region
+GAP_SECONDS = 0.3           # silence inserted between regions in the gated audio
+_CHUNK_FRAMES = 8192        # bounds FFT memory for long recordings
+
+
+def _frame_features(audio: np.ndarray, sr: int, frame_seconds: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-frame energy (dB) and fraction of energy inside the speech band."""
+    frame_len = int(sr * frame_seconds)
+    n_frames = len(audio) // frame_len
+    frames = audio[: n_frames * frame_len].reshape(n_frames, frame_len)
+
+    freqs = np.fft.rfftfreq(frame_len, d=1.0 / sr)
+    band = (freqs >= 300) & (freqs <= 3400)
+    window = np.hanning(frame_len).astype(np.float32)
+
+    energy_db = np.empty(n_frames)
+    band_ratio = np.empty(n_frames)
+    for lo in range(0, n_frames, _CHUNK_FRAMES):
+        chunk = frames[lo:lo + _CHUNK_FRAMES]
+        rms = np.sqrt(np.mean(chunk * chunk, axis=1))
+        energy_db[lo:lo + len(chunk)] = 20.0 * np.log10(np.maximum(rms, 1e-6))
+
+        power = np.abs(np.fft.rfft(chunk * window, axis=1)) ** 2
+        total = power.sum(axis=1)
+        band_ratio[lo:lo + len(chunk)] = power[:, band].sum(axis=1) / np.maximum(total, 1e-12)
+
+    return energy_db, band_ratio
+
+
+def _mask_to_regions(mask: np.ndarray, frame_seconds: float) -> List[Region]:
+    padded = np.concatenate([[False], mask, [False]])
+    edges = np.flatnonzero(np.diff(padded.astype(np.int8)))
+    return [(s * frame_seconds, e * frame_seconds) for s, e in zip(edges[::2], edges[1::2])]
+
+
+def detect_speech_regions(
+    audio: np.ndarray,
+    sr: int = 16000,
+    frame_seconds: float = FRAME_SECONDS,
+) -> List[Region]:
+    """
+    Energy + speech-band voice activity detection.
+
+    Returns sorted, non-overlapping (start, end) regions in seconds with
+    short pauses bridged, short bursts dropped and a little padding added.
+    """
+    if len(audio) < int(sr * frame_seconds):
+        return []
+
+    energy_db, band_ratio = _frame_features(audio, sr, frame_seconds)
+    noise_floor = np.percentile(energy_db, 10)
+    threshold = max(noise_floor + MARGIN_DB, MIN_LEVEL_DB)
+    speech = (energy_db > threshold) & (band_ratio > MIN_SPEECH_BAND_RATIO)
+
+    duration = len(audio) / sr
+    merged: List[List[float]] = []
+    for start, end in _mask_to_regions(speech, frame_seconds):
+        if merged and start - merged[-1][1] < MIN_SILENCE_SECONDS:
+            merged[-1][1] = end
+        else:
+            merged.append([start, end])
+
+    regions: List[Region] = []
+    for start, end in merged:
+        if end - start < MIN_SPEECH_SECONDS:
+            continue
+        start, end = max(0.0, start - PAD_SECONDS), min(duration, end + PAD_SECONDS)
+        if regions and start <= regions[-1][1]:
+            regions[-1] = (regions[-1][0], end)
+        else:
+            regions.append((start, end))
+    return regions
+
+
+def gate_audio(
+    audio: np.ndarray,
+    regions: List[Region],
+    sr: int = 16000,
+    gap_seconds: float = GAP_SECONDS,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Concatenate the speech regions, separated by short silences.
+
+    Returns the gated audio and the start time of every region inside it,
+    which ``remap_transcript`` needs to map timestamps back.
+    """
+    gap = np.zeros(int(sr * gap_seconds), dtype=audio.dtype)
+    pieces = []
+    gated_starts = []
+    position = 0
+    for start, end in regions:
+        piece = audio[int(start * sr):int(end * sr)]
+        gated_starts.append(position / sr)
+        pieces.extend([piece, gap])
+        position += len(piece) + len(gap)
+
+    if not pieces:
+        return np.zeros(0, dtype=audio.dtype), np.zeros(0)
+    return np.concatenate(pieces), np.asarray(gated_starts)
+
+
+def to_original_time(
+    times: np.ndarray,
+    regions: List[Region],
+    gated_starts: np.ndarray,
+) -> np.ndarray:
+    """Map timestamps on the gated timeline back onto the original audio."""
+    orig_starts = np.array([s for s, _ in regions])
+    lengths = np.array([e - s for s, e in regions])
+    idx = np.clip(np.searchsorted(gated_starts, times, side="right") - 1, 0, len(regions) - 1)
+    # times inside an inserted gap are clamped to the end of the region before it
+    offset = np.clip(times - gated_starts[idx], 0.0, lengths[idx])
+    return orig_starts[idx] + offset
+
+
+def remap_transcript(transcript: Dict, regions: List[Region], gated_starts: np.ndarray) -> Dict:
+    """Copy of a whisper-schema transcript with segment and word times on the original timeline."""
+    segments = [dict(s) for s in transcript["segments"]]
+    if not segments or not regions:
+        return {**transcript, "segments": segments}
+
+    bounds = to_original_time(
+        np.array([[s["start"], s["end"]] for s in segments], dtype=np.float64).ravel(),
+        regions,
+        gated_starts,
+    ).reshape(-1, 2)
+    for seg, (start, end) in zip(segments, bounds):
+        seg["start"], seg["end"] = float(start), float(end)
+
+    for seg in segments:
+        if seg.get("words"):
+            words = [dict(w) for w in seg["words"]]
+            times = to_original_time(
+                np.array([[w["start"], w["end"]] for w in words], dtype=np.float64).ravel(),
+                regions,
+                gated_starts,
+            ).reshape(-1, 2)
+            for word, (start, end) in zip(words, times):
+                word["start"], word["end"] = float(start), float(end)
+            seg["words"] = words
+
+    return {**transcript, "segments": segments}
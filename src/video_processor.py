@@ -1,22 +1,105 @@
 import os
 import time
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from loguru import logger
 import sys
 
-from crud.crud import video_crud, channel_crud
-from process_video import run_pipeline_from_url   # your DI-driven pipeline
+from crud.crud import video_crud, channel_crud, stage_metric_crud, transcript_crud
+from database import get_sessionmaker
+from instrumentation import METRICS_PORT, metrics_registry, serve_metrics
+from profiling import PROFILE_MODES
+from llm_requests import INTEREST_PROFILES
+from transcribers import TRANSCRIPTION_BACKENDS
+from speaker_identity import identify_speakers
 
 from datetime import datetime
 
+BACKFILL_WORKERS = int(os.getenv("BACKFILL_WORKERS", 4))
+# concurrent videos feed one batched Whisper model
+BACKFILL_BACKEND = os.getenv("BACKFILL_BACKEND", "whisper-shared-batch")
+
 
 # -----------------------------
 # Pipeline Runner (DI)
 # -----------------------------
 class PipelineRunner:
+    def __init__(
+        self,
+        profile: str = None,
+        dedupe: bool = True,
+        interests: list = None,
+        backend: str = None,
+        model_size: str = "base",
+    ):
+        self.profile = profile
+        self.dedupe = dedupe
+        self.interests = interests
+        self.backend = backend
+        self.model_size = model_size
+
+    def preload(self):
+        """Load the models once, before parallel videos race to load their own copies."""
+        from model_server import MODEL_SERVER_URL
+
+        if MODEL_SERVER_URL:
+            return   # the model server holds them
+        from audio import HF_AUTH_TOKEN, _device, _diarization_pipeline
+        from transcribers import TRANSCRIPTION_BACKEND, get_backend
+
+        get_backend(self.backend or TRANSCRIPTION_BACKEND).load(self.model_size)
+        if HF_AUTH_TOKEN:
+            _diarization_pipeline(_device())
+
     def run(self, url: str):
-        return run_pipeline_from_url(url)
+        # the pipeline pulls in the ML stack; import it only when a video is processed
+        from process_video import run_pipeline_from_url
+        from fingerprint import FingerprintDeduplicator
+
+        deduplicator = FingerprintDeduplicator(get_sessionmaker()) if self.dedupe else None
+        options = {"backend": self.backend} if self.backend else {}
+        return run_pipeline_from_url(
+            url,
+            self.model_size,
+            profile=self.profile,
+            deduplicator=deduplicator,
+            interests=self.interests,
+            **options,
+        )
+
+
+def _format_seconds(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m" if hours else f"{minutes}m{seconds:02d}s"
+
+
+class BackfillProgress:
+    """Finished/failed counts of a backfill and an ETA from the throughput so far."""
+
+    def __init__(self, total: int, clock=time.monotonic):
+        self.total = total
+        self.done = 0
+        self.failed = 0
+        self._clock = clock
+        self._started = clock()
+
+    def update(self, ok: bool) -> str:
+        self.done += 1
+        self.failed += 0 if ok else 1
+        return str(self)
+
+    def eta_seconds(self) -> float | None:
+        if not self.done:
+            return None
+        return (self._clock() - self._started) / self.done * (self.total - self.done)
+
+    def __str__(self) -> str:
+        eta = self.eta_seconds()
+        return (
+            f"[{self.done}/{self.total}] {self.failed} failed, "
+            f"{_format_seconds(self._clock() - self._started)} elapsed, "
+            f"ETA {_format_seconds(eta) if eta is not None else '?'}"
+        )
 
 
 # -----------------------------
@@ -40,28 +123,90 @@ class VideoProcessingService:
 
         print(f"Processing video: {video.title}")
 
-        self.pipeline_runner.run(video.url)
-
-        video_crud.mark_processed(db, video.id)
+        result = self.pipeline_runner.run(video.url)
+        self._record(db, video.id, result)
 
         print(f"Finished video: {video.title}")
         return video
 
+    def _record(self, db, video_id: int, result) -> None:
+        if result and result.get("transcript"):
+            transcript = result["transcript"]
+            if result.get("speaker_embeddings") is not None and result.get("speaker_labels"):
+                transcript = self._name_speakers(db, video_id, transcript, result)
+            transcript_crud.save(db, video_id, transcript)
+        if result and result.get("metrics"):
+            stage_metric_crud.record(db, video_id, result["metrics"])
+        video_crud.mark_processed(db, video_id)
+
+    def _name_speakers(self, db, video_id: int, transcript: dict, result) -> dict:
+        """Replace diarization labels with the names of known (or LLM-identified) voices."""
+        channel_id = video_crud.get(db, video_id).channel_id
+        names = identify_speakers(
+            db, channel_id, result["speaker_labels"], result["speaker_embeddings"], transcript
+        )
+        if names:
+            print(f"Identified speakers: {names}")
+        segments = [
+            {**seg, "speaker": names.get(seg["speaker"], seg["speaker"])} if seg.get("speaker") else seg
+            for seg in transcript["segments"]
+        ]
+        return {**transcript, "segments": segments}
+
+    def _process_video(self, session_factory, video_id: int, url: str) -> None:
+        result = self.pipeline_runner.run(url)
+        # sessions are not shared across threads
+        with session_factory() as db:
+            self._record(db, video_id, result)
+
+    def backfill(
+        self,
+        session_factory,
+        channel_handle: str,
+        top: int = None,
+        workers: int = BACKFILL_WORKERS,
+    ) -> BackfillProgress | None:
+        """
+        Process a channel's back catalogue (or its ``top`` most viewed videos) as one batch.
+
+        Videos run on ``workers`` threads sharing the loaded models, most viewed
+        first. Processed videos are skipped, so an interrupted backfill resumes
+        where it stopped; failed videos stay unprocessed and are retried then.
+        """
+        with session_factory() as db:
+            channel = channel_crud.get_by_handle(db, channel_handle)
+            if not channel:
+                print(f"Channel not found: {channel_handle}")
+                return None
+            videos = sorted(video_crud.get_by_channel(db, channel.id), key=lambda v: v.views, reverse=True)
+            if top is not None:
+                videos = videos[:top]
+            pending = [(v.id, v.url, v.title) for v in videos if v.processed_at is None]
+
+        print(
+            f"Backfilling {len(pending)} videos of {channel_handle} "
+            f"({len(videos) - len(pending)} already processed) on {workers} workers"
+        )
+        progress = BackfillProgress(len(pending))
+        if not pending:
+            return progress
+
+        self.pipeline_runner.preload()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(self._process_video, session_factory, video_id, url): title
+                for video_id, url, title in pending
+            }
+            for future in as_completed(futures):
+                error = future.exception()
+                if error is not None:
+                    print(f"[ERROR] Failed video {futures[future]}: {error!r}")
+                print(f"{progress.update(error is None)} {futures[future]}")
+        return progress
+
 # -----------------------------
 # Scheduler Loop
 # -----------------------------
-DATABASE_URL = os.getenv("DATABASE_URL")
-if not DATABASE_URL:
-    raise RuntimeError("DATABASE_URL is not set in the environment")
-
-engine = create_engine(DATABASE_URL, future=True)
-SessionLocal = sessionmaker(
-    autocommit=False,
-    autoflush=False,
-    bind=engine,
-    future=True,
-)
-
 PROCESS_INTERVAL_HOURS = float(os.getenv("PROCESS_INTERVAL_HOURS", 6))
 
 # Configure loguru
@@ -88,10 +233,64 @@ def main():
         action="store_true",
         help="Run forever every X hours"
     )
+    parser.add_argument(
+        "--backfill",
+        action="store_true",
+        help="Process the channel's unprocessed back catalogue as one parallel batch, then exit"
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=None,
+        help="With --backfill, only the N most viewed videos of the channel"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=BACKFILL_WORKERS,
+        help="With --backfill, videos processed at once"
+    )
+    parser.add_argument(
+        "--backend",
+        default=None,
+        choices=sorted(TRANSCRIPTION_BACKENDS),
+        help=f"Transcription engine (default: {BACKFILL_BACKEND} with --backfill, else TRANSCRIPTION_BACKEND)"
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=METRICS_PORT,
+        help="Serve Prometheus metrics on this port while looping or backfilling (0 disables)"
+    )
+    parser.add_argument(
+        "--profile",
+        default=None,
+        choices=PROFILE_MODES,
+        help="Profile every pipeline stage and write captures to profiles/<video id>/"
+    )
+    parser.add_argument(
+        "--no-dedupe",
+        action="store_true",
+        help="Transcribe everything, even audio already transcribed for another video"
+    )
+    parser.add_argument(
+        "--interest",
+        action="append",
+        choices=sorted(INTEREST_PROFILES),
+        help="Interest profile to cut clips for; repeat for several (default: highlights)"
+    )
     args = parser.parse_args()
 
-    runner = PipelineRunner()
+    backend = args.backend or (BACKFILL_BACKEND if args.backfill else None)
+    runner = PipelineRunner(args.profile, dedupe=not args.no_dedupe, interests=args.interest, backend=backend)
     service = VideoProcessingService(runner)
+    SessionLocal = get_sessionmaker()
+
+    if args.backfill:
+        if args.metrics_port:
+            serve_metrics(metrics_registry, args.metrics_port)
+        service.backfill(SessionLocal, args.channel, top=args.top, workers=args.workers)
+        return
 
     if not args.loop:
         # one-shot processing
@@ -100,6 +299,9 @@ def main():
         return
 
     # scheduled loop
+    if args.metrics_port:
+        serve_metrics(metrics_registry, args.metrics_port)
+
     while True:
         with SessionLocal() as db:
             service.process_next_for_channel(db, args.channel)
@@ -1,4 +1,3 @@
-from googleapiclient.discovery import build
 from datetime import datetime, timedelta, timezone
 from dateutil.relativedelta import relativedelta
 from dotenv import load_dotenv
@@ -8,31 +7,13 @@ import argparse
 import time
 import sys
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-
 # Adjust these imports to match your package/module layout
-from models.analytics import Base, Channel, Video
+from models.analytics import Channel, Video
 from crud.crud import channel_crud, video_crud
+from database import get_sessionmaker, init_db
 
 load_dotenv()
 
-# --- Database setup ---
-DATABASE_URL = os.getenv("DATABASE_URL")
-if not DATABASE_URL:
-    raise RuntimeError("DATABASE_URL is not set in the environment")
-
-engine = create_engine(DATABASE_URL, future=True)
-SessionLocal = sessionmaker(
-    autocommit=False,
-    autoflush=False,
-    bind=engine,
-    future=True,
-)
-
-# For dev: create tables if they don't exist. In prod you'd use migrations.
-Base.metadata.create_all(bind=engine)
-
 # Configure loguru
 logger.remove()
 logger.add(
@@ -206,6 +187,9 @@ def update_database(db, channel_handle: str, rows: list[dict]):
 
 
 def pull_analytics(args):
+    # the Google API client is slow to import; only pay for it when pulling
+    from googleapiclient.discovery import build
+
     try:
         youtube = build("youtube", "v3", developerKey=args.google_api_key)
     except Exception as e:
@@ -213,7 +197,7 @@ def pull_analytics(args):
         return
 
     # one DB session per pull cycle
-    with SessionLocal() as db:
+    with get_sessionmaker()() as db:
         for channel in args.channels:
             try:
                 logger.info(f"Processing channel: {channel}")
@@ -311,6 +295,9 @@ def main():
         logger.critical("Missing Google API key. Please set GOOGLE_API_KEY in your environment or .env file.")
         sys.exit(1)
 
+    # database setup is deferred to here so importing this module stays side-effect free
+    init_db()
+
     while True:
         try:
             pull_analytics(args)
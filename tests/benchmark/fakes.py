@@ -0,0 +1,51 @@
+import copy
+import os
+import shutil
+from typing import Dict, List
+
+from storage import audio_scratch_dir
+
+
+class FakeTranscriber:
+    """Returns the fixture's script instantly, so benchmarks measure everything around the model."""
+
+    def __init__(self, transcript: Dict):
+        self.transcript = transcript
+
+    def transcribe(self, audio_path: str, model_size: str) -> Dict:
+        return copy.deepcopy(self.transcript)
+
+
+class CopyAudioExtractor:
+    """ffmpeg-free extractor for WAV fixtures: copies the file into the audio directory."""
+
+    def extract(self, video_path: str) -> str:
+        with audio_scratch_dir(os.path.getsize(video_path)) as output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+            base = os.path.splitext(os.path.basename(video_path))[0]
+            audio_path = os.path.join(output_dir, f"{base}.wav")
+            shutil.copyfile(video_path, audio_path)
+        return audio_path
+
+
+class SliceClipGenerator:
+    """ffmpeg-free clip generator: writes the byte range proportional to each clip's time span."""
+
+    def __init__(self, duration: float, output_dir: str = "clips"):
+        self.duration = duration
+        self.output_dir = output_dir
+
+    def generate(self, video_path: str, segments) -> List[str]:
+        os.makedirs(self.output_dir, exist_ok=True)
+        size = os.path.getsize(video_path)
+        paths = []
+        with open(video_path, "rb") as src:
+            for idx, clip in enumerate(segments.clips):
+                lo = int(size * clip.start_time / self.duration)
+                hi = int(size * clip.end_time / self.duration)
+                src.seek(lo)
+                path = os.path.join(self.output_dir, f"clip_{idx}.bin")
+                with open(path, "wb") as dst:
+                    dst.write(src.read(max(hi - lo, 0)))
+                paths.append(path)
+        return paths
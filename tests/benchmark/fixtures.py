@@ -0,0 +1,127 @@
+import json
+import os
+import shutil
+import subprocess
+import wave
+from typing import Dict, List
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+SEGMENT_SECONDS = 6.0     # one transcript segment per synthetic utterance
+PAUSE_SECONDS = 1.5       # silence between utterances
+MUSIC_EVERY = 10          # every Nth slot is a music bed instead of speech
+
+_WORDS = (
+    "so the wild part is nobody expected that to work and then it did "
+    "honestly I was shocked we tried it again and it broke in a new way"
+).split()
+
+
+def has_ffmpeg() -> bool:
+    return shutil.which("ffmpeg") is not None
+
+
+def _utterance(seconds: float, rng: np.random.Generator) -> np.ndarray:
+    """Voiced harmonics in the speech band, amplitude-modulated at a syllable rate."""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    f0 = rng.uniform(110, 220) * (1 + 0.05 * np.sin(2 * np.pi * 0.7 * t))
+    phase = 2 * np.pi * np.cumsum(f0) / SAMPLE_RATE
+    voice = sum(np.sin(k * phase) / k for k in range(2, 12))
+    syllables = 0.5 * (1 + np.sin(2 * np.pi * rng.uniform(3, 5) * t)) ** 2
+    loudness = rng.uniform(0.1, 0.3)
+    return (loudness * voice * syllables / 3).astype(np.float32)
+
+
+def _music(seconds: float) -> np.ndarray:
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    chord = sum(np.sin(2 * np.pi * f * t) for f in (55.0, 82.4, 110.0))
+    return (0.05 * chord).astype(np.float32)
+
+
+def synthesize(seconds: float, seed: int = 0) -> Dict:
+    """Speech-like audio of the given length plus the script a perfect transcriber would return."""
+    rng = np.random.default_rng(seed)
+    pieces: List[np.ndarray] = []
+    segments = []
+    position = 0.0
+    slot = 0
+    while position + SEGMENT_SECONDS <= seconds:
+        if slot % MUSIC_EVERY == MUSIC_EVERY - 1:
+            pieces.append(_music(SEGMENT_SECONDS))
+        else:
+            pieces.append(_utterance(SEGMENT_SECONDS, rng))
+            words = rng.choice(_WORDS, size=int(rng.integers(8, 16)))
+            segments.append({
+                "id": len(segments),
+                "start": position,
+                "end": position + SEGMENT_SECONDS,
+                "text": " " + " ".join(words),
+            })
+        pieces.append(np.zeros(int(PAUSE_SECONDS * SAMPLE_RATE), dtype=np.float32))
+        position += SEGMENT_SECONDS + PAUSE_SECONDS
+        slot += 1
+
+    tail = int(seconds * SAMPLE_RATE) - sum(len(p) for p in pieces)
+    pieces.append(np.zeros(max(tail, 0), dtype=np.float32))
+    audio = np.concatenate(pieces)
+    audio += rng.normal(0, 0.002, len(audio)).astype(np.float32)
+    return {
+        "audio": audio,
+        "transcript": {
+            "text": "".join(s["text"] for s in segments),
+            "segments": segments,
+            "language": "en",
+        },
+    }
+
+
+def write_wav(path: str, audio: np.ndarray, sr: int = SAMPLE_RATE) -> None:
+    pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype("<i2")
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sr)
+        wf.writeframes(pcm.tobytes())
+
+
+def build_fixture(directory: str, seconds: float, seed: int = 0) -> Dict:
+    """
+    Write ``talk_<seconds>s.{wav,mp4}`` and its script into ``directory``.
+
+    With ffmpeg a low-resolution test-pattern video is muxed with the audio;
+    without it the WAV itself stands in for the video and the fake stages
+    in ``fakes`` skip the ffmpeg steps.
+    """
+    os.makedirs(directory, exist_ok=True)
+    name = f"talk_{int(seconds)}s"
+    data = synthesize(seconds, seed)
+
+    wav_path = os.path.join(directory, f"{name}.wav")
+    write_wav(wav_path, data["audio"])
+    script_path = os.path.join(directory, f"{name}.json")
+    with open(script_path, "w", encoding="utf-8") as fh:
+        json.dump(data["transcript"], fh)
+
+    media_path = wav_path
+    if has_ffmpeg():
+        media_path = os.path.join(directory, f"{name}.mp4")
+        subprocess.run(
+            [
+                "ffmpeg", "-y", "-loglevel", "error",
+                "-f", "lavfi", "-i", f"testsrc=size=320x180:rate=15:duration={seconds}",
+                "-i", wav_path,
+                "-c:v", "libx264", "-preset", "ultrafast", "-g", "30",
+                "-c:a", "aac", "-shortest",
+                media_path,
+            ],
+            check=True,
+        )
+
+    return {
+        "name": name,
+        "seconds": seconds,
+        "media": media_path,
+        "script": script_path,
+        "transcript": data["transcript"],
+    }
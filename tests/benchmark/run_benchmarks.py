@@ -0,0 +1,175 @@
+"""
+End-to-end VideoPipeline benchmark on synthetic fixtures, fully offline.
+
+Real stages: yt-dlp download (from a local HTTP server), audio extraction and
+clip cutting (when ffmpeg is installed), pre-scoring and analyze_impact
+(against a stub OpenAI endpoint). Transcription is faked with the fixture's
+script. Per-stage wall times are compared against ``baseline.json``.
+
+    PYTHONPATH=src python tests/benchmark/run_benchmarks.py
+    PYTHONPATH=src python tests/benchmark/run_benchmarks.py --update-baseline
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+from contextlib import contextmanager
+from typing import Dict, List
+
+from fakes import CopyAudioExtractor, FakeTranscriber, SliceClipGenerator
+from fixtures import build_fixture, has_ffmpeg
+from stubs import llm_server, media_server
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_LENGTHS = (60, 600, 1800)
+TOLERANCE = 0.25        # allowed slowdown relative to the baseline
+MIN_DELTA_SECONDS = 0.1  # ignore differences below run-to-run noise
+
+
+@contextmanager
+def _workspace():
+    """Run in a fresh directory so every repeat downloads and extracts from scratch."""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tempdir:
+        os.chdir(tempdir)
+        try:
+            yield tempdir
+        finally:
+            os.chdir(cwd)
+
+
+def _pipeline(fixture: Dict, video_mode: str):
+    from process_video import (
+        VideoPipeline,
+        DefaultDownloader,
+        DefaultAudioExtractor,
+        DefaultAnalyzer,
+        DefaultClipGenerator,
+        DefaultSegmentScorer,
+    )
+
+    ffmpeg = has_ffmpeg()
+    return VideoPipeline(
+        downloader=DefaultDownloader(),
+        audio_extractor=DefaultAudioExtractor() if ffmpeg else CopyAudioExtractor(),
+        transcriber=FakeTranscriber(fixture["transcript"]),
+        analyzer=DefaultAnalyzer(use_cache=False),
+        clip_generator=DefaultClipGenerator() if ffmpeg else SliceClipGenerator(fixture["seconds"]),
+        segment_scorer=DefaultSegmentScorer(),
+        video_mode=video_mode,
+    )
+
+
+def run_fixture(fixture: Dict, media_url: str, video_mode: str, repeat: int) -> Dict[str, Dict]:
+    """Median wall time, MB/s and x-realtime per stage over ``repeat`` runs."""
+    url = f"{media_url}/{os.path.basename(fixture['media'])}"
+    runs: List[Dict[str, Dict]] = []
+    for _ in range(repeat):
+        with _workspace():
+            result = _pipeline(fixture, video_mode).run(url)
+        stages: Dict[str, Dict] = {}
+        for m in result["metrics"]:
+            s = stages.setdefault(m["stage"], {"wall_seconds": 0.0, "bytes": 0})
+            s["wall_seconds"] += m["wall_seconds"]
+            s["bytes"] += m["bytes_processed"]
+        runs.append(stages)
+
+    report = {}
+    for stage in runs[0]:
+        wall = statistics.median(r[stage]["wall_seconds"] for r in runs if stage in r)
+        nbytes = runs[0][stage]["bytes"]
+        report[stage] = {
+            "wall_seconds": round(wall, 4),
+            "mb_per_s": round(nbytes / 2**20 / wall, 2) if wall else None,
+            "x_realtime": round(fixture["seconds"] / wall, 1) if wall else None,
+        }
+    return report
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float = TOLERANCE) -> List[str]:
+    """Human-readable regressions of ``results`` against ``baseline`` (same nesting)."""
+    regressions = []
+    for fixture, stages in results.items():
+        for stage, current in stages.items():
+            base = baseline.get(fixture, {}).get(stage)
+            if base is None:
+                continue
+            now, before = current["wall_seconds"], base["wall_seconds"]
+            if now > before * (1 + tolerance) and now - before > MIN_DELTA_SECONDS:
+                regressions.append(
+                    f"{fixture}/{stage}: {now:.3f}s vs baseline {before:.3f}s "
+                    f"(+{(now / before - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+def _print_report(results: Dict) -> None:
+    print(f"{'fixture':<14} {'stage':<18} {'wall s':>9} {'MB/s':>9} {'x realtime':>11}")
+    for fixture, stages in results.items():
+        for stage, r in stages.items():
+            print(
+                f"{fixture:<14} {stage:<18} {r['wall_seconds']:>9.3f} "
+                f"{r['mb_per_s'] if r['mb_per_s'] is not None else '-':>9} "
+                f"{r['x_realtime'] if r['x_realtime'] is not None else '-':>11}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline end-to-end pipeline benchmark")
+    parser.add_argument("--lengths", type=float, nargs="+", default=DEFAULT_LENGTHS,
+                        help="Fixture durations in seconds")
+    parser.add_argument("--video-mode", default="parallel")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Store these results as the new baseline")
+    args = parser.parse_args()
+
+    # baselines are only comparable between runs that exercise the same stages
+    profile = f"{'ffmpeg' if has_ffmpeg() else 'wav'}/{args.video_mode}"
+
+    with tempfile.TemporaryDirectory() as fixture_dir, \
+            media_server(fixture_dir) as media, llm_server() as llm:
+        os.environ["OPENAI_BASE_URL"] = f"{llm.url}/v1"
+        os.environ["OPENAI_API_KEY"] = "benchmark"
+        fixtures = [build_fixture(fixture_dir, seconds) for seconds in args.lengths]
+
+        # imports, HTTP connections and first-call setup stay out of the numbers
+        run_fixture(fixtures[0], media.url, args.video_mode, repeat=1)
+
+        results = {}
+        for fixture in fixtures:
+            print(f"Benchmarking {fixture['name']}")
+            results[fixture["name"]] = run_fixture(fixture, media.url, args.video_mode, args.repeat)
+
+    _print_report(results)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as fh:
+            baseline = json.load(fh)
+
+    if args.update_baseline:
+        baseline[profile] = results
+        with open(args.baseline, "w", encoding="utf-8") as fh:
+            json.dump(baseline, fh, indent=2, sort_keys=True)
+        print(f"Baseline for {profile} written to {args.baseline}")
+        return
+
+    if profile not in baseline:
+        print(f"No baseline for {profile}; run with --update-baseline to record one")
+        return
+
+    regressions = compare(results, baseline[profile], args.tolerance)
+    for line in regressions:
+        print(f"[REGRESSION] {line}")
+    if regressions:
+        sys.exit(1)
+    print(f"No regressions against the {profile} baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import json
+import os
+import sys
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+CLIP_SEGMENTS = 3      # segments per clip the stub LLM returns
+CLIP_EVERY = 12        # one clip per this many segments
+
+
+class _Quiet:
+    def log_message(self, *args):
+        pass
+
+
+class _MediaHandler(_Quiet, SimpleHTTPRequestHandler):
+    """Serves fixture files as if they were remote videos."""
+
+
+def pick_clips(segments):
+    """Deterministic 'interesting' blocks: a few consecutive segments at a fixed stride."""
+    clips = []
+    for first in range(0, len(segments) - CLIP_SEGMENTS + 1, CLIP_EVERY):
+        block = segments[first:first + CLIP_SEGMENTS]
+        clips.append({
+            "start_time": block[0]["start"],
+            "end_time": block[-1]["end"],
+            "segment_ids": [s["id"] for s in block],
+            "reason": "benchmark",
+            "title": f"clip {first}",
+        })
+    return clips
+
+
+def _response(text: str) -> dict:
+    return {
+        "id": "resp_benchmark",
+        "object": "response",
+        "created_at": 0,
+        "model": "stub",
+        "status": "completed",
+        "parallel_tool_calls": False,
+        "tool_choice": "auto",
+        "tools": [],
+        "output": [{
+            "type": "message",
+            "id": "msg_benchmark",
+            "role": "assistant",
+            "status": "completed",
+            "content": [{"type": "output_text", "text": text, "annotations": []}],
+        }],
+    }
+
+
+class _LLMHandler(_Quiet, SimpleHTTPRequestHandler):
+    """Minimal OpenAI Responses API: answers every prompt with clips over the sent segments."""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        prompt = body["input"] if isinstance(body["input"], str) else json.dumps(body["input"])
+        _, _, segments_json = prompt.rpartition("Segments:")
+        try:
+            segments = json.loads(segments_json)
+        except json.JSONDecodeError:
+            segments = []
+
+        payload = json.dumps(_response(json.dumps(pick_clips(segments)))).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class _Server(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # yt-dlp probes files and hangs up mid-response
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class StubServer:
+    """Background HTTP server; use as a context manager."""
+
+    def __init__(self, handler):
+        self.server = _Server(("127.0.0.1", 0), handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def media_server(directory: str) -> StubServer:
+    """Stand-in for YouTube: fixture files downloadable over HTTP by yt-dlp."""
+    return StubServer(partial(_MediaHandler, directory=os.path.abspath(directory)))
+
+
+def llm_server() -> StubServer:
+    """Stand-in for the OpenAI API; point OPENAI_BASE_URL at ``<url>/v1``."""
+    return StubServer(_LLMHandler)
@@ -0,0 +1,128 @@
+import threading
+import time
+import unittest
+
+import numpy as np
+
+from batch_transcription import (
+    SAMPLE_RATE,
+    BatchTranscriptionService,
+    plan_windows,
+    segments_from_tokens,
+)
+
+
+def speech(seconds: float, pause: float = None) -> np.ndarray:
+    """A tone in the speech band followed by near-silence (VAD needs a noise floor)."""
+    pause = seconds / 2 if pause is None else pause
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    voiced = (0.3 * np.sin(2 * np.pi * 800 * t)).astype(np.float32)
+    quiet = np.random.default_rng(0).normal(0, 1e-4, int(pause * SAMPLE_RATE)).astype(np.float32)
+    return np.concatenate([voiced, quiet])
+
+
+class RecordingDecoder:
+    """Returns one segment per window spanning it and records every batch."""
+
+    def __init__(self, delay: float = 0.0):
+        self.batches = []
+        self.delay = delay
+        self.lock = threading.Lock()
+
+    def __call__(self, windows):
+        with self.lock:
+            self.batches.append([len(w) / SAMPLE_RATE for w in windows])
+        time.sleep(self.delay)
+        return [
+            [{"start": 0.0, "end": len(w) / SAMPLE_RATE, "text": f" {len(w) // SAMPLE_RATE}s", "language": "en"}]
+            for w in windows
+        ]
+
+
+class FakeTokenizer:
+    timestamp_begin = 1000
+
+    def decode(self, tokens):
+        return " " + " ".join(str(t) for t in tokens)
+
+
+class PlanWindowsTestCase(unittest.TestCase):
+    def test_long_silences_are_skipped_and_windows_stay_short(self):
+        audio = np.concatenate([speech(10, pause=20), speech(50)])
+        windows = plan_windows(audio)
+
+        self.assertTrue(all(end - start <= 30.0 for start, end in windows))
+        self.assertLess(sum(end - start for start, end in windows), 70)
+        self.assertGreater(windows[1][0], 25)
+
+    def test_silence_has_no_windows(self):
+        self.assertEqual(plan_windows(np.zeros(SAMPLE_RATE * 5, dtype=np.float32)), [])
+
+
+class BatchTranscriptionServiceTestCase(unittest.TestCase):
+    def test_windows_from_several_videos_share_a_batch(self):
+        decoder = RecordingDecoder()
+        service = BatchTranscriptionService(decoder, batch_size=4, max_latency=0.3)
+
+        first = service.submit(speech(20))
+        second = service.submit(speech(20))
+        a, b = first.result(5), second.result(5)
+
+        self.assertEqual(len(decoder.batches), 1)
+        self.assertEqual(len(decoder.batches[0]), 2)
+        self.assertEqual(a["language"], "en")
+        self.assertNotIn("language", a["segments"][0])
+        self.assertEqual(len(b["segments"]), 1)
+
+    def test_segments_are_mapped_back_to_video_time(self):
+        service = BatchTranscriptionService(RecordingDecoder(), batch_size=8, max_latency=0.05)
+        result = service.submit(np.concatenate([speech(5, pause=30), speech(5)])).result(5)
+
+        starts = [s["start"] for s in result["segments"]]
+        self.assertEqual([s["id"] for s in result["segments"]], [0, 1])
+        self.assertLess(starts[0], 1.0)
+        self.assertGreater(starts[1], 30.0)
+        self.assertEqual(result["language"], "en")
+        self.assertFalse(any("language" in s for s in result["segments"]))
+
+    def test_partial_batch_is_flushed_after_max_latency(self):
+        service = BatchTranscriptionService(RecordingDecoder(), batch_size=16, max_latency=0.1)
+        start = time.monotonic()
+        service.submit(speech(5)).result(5)
+        self.assertLess(time.monotonic() - start, 2.0)
+
+    def test_batches_round_robin_across_videos(self):
+        decoder = RecordingDecoder(delay=0.2)
+        service = BatchTranscriptionService(decoder, batch_size=2, max_latency=0.05)
+        long_video = service.submit(speech(150))   # five 30 s windows
+        time.sleep(0.05)
+        short_video = service.submit(speech(3))
+
+        short_video.result(5)
+        self.assertFalse(long_video.done())
+        # the short video's window rides in the second batch, not after all five long ones
+        self.assertTrue(any(d < 10 for d in decoder.batches[1]))
+        long_video.result(5)
+
+    def test_decoder_errors_reach_the_caller(self):
+        def broken(windows):
+            raise RuntimeError("cuda oom")
+
+        service = BatchTranscriptionService(broken, batch_size=2, max_latency=0.01)
+        with self.assertRaises(RuntimeError):
+            service.submit(speech(5)).result(5)
+
+
+class SegmentsFromTokensTestCase(unittest.TestCase):
+    def test_timestamp_pairs_become_segments(self):
+        tokens = [1000, 5, 6, 1100, 1100, 7, 1150, 1150, 8]
+        segments = segments_from_tokens(tokens, FakeTokenizer(), "en", duration=4.0)
+
+        self.assertEqual(
+            [(s["start"], s["end"], s["text"]) for s in segments],
+            [(0.0, 2.0, " 5 6"), (2.0, 3.0, " 7"), (3.0, 4.0, " 8")],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
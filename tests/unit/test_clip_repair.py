@@ -0,0 +1,94 @@
+import unittest
+from types import SimpleNamespace
+
+from clip_repair import merge_profile_clips, parse_clip_array, repair_clip, repair_clips
+from llm_requests import _reanalyze_failed
+from models.clip import Clip, Clips
+
+
+def _segments(n, seconds=10.0):
+    return [
+        {"id": i, "start": i * seconds, "end": (i + 1) * seconds, "text": f"s{i}"}
+        for i in range(n)
+    ]
+
+
+class ClipRepairTestCase(unittest.TestCase):
+    def test_parse_handles_fences_and_chatter(self):
+        text = 'Sure! Here you go:\n```json\n[{"title": "a"}]\n```'
+        self.assertEqual(parse_clip_array(text), [{"title": "a"}])
+        self.assertEqual(parse_clip_array('{"clips": []}'), [])
+        self.assertIsNone(parse_clip_array("no json here"))
+
+    def test_snaps_times_to_segment_boundaries(self):
+        raw = {"start_time": 11.3, "end_time": 12.0, "segment_ids": [1, 2], "title": "t", "reason": "r"}
+        clips = repair_clip(raw, _segments(5), max_seconds=30.0)
+        self.assertEqual(len(clips), 1)
+        self.assertEqual((clips[0].start_time, clips[0].end_time), (10.0, 30.0))
+
+    def test_gaps_and_long_blocks_are_split(self):
+        raw = {"segment_ids": [0, 1, 2, 3, 4, 7, 7], "title": "t", "reason": "r"}
+        clips = repair_clip(raw, _segments(10), max_seconds=30.0)
+        self.assertEqual([c.segment_ids for c in clips], [[0, 1, 2], [3, 4], [7]])
+
+    def test_missing_ids_fall_back_to_time_window(self):
+        raw = {"start_time": 25.0, "end_time": 35.0, "title": "t", "reason": "r"}
+        clips = repair_clip(raw, _segments(5), max_seconds=30.0)
+        self.assertEqual(clips[0].segment_ids, [2, 3])
+
+    def test_unsalvageable_clips_are_reported(self):
+        raws = [
+            {"segment_ids": [0, 1], "title": "ok", "reason": "r"},
+            {"segment_ids": [99], "title": "bad", "reason": "r"},
+            "not a clip",
+            {"segment_ids": [1, 2], "title": "overlaps", "reason": "r"},
+        ]
+        clips, failed = repair_clips(raws, _segments(5), max_seconds=30.0)
+        self.assertEqual([c.title for c in clips.clips], ["ok"])
+        self.assertEqual(failed, raws[1:3])
+
+    def test_malformed_segment_ids_are_ignored(self):
+        for bad in (3, [[1]], [{"id": 1}], "0,1"):
+            with self.assertRaises(ValueError):
+                repair_clip({"segment_ids": bad, "start_time": "soon"}, _segments(5), max_seconds=30.0)
+        clips = repair_clip({"segment_ids": ["1", [2], 2.0]}, _segments(5), max_seconds=30.0)
+        self.assertEqual(clips[0].segment_ids, [1, 2])
+
+    def test_profiles_are_merged_into_one_clip_set(self):
+        def clip(start, end, title):
+            return Clip(start_time=start, end_time=end, segment_ids=[0], reason="r", title=title)
+
+        merged = merge_profile_clips({
+            "humor": Clips(clips=[clip(0, 10, "joke"), clip(40, 50, "pun")]),
+            "conflict": Clips(clips=[clip(5, 15, "fight"), clip(20, 30, "debate")]),
+        })
+
+        self.assertEqual([c.title for c in merged.clips], ["humor - joke", "conflict - debate", "humor - pun"])
+        single = merge_profile_clips({"humor": Clips(clips=[clip(0, 10, "joke")])})
+        self.assertEqual(single.clips[0].title, "joke")
+
+
+class FakeResponses:
+    def __init__(self, output_text):
+        self.output_text = output_text
+        self.prompts = []
+
+    def create(self, model, input):
+        self.prompts.append(input)
+        return SimpleNamespace(output_text=self.output_text)
+
+
+class ReanalyzeFailedTestCase(unittest.TestCase):
+    def test_malformed_segment_ids_do_not_abort_the_reanalysis(self):
+        client = SimpleNamespace(responses=FakeResponses('[{"segment_ids": [8], "title": "t", "reason": "r"}]'))
+        failed = [
+            {"segment_ids": 3, "start_time": "soon"},
+            {"segment_ids": [[1], {"id": 2}], "start_time": None},
+            {"segment_ids": ["8", "x"], "start_time": "bad"},
+        ]
+
+        clips = _reanalyze_failed(client, failed, _segments(20), "anything")
+
+        self.assertEqual([c.segment_ids for c in clips.clips], [[8]])
+        self.assertEqual(len(client.responses.prompts), 1)
+
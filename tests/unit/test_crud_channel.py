@@ -1,4 +1,7 @@
 # tests/test_crud_channel.py
+import os
+import subprocess
+import sys
 import unittest
 
 from sqlalchemy import create_engine
@@ -99,4 +102,12 @@ class ChannelCRUDTestCase(unittest.TestCase):
         self.assertIsNone(channel_crud.get(self.db, c2.id))
         self.assertIsNone(channel_crud.get(self.db, c3.id))
 
+    def test_crud_imports_without_numpy(self):
+        # the analytics image installs no numpy; only transcript/fingerprint CRUD needs it
+        code = "import sys; sys.modules['numpy'] = None; import crud.crud"
+        src = os.path.join(os.path.dirname(__file__), "..", "..", "src")
+        result = subprocess.run(
+            [sys.executable, "-c", code], cwd=src, capture_output=True, text=True,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
 
@@ -12,7 +12,7 @@ class TestDownload(unittest.TestCase):
             video_path = download_youtube_video(nekk_minutt_url, tempdir)
             video_name = video_path.split("/")[-1]
             # Assert
-            self.assertEqual(video_name, "Nek Minute - Original.mp4")
+            self.assertEqual(video_name, "CTZyorJVeqI.mp4")
 
 
 
@@ -0,0 +1,95 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import download
+from models.clip import Clip, Clips
+
+
+class DownloadOptionsTestCase(unittest.TestCase):
+    def _run(self, fn, **kwargs):
+        with tempfile.TemporaryDirectory() as tempdir, \
+                mock.patch("yt_dlp.YoutubeDL") as ydl_cls:
+            ydl = ydl_cls.return_value.__enter__.return_value
+            ydl.extract_info.return_value = {"id": "abc"}
+            ydl.prepare_filename.return_value = os.path.join(tempdir, "out.mp4")
+
+            path = fn("https://youtube.com/watch?v=abc", tempdir, **kwargs)
+
+            opts = ydl_cls.call_args.args[0]
+        return path, opts
+
+    def test_audio_download_requests_smallest_audio_stream(self):
+        path, opts = self._run(download.download_youtube_audio)
+        self.assertTrue(path.endswith("out.mp4"))
+        self.assertTrue(opts["format"].startswith("worstaudio"))
+
+    def test_video_download_caps_resolution(self):
+        _, opts = self._run(download.download_youtube_video, max_height=720)
+        self.assertIn("height<=720", opts["format"])
+        self.assertEqual(opts["merge_output_format"], "mp4")
+
+    def test_files_are_named_by_id_and_resumed(self):
+        _, opts = self._run(download.download_youtube_video)
+        self.assertTrue(opts["outtmpl"].endswith("%(id)s.%(ext)s"))
+        self.assertTrue(opts["continuedl"])
+        self.assertFalse(opts["overwrites"])
+        self.assertEqual(opts["concurrent_fragment_downloads"], download.DOWNLOAD_FRAGMENT_CONCURRENCY)
+
+
+class VideoIdTestCase(unittest.TestCase):
+    def test_id_is_parsed_from_common_url_forms(self):
+        for url in (
+            "https://www.youtube.com/watch?v=CTZyorJVeqI",
+            "https://www.youtube.com/watch?list=x&v=CTZyorJVeqI",
+            "https://youtu.be/CTZyorJVeqI",
+            "https://www.youtube.com/shorts/CTZyorJVeqI",
+        ):
+            self.assertEqual(download.video_id_from_url(url), "CTZyorJVeqI")
+
+    def test_unknown_url_is_its_own_key(self):
+        self.assertEqual(download.video_id_from_url("file.mp4"), "file.mp4")
+
+
+class DownloadManagerTestCase(unittest.TestCase):
+    def test_concurrent_requests_for_same_video_share_one_download(self):
+        manager = download.DownloadManager(max_parallel=4)
+        release = threading.Event()
+        calls = []
+
+        def slow_download(url, **kwargs):
+            calls.append(url)
+            release.wait(5)
+            return "CTZyorJVeqI.mp4"
+
+        key = ("video", "CTZyorJVeqI")
+        first = manager.submit(key, slow_download, "https://youtu.be/CTZyorJVeqI")
+        second = manager.submit(key, slow_download, "https://www.youtube.com/watch?v=CTZyorJVeqI")
+        release.set()
+
+        self.assertIs(first, second)
+        self.assertEqual(first.result(), "CTZyorJVeqI.mp4")
+        self.assertEqual(len(calls), 1)
+
+    def test_finished_download_can_be_requested_again(self):
+        manager = download.DownloadManager(max_parallel=1)
+        key = ("audio", "abc")
+        manager.submit(key, lambda: "a").result()
+        again = manager.submit(key, lambda: "b")
+        self.assertEqual(again.result(), "b")
+
+
+class ClipWindowsTestCase(unittest.TestCase):
+    def test_windows_are_padded_and_merged(self):
+        clips = Clips(clips=[
+            Clip(start_time=1.0, end_time=10.0, segment_ids=[0], reason="", title="a"),
+            Clip(start_time=12.0, end_time=20.0, segment_ids=[1], reason="", title="b"),
+            Clip(start_time=100.0, end_time=110.0, segment_ids=[5], reason="", title="c"),
+        ])
+
+        self.assertEqual(
+            download.clip_windows(clips, padding=2.0),
+            [(0.0, 22.0), (98.0, 112.0)],
+        )
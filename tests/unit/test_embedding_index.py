@@ -0,0 +1,129 @@
+import tempfile
+import unittest
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from crud.crud import channel_crud, transcript_crud, video_crud
+from embedding_index import (
+    SegmentEmbeddingIndex,
+    build,
+    candidates_by_video,
+    load_indexed_transcript,
+    reduce_transcript,
+)
+from models.analytics import Base
+
+VOCAB = ["funny", "joke", "laugh", "fight", "argue", "angry", "math", "proof", "lecture"]
+
+
+class BagOfWordsEncoder:
+    """Deterministic stand-in for a sentence-embedding model."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, texts):
+        self.calls += 1
+        return np.array(
+            [[text.lower().count(word) + 0.01 for word in VOCAB] for text in texts],
+            dtype=np.float32,
+        )
+
+
+class SegmentEmbeddingIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self._tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tempdir.cleanup)
+        self.encoder = BagOfWordsEncoder()
+        self.index = SegmentEmbeddingIndex(self.encoder, self._tempdir.name, "test/model")
+        self.index.add(1, ["a funny joke", "math proof", "boring intro"])
+        self.index.add(2, ["they argue and fight", "what a joke, I laugh"])
+
+    def test_vectors_are_memory_mapped_and_normalized(self):
+        vectors = self.index.vectors(1)
+
+        self.assertIsInstance(vectors, np.memmap)
+        np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), 1.0, rtol=1e-5)
+        self.assertEqual(self.index.video_ids(), [1, 2])
+
+    def test_search_ranks_across_the_library(self):
+        matches = self.index.search("joke that makes you laugh", top_k=2)
+
+        self.assertEqual([(v, s) for v, s, _ in matches], [(2, 1), (1, 0)])
+        self.assertGreater(matches[0][2], matches[1][2])
+
+    def test_search_restricted_to_videos(self):
+        matches = self.index.search("fight", top_k=1, video_ids=[1, 99])
+
+        self.assertEqual([m[0] for m in matches], [1])
+
+    def test_readd_replaces_vectors(self):
+        self.index.vectors(1)
+        self.index.add(1, ["angry fight"])
+
+        self.assertEqual(len(self.index.vectors(1)), 1)
+        self.assertEqual(self.index.search("angry", top_k=1)[0][:2], (1, 0))
+
+    def test_empty_video(self):
+        self.index.add(3, [])
+
+        self.assertEqual(len(self.index.search("joke", top_k=10)), 5)
+
+
+class ReduceTranscriptTestCase(unittest.TestCase):
+    def test_keeps_matches_and_neighbours(self):
+        transcript = {"segments": [{"id": i, "text": str(i)} for i in range(10)], "language": "en"}
+
+        reduced = reduce_transcript(transcript, [0, 6], context=1)
+
+        self.assertEqual([s["id"] for s in reduced["segments"]], [0, 1, 5, 6, 7])
+        self.assertEqual(reduced["language"], "en")
+        self.assertEqual(reduce_transcript(transcript, [])["segments"], [])
+        self.assertEqual([s["id"] for s in reduce_transcript(transcript, [12, -5], context=0)["segments"]], [])
+
+    def test_candidates_by_video(self):
+        grouped = candidates_by_video([(2, 1, 0.9), (1, 0, 0.8), (2, 4, 0.5)])
+
+        self.assertEqual(grouped, {2: [(1, 0.9), (4, 0.5)], 1: [(0, 0.8)]})
+
+
+class BuildTestCase(unittest.TestCase):
+    def test_build_embeds_only_missing_transcripts(self):
+        engine = create_engine("sqlite:///:memory:", future=True)
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine, future=True)()
+        channel = channel_crud.create(db, {"handle": "@pod"})
+        for title in ("a", "b"):
+            video = video_crud.create(db, {
+                "channel_id": channel.id,
+                "title": title,
+                "views": 1,
+                "published_at": datetime(2024, 1, 1),
+                "url": f"https://youtu.be/{title}",
+            })
+            transcript_crud.save(db, video.id, {"segments": [
+                {"start": 0.0, "end": 1.0, "text": " a joke"},
+                {"start": 1.0, "end": 2.0, "text": " a proof"},
+            ]})
+
+        with tempfile.TemporaryDirectory() as tempdir:
+            index = SegmentEmbeddingIndex(BagOfWordsEncoder(), tempdir, "m")
+            self.assertEqual(build(db, index, channel.id), 2)
+            self.assertEqual(build(db, index, channel.id), 0)
+            self.assertEqual(build(db, index, rebuild=True), 2)
+            self.assertEqual(index.vectors(video.id).shape, (2, len(VOCAB)))
+
+            # a replaced transcript makes the stored vectors stale
+            transcript_crud.save(db, video.id, {"segments": [{"start": 0.0, "end": 1.0, "text": " a fight"}]})
+            self.assertIsNone(load_indexed_transcript(db, index, video.id))
+            self.assertEqual(build(db, index, channel.id), 1)
+            self.assertEqual(len(index.vectors(video.id)), 1)
+            self.assertEqual(load_indexed_transcript(db, index, video.id)["segments"][0]["text"], " a fight")
+        db.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
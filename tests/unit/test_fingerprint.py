@@ -0,0 +1,209 @@
+import os
+import tempfile
+import unittest
+import wave
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from crud.crud import channel_crud, fingerprint_crud, transcript_crud, video_crud
+from fingerprint import (
+    FingerprintDeduplicator,
+    Overlap,
+    ReusePlan,
+    anchors,
+    borrow_segments,
+    fingerprint_audio,
+    find_overlaps,
+    transcribe_uncovered,
+    write_regions,
+)
+from models.analytics import Base
+from transcript_store import CompactTranscript
+
+SR = 8000
+
+
+def tones(seconds: float, seed: int) -> np.ndarray:
+    """Random sequence of short two-tone notes, a stand-in for speech or music."""
+    rng = np.random.default_rng(seed)
+    out = np.zeros(int(seconds * SR), dtype=np.float32)
+    t = 0
+    while t < len(out):
+        n = min(int(rng.uniform(0.1, 0.5) * SR), len(out) - t)
+        tt = np.arange(n) / SR
+        out[t:t + n] = 0.3 * np.sin(2 * np.pi * rng.uniform(300, 2000) * tt)
+        out[t:t + n] += 0.2 * np.sin(2 * np.pi * rng.uniform(300, 2000) * tt)
+        t += n
+    return out + rng.normal(0, 0.01, len(out)).astype(np.float32)
+
+
+def write_wav(path: str, signal: np.ndarray) -> str:
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(SR)
+        wf.writeframes((np.clip(signal, -1, 1) * 32767).astype(np.int16).tobytes())
+    return path
+
+
+def segments(duration: float, step: float = 5.0):
+    return [
+        {"id": i, "start": s, "end": s + step, "text": f" seg {i}"}
+        for i, s in enumerate(np.arange(0.0, duration, step).tolist())
+    ]
+
+
+class FakeTranscriber:
+    def __init__(self):
+        self.durations = []
+
+    def transcribe(self, audio_path, model_size):
+        with wave.open(audio_path, "rb") as wf:
+            self.durations.append(wf.getnframes() / wf.getframerate())
+        return {"text": " new", "segments": [{"id": 0, "start": 0.0, "end": 1.0, "text": " new"}], "language": "en"}
+
+
+class FingerprintMatchTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._tempdir = tempfile.TemporaryDirectory()
+        source = tones(60, 1)
+        noise = np.random.default_rng(3).normal(0, 0.01, 30 * SR).astype(np.float32)
+        # 20s of new audio, 30s of the source from 15s at a lower volume, 10s new
+        mix = np.concatenate([tones(20.03, 2), 0.6 * source[15 * SR:45 * SR] + noise, tones(10, 4)])
+        cls.source = fingerprint_audio(write_wav(os.path.join(cls._tempdir.name, "a.wav"), source))
+        cls.mix = fingerprint_audio(write_wav(os.path.join(cls._tempdir.name, "b.wav"), mix))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._tempdir.cleanup()
+
+    def _postings(self, video_id=1):
+        keys, frames = anchors(self.source.keys)
+        return [(int(k), video_id, int(f)) for k, f in zip(keys, frames)]
+
+    def test_reused_stretch_is_found(self):
+        overlaps = find_overlaps(self.mix, self._postings(), lambda video_id: self.source.hashes)
+
+        self.assertEqual(len(overlaps), 1)
+        overlap = overlaps[0]
+        self.assertEqual(overlap.video_id, 1)
+        self.assertAlmostEqual(overlap.offset, -5.0, delta=0.15)
+        self.assertAlmostEqual(overlap.start, 20.0, delta=1.5)
+        self.assertAlmostEqual(overlap.end, 50.0, delta=1.5)
+
+    def test_unrelated_audio_does_not_match(self):
+        other = fingerprint_audio(write_wav(os.path.join(self._tempdir.name, "c.wav"), tones(40, 5)))
+
+        self.assertEqual(find_overlaps(other, self._postings(), lambda video_id: self.source.hashes), [])
+
+
+class ReusePlanTestCase(unittest.TestCase):
+    def test_uncovered_and_duplicate(self):
+        plan = ReusePlan(60.0, [Overlap(1, 20.0, 50.0, -5.0)])
+
+        self.assertEqual(plan.uncovered(), [(0.0, 20.0), (50.0, 60.0)])
+        self.assertFalse(plan.is_duplicate)
+        self.assertTrue(ReusePlan(60.0, [Overlap(1, 0.0, 58.0, 0.0)]).is_duplicate)
+
+    def test_borrowed_segments_move_to_the_new_timeline(self):
+        stored = CompactTranscript.from_transcript({"segments": segments(60.0)})
+
+        borrowed = borrow_segments(Overlap(1, 20.0, 50.0, -5.0), stored)
+
+        # stored 15s-45s: segments [15,20) .. [40,45) land on 20s-50s
+        self.assertEqual([s["text"] for s in borrowed], [" seg 3", " seg 4", " seg 5", " seg 6", " seg 7", " seg 8"])
+        self.assertEqual((borrowed[0]["start"], borrowed[-1]["end"]), (20.0, 50.0))
+
+    def test_only_uncovered_audio_is_transcribed(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            audio = write_wav(os.path.join(tmp, "audio.wav"), tones(60, 1))
+            plan = ReusePlan(60.0, [Overlap(1, 20.0, 50.0, -5.0)], [{"start": 20.0, "end": 50.0, "text": " old"}])
+            transcriber = FakeTranscriber()
+
+            transcript = transcribe_uncovered(transcriber, audio, "base", plan)
+
+            self.assertEqual(os.listdir(tmp), ["audio.wav"])
+        self.assertEqual(len(transcriber.durations), 1)
+        self.assertLess(transcriber.durations[0], 31.0)
+        self.assertEqual([s["text"] for s in transcript["segments"]], [" new", " old"])
+        self.assertEqual([s["id"] for s in transcript["segments"]], [0, 1])
+        self.assertEqual(transcript["language"], "en")
+
+    def test_write_regions(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            audio = write_wav(os.path.join(tmp, "audio.wav"), tones(10, 1))
+            out = os.path.join(tmp, "out.wav")
+
+            starts = write_regions(audio, [(0.0, 2.0), (5.0, 6.0)], out)
+
+            self.assertEqual(starts[0], 0.0)
+            self.assertGreaterEqual(starts[1], 2.0)
+            with wave.open(out, "rb") as wf:
+                self.assertGreater(wf.getnframes(), 3 * SR)
+
+
+class FingerprintDeduplicatorTestCase(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite:///:memory:")
+        Base.metadata.create_all(engine)
+        self.SessionLocal = sessionmaker(bind=engine)
+        self._tempdir = tempfile.TemporaryDirectory()
+        with self.SessionLocal() as db:
+            channel = channel_crud.create(db, {"handle": "@chan"})
+            for vid in ("old", "new"):
+                video_crud.create(db, {
+                    "channel_id": channel.id,
+                    "url": f"https://youtu.be/{vid}",
+                    "title": vid,
+                    "views": 1,
+                    "published_at": datetime(2024, 1, 1),
+                })
+
+    def tearDown(self):
+        self._tempdir.cleanup()
+
+    def test_reupload_reuses_the_stored_transcript(self):
+        source = tones(40, 1)
+        old = write_wav(os.path.join(self._tempdir.name, "old.wav"), source)
+        new = write_wav(os.path.join(self._tempdir.name, "new.wav"), 0.8 * source)
+        deduplicator = FingerprintDeduplicator(self.SessionLocal)
+
+        first = deduplicator.plan("https://youtu.be/old", old)
+        with self.SessionLocal() as db:
+            old_id = video_crud.get_by(db, url="https://youtu.be/old").id
+            transcript_crud.save(db, old_id, {"segments": segments(40.0), "language": "en"})
+        second = deduplicator.plan("https://youtu.be/new", new)
+
+        self.assertEqual(first.overlaps, [])
+        self.assertTrue(second.is_duplicate)
+        self.assertEqual(second.overlaps[0].video_id, old_id)
+        self.assertEqual(len(second.transcript()["segments"]), 8)
+        with self.SessionLocal() as db:
+            self.assertEqual(len(fingerprint_crud.hashes(db, old_id)), len(fingerprint_crud.hashes(db, old_id + 1)))
+
+    def test_matches_without_a_transcript_are_ignored(self):
+        source = tones(30, 1)
+        deduplicator = FingerprintDeduplicator(self.SessionLocal)
+
+        deduplicator.plan("https://youtu.be/old", write_wav(os.path.join(self._tempdir.name, "old.wav"), source))
+        plan = deduplicator.plan("https://youtu.be/new", write_wav(os.path.join(self._tempdir.name, "new.wav"), source))
+
+        self.assertEqual(plan.overlaps, [])
+
+    def test_lookup_excludes_own_video(self):
+        fp = fingerprint_audio(write_wav(os.path.join(self._tempdir.name, "a.wav"), tones(20, 1)))
+        with self.SessionLocal() as db:
+            fingerprint_crud.save(db, 1, fp, 0.1)
+            fingerprint_crud.save(db, 1, fp, 0.1)   # replaces, does not duplicate
+            keys = anchors(fp.keys)[0]
+
+            self.assertEqual(len(fingerprint_crud.lookup(db, keys)), len(keys))
+            self.assertEqual(fingerprint_crud.lookup(db, keys, exclude_video_id=1), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import tempfile
+import time
+import unittest
+import urllib.request
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from crud.crud import channel_crud, stage_metric_crud, video_crud
+from instrumentation import MetricsRegistry, PipelineMetrics, serve_metrics
+from models.analytics import Base
+
+
+class PipelineMetricsTestCase(unittest.TestCase):
+    def test_stage_records_time_memory_and_bytes(self):
+        metrics = PipelineMetrics("video")
+        with tempfile.NamedTemporaryFile() as fh:
+            fh.write(b"\0" * 2048)
+            fh.flush()
+            with metrics.stage("extract_audio") as m:
+                sum(range(10000))
+                m.add_file(fh.name)
+
+        (stage,) = metrics.as_dicts()
+        self.assertEqual(stage["stage"], "extract_audio")
+        self.assertEqual(stage["bytes_processed"], 2048)
+        self.assertGreater(stage["wall_seconds"], 0)
+        self.assertGreater(stage["peak_rss_bytes"], 0)
+        self.assertIsNone(stage["gpu_peak_bytes"])
+
+    def test_peak_rss_is_measured_per_stage(self):
+        metrics = PipelineMetrics("video")
+        with metrics.stage("transcribe"):
+            block = bytearray(256 * 2**20)   # zero-filled, so the pages are resident
+            time.sleep(0.2)                  # outlast a few sampling intervals
+            del block
+        with metrics.stage("analyze"):
+            sum(range(10000))
+
+        big, small = metrics.as_dicts()
+        self.assertGreater(big["peak_rss_bytes"] - small["peak_rss_bytes"], 128 * 2**20)
+
+    def test_stage_is_recorded_when_it_raises(self):
+        metrics = PipelineMetrics("video")
+        with self.assertRaises(RuntimeError):
+            with metrics.stage("transcribe"):
+                raise RuntimeError("boom")
+        self.assertEqual([s.stage for s in metrics.stages], ["transcribe"])
+
+    def test_registry_renders_prometheus_text(self):
+        registry = MetricsRegistry()
+        metrics = PipelineMetrics("video", registry)
+        metrics.timed("analyze", lambda: None)
+        metrics.timed("analyze", lambda: None)
+        registry.set_gauge('storage_bytes{dir="audio"}', 10)
+
+        text = registry.render()
+        self.assertIn('pipeline_stage_runs_total{stage="analyze"} 2', text)
+        self.assertIn('pipeline_stage_wall_seconds_total{stage="analyze"}', text)
+        self.assertIn('pipeline_storage_bytes{dir="audio"} 10', text)
+
+    def test_metrics_endpoint(self):
+        registry = MetricsRegistry()
+        PipelineMetrics("video", registry).timed("analyze", lambda: None)
+        server = serve_metrics(registry, port=0)
+        try:
+            url = f"http://127.0.0.1:{server.server_port}/metrics"
+            with urllib.request.urlopen(url) as response:
+                body = response.read().decode()
+        finally:
+            server.shutdown()
+        self.assertIn('stage="analyze"', body)
+
+
+class StageMetricCRUDTestCase(unittest.TestCase):
+    def test_metrics_are_stored_per_video(self):
+        engine = create_engine("sqlite:///:memory:", future=True)
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine, future=True)()
+        self.addCleanup(db.close)
+
+        channel = channel_crud.create(db, {"handle": "@pod"})
+        video = video_crud.create(db, {
+            "channel_id": channel.id, "title": "t", "views": 1,
+            "published_at": datetime(2024, 1, 1), "url": "u",
+        })
+        metrics = PipelineMetrics("u")
+        metrics.timed("download_audio", lambda: None)
+
+        stage_metric_crud.record(db, video.id, metrics.as_dicts())
+
+        (row,) = stage_metric_crud.get_by_video(db, video.id)
+        self.assertEqual(row.stage, "download_audio")
+        self.assertGreater(row.peak_rss_bytes, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from llm_cache import LLMResponseCache, hash_transcript, make_cache_key
+
+
+class LLMResponseCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.cache = LLMResponseCache(
+            cache_dir=self.tempdir.name,
+            ttl_seconds=60,
+            max_entries=3,
+            max_bytes=1024 * 1024,
+        )
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    # --- tests ---
+
+    def test_set_and_get(self):
+        self.cache.set("k1", '[{"title": "x"}]')
+        self.assertEqual(self.cache.get("k1"), '[{"title": "x"}]')
+        self.assertIsNone(self.cache.get("missing"))
+
+    def test_expired_entry_is_a_miss(self):
+        self.cache.ttl_seconds = 0
+        self.cache.set("k1", "[]")
+        time.sleep(0.01)
+        self.assertIsNone(self.cache.get("k1"))
+        self.assertFalse(os.path.exists(os.path.join(self.tempdir.name, "k1.json")))
+
+    def test_entry_evicted_during_get_is_a_miss(self):
+        self.cache.set("k1", "[]")
+
+        # another process removes the file right after it was read
+        with mock.patch("llm_cache.os.utime", side_effect=FileNotFoundError):
+            self.assertIsNone(self.cache.get("k1"))
+
+    def test_evicts_least_recently_used(self):
+        for i, key in enumerate(["a", "b", "c"]):
+            self.cache.set(key, "[]")
+            path = os.path.join(self.tempdir.name, f"{key}.json")
+            os.utime(path, (time.time() - 10 + i, time.time() - 10 + i))
+
+        # reading "a" makes it the most recently used
+        self.cache.get("a")
+        self.cache.set("d", "[]")
+
+        self.assertIsNone(self.cache.get("b"))
+        self.assertIsNotNone(self.cache.get("a"))
+        self.assertIsNotNone(self.cache.get("d"))
+
+    def test_key_depends_on_every_component(self):
+        transcript = {"segments": [{"id": 0, "start": 0.0, "end": 1.0, "text": "hi"}]}
+        th = hash_transcript(transcript)
+        base = make_cache_key("m", "1", "humor", th)
+
+        self.assertEqual(base, make_cache_key("m", "1", "humor", th))
+        self.assertNotEqual(base, make_cache_key("m2", "1", "humor", th))
+        self.assertNotEqual(base, make_cache_key("m", "2", "humor", th))
+        self.assertNotEqual(base, make_cache_key("m", "1", "conflict", th))
+
+        transcript["segments"][0]["text"] = "hello"
+        self.assertNotEqual(base, make_cache_key("m", "1", "humor", hash_transcript(transcript)))
@@ -0,0 +1,192 @@
+import os
+import tempfile
+import threading
+import unittest
+import unittest.mock
+from unittest.mock import patch
+
+import numpy as np
+
+import model_server
+from model_server import (
+    ModelServer,
+    ModelServerClient,
+    RemoteSpeechAnalyzer,
+    RemoteTranscriber,
+    UnixModelServer,
+)
+
+
+def fake_transcribe(payload, audio):
+    if isinstance(audio, str):
+        return {"text": open(audio).read(), "segments": [], "model_size": payload["model_size"]}
+    return {"text": f"{len(audio)} samples", "segments": [], "sum": float(np.sum(audio))}
+
+
+def fake_diarize(payload, audio):
+    return {
+        "turns": [[0.0, 1.5, "SPEAKER_00"], [1.5, 3.0, "SPEAKER_01"]],
+        "labels": ["SPEAKER_00", "SPEAKER_01"],
+        "embeddings": np.eye(2, dtype=np.float32),
+    }
+
+
+def fake_analyze(payload, audio):
+    return {
+        "transcript": {"text": " hi", "segments": [{"start": 0.0, "end": 1.0, "text": " hi"}]},
+        "timings": {"total": 0.1},
+        **fake_diarize(payload, audio),
+    }
+
+
+def failing(payload, audio):
+    raise ValueError("model exploded")
+
+
+FAKE_ENDPOINTS = {
+    "/transcribe": fake_transcribe,
+    "/analyze": fake_analyze,
+    "/fail": failing,
+}
+
+
+class ModelServerTestCase(unittest.TestCase):
+    def setUp(self):
+        patcher = patch.dict(model_server.ENDPOINTS, FAKE_ENDPOINTS)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.server = ModelServer(("127.0.0.1", 0))
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.client = ModelServerClient(f"http://127.0.0.1:{self.server.server_port}", timeout=5)
+
+    def test_transcribe_by_path(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            path = os.path.join(tempdir, "a.wav")
+            with open(path, "w") as fh:
+                fh.write("from disk")
+            result = RemoteTranscriber(client=self.client).transcribe(path, "tiny")
+
+        self.assertEqual(result["text"], "from disk")
+        self.assertEqual(result["model_size"], "tiny")
+
+    def test_transcribe_by_shared_memory(self):
+        audio = np.full(16000, 0.5, dtype=np.float32)
+
+        result = RemoteTranscriber(client=self.client).transcribe(audio, "base")
+
+        self.assertEqual(result["text"], "16000 samples")
+        self.assertAlmostEqual(result["sum"], 8000.0)
+
+    def test_speech_analyzer_builds_speech_analysis(self):
+        from transcript_merge import merge_speakers
+
+        analysis = RemoteSpeechAnalyzer(client=self.client).analyze("/audio/a.wav", "base")
+
+        self.assertEqual(analysis.timings, {"total": 0.1})
+        self.assertEqual(analysis.labels, ["SPEAKER_00", "SPEAKER_01"])
+        self.assertEqual(analysis.embeddings.shape, (2, 2))
+        merged = merge_speakers(analysis.transcript, analysis.diarization)
+        self.assertEqual(merged["segments"][0]["speaker"], "SPEAKER_00")
+
+    def test_server_errors_raise(self):
+        with self.assertRaisesRegex(RuntimeError, "model exploded"):
+            self.client.call("/fail", "/audio/a.wav")
+        with self.assertRaisesRegex(RuntimeError, "unknown endpoint"):
+            self.client.call("/nope", "/audio/a.wav")
+
+    def test_serves_concurrent_workers(self):
+        results = []
+
+        def worker(n):
+            audio = np.ones(n, dtype=np.float32)
+            results.append(RemoteTranscriber(client=self.client).transcribe(audio, "base")["text"])
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(100, 108)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(sorted(results), [f"{n} samples" for n in range(100, 108)])
+
+
+class UnixModelServerTestCase(unittest.TestCase):
+    def test_unix_socket_round_trip(self):
+        with tempfile.TemporaryDirectory() as tempdir, patch.dict(model_server.ENDPOINTS, FAKE_ENDPOINTS):
+            path = os.path.join(tempdir, "models.sock")
+            server = UnixModelServer(path)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            try:
+                client = ModelServerClient(f"unix://{path}", timeout=5)
+                result = RemoteTranscriber(client=client).transcribe(np.zeros(10, dtype=np.float32), "base")
+            finally:
+                server.shutdown()
+                server.server_close()
+
+        self.assertEqual(result["text"], "10 samples")
+
+
+class FakeAnnotation(list):
+    """(start, end, speaker) turns with the pyannote ``labels()`` accessor."""
+
+    def labels(self):
+        return sorted({speaker for _, _, speaker in self})
+
+
+class ModelHandlerTestCase(unittest.TestCase):
+    """The real endpoint handlers, with only the model calls replaced."""
+
+    def setUp(self):
+        self.server = ModelServer(("127.0.0.1", 0))
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.client = ModelServerClient(f"http://127.0.0.1:{self.server.server_port}", timeout=5)
+
+        # (type, samples, sum) of every audio a model saw; the arrays themselves are
+        # views of shared memory that is unmapped once the request is answered
+        self.received = []
+
+        def record(audio):
+            self.received.append((type(audio), len(audio), float(np.sum(audio))))
+
+        def transcribe(audio, model_size="base", backend=None):
+            record(audio)
+            return {"text": " hi", "segments": [{"start": 0.0, "end": 1.0, "text": " hi"}], "language": "en"}
+
+        def diarize(audio, return_embeddings=False):
+            record(audio)
+            return FakeAnnotation([(0.0, 1.0, "SPEAKER_00")]), np.ones((1, 4), dtype=np.float32)
+
+        for name, fn in (
+            ("transcribe_audio", transcribe),
+            ("diarize_audio", diarize),
+            ("load_audio", unittest.mock.Mock(side_effect=AssertionError("array input was decoded again"))),
+            ("_device", lambda: "cpu"),
+        ):
+            patcher = patch(f"audio.{name}", fn)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_analyze_accepts_shared_memory_audio(self):
+        audio = np.full(16000, 0.25, dtype=np.float32)
+
+        analysis = RemoteSpeechAnalyzer(client=self.client).analyze(audio, "base")
+
+        self.assertEqual(self.received, [(np.ndarray, 16000, 4000.0)] * 2)
+        self.assertEqual(analysis.labels, ["SPEAKER_00"])
+        self.assertEqual(analysis.diarization, [(0.0, 1.0, "SPEAKER_00")])
+        self.assertEqual(analysis.embeddings.shape, (1, 4))
+
+    def test_transcribe_accepts_shared_memory_audio(self):
+        result = RemoteTranscriber(client=self.client).transcribe(np.zeros(8000, dtype=np.float32), "base")
+
+        self.assertEqual(result["text"], " hi")
+        self.assertEqual(self.received, [(np.ndarray, 8000, 0.0)])
+
+
+if __name__ == "__main__":
+    unittest.main()
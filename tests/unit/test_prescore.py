@@ -0,0 +1,89 @@
+import os
+import tempfile
+import unittest
+import wave
+
+import numpy as np
+
+from prescore import (
+    frame_energy,
+    prescore_transcript,
+    score_segments,
+    select_candidate_indices,
+)
+
+
+def _segments(n, seconds=5.0, text="just some ordinary words here"):
+    return [
+        {"id": i, "start": i * seconds, "end": (i + 1) * seconds, "text": text}
+        for i in range(n)
+    ]
+
+
+class PrescoreTestCase(unittest.TestCase):
+    def test_frame_energy_reads_wav(self):
+        sr = 8000
+        quiet = np.zeros(sr, dtype=np.int16)
+        loud = (0.5 * 32767 * np.sin(np.arange(sr) * 0.1)).astype(np.int16)
+        with tempfile.TemporaryDirectory() as tempdir:
+            path = os.path.join(tempdir, "a.wav")
+            with wave.open(path, "wb") as wf:
+                wf.setnchannels(1)
+                wf.setsampwidth(2)
+                wf.setframerate(sr)
+                wf.writeframes(np.concatenate([quiet, loud]).tobytes())
+
+            energy_db, frame_seconds = frame_energy(path, frame_seconds=0.1)
+
+        self.assertEqual(len(energy_db), 20)
+        self.assertLess(energy_db[:10].max(), -100)
+        self.assertGreater(energy_db[10:].min(), -10)
+
+    def test_loud_reaction_segment_scores_highest(self):
+        segments = _segments(10)
+        segments[6]["text"] = "(laughs) no way, that is insane"
+        energy_db = np.full(10 * 5 * 20, -40.0)
+        energy_db[6 * 100:7 * 100] = -10.0
+
+        scores = score_segments(segments, energy_db, frame_seconds=0.05)
+
+        self.assertEqual(int(np.argmax(scores)), 6)
+
+    def test_segments_past_the_audio_are_not_loud(self):
+        segments = _segments(10)
+        energy_db = np.full(8 * 5 * 20, -40.0)   # audio ends after segment 7
+        energy_db[3 * 100:4 * 100] = -10.0
+
+        scores = score_segments(segments, energy_db, frame_seconds=0.05)
+
+        self.assertEqual(int(np.argmax(scores)), 3)
+        self.assertLess(scores[8:].max(), scores[:8].min() + 1e-9)
+
+    def test_turn_density_uses_diarization(self):
+        segments = _segments(10)
+        turns = [(40.0 + i, 40.5 + i, f"SPEAKER_0{i % 2}") for i in range(5)]
+
+        scores = score_segments(segments, diarization=turns)
+
+        self.assertIn(int(np.argmax(scores)), (7, 8, 9))
+        self.assertLess(scores[0], scores[8])
+
+    def test_turn_density_from_merged_speaker_labels(self):
+        segments = _segments(10)
+        for i, seg in enumerate(segments):
+            seg["speaker"] = "SPEAKER_00" if i < 7 else f"SPEAKER_0{i % 2}"
+
+        scores = score_segments(segments)
+
+        self.assertLess(scores[0], scores[8])
+
+    def test_select_keeps_context_in_order(self):
+        scores = np.zeros(100)
+        scores[50] = 10.0
+        keep = select_candidate_indices(scores, keep_fraction=0.01, min_keep=1, context=2)
+        self.assertEqual(keep.tolist(), [48, 49, 50, 51, 52])
+
+    def test_short_transcript_is_passed_through(self):
+        transcript = {"text": "", "segments": _segments(5)}
+        reduced = prescore_transcript(transcript)
+        self.assertEqual(reduced["segments"], transcript["segments"])
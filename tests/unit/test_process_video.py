@@ -0,0 +1,194 @@
+import os
+import tempfile
+import unittest
+
+from fingerprint import Overlap, ReusePlan
+from models.clip import Clip, Clips
+from process_video import VideoPipeline
+from storage import StorageManager
+
+
+class FakeDownloader:
+    def __init__(self, directory):
+        self.directory = directory
+        self.calls = []
+
+    def _write(self, name):
+        path = os.path.join(self.directory, name)
+        with open(path, "wb") as fh:
+            fh.write(b"\0" * 100)
+        return path
+
+    def download(self, url, dry_run=False):
+        self.calls.append("video")
+        return self._write("video.mp4")
+
+    def download_audio(self, url, dry_run=False):
+        self.calls.append("audio")
+        return self._write("video.audio.webm")
+
+    def download_sections(self, url, windows, dry_run=False):
+        self.calls.append("sections")
+        return [
+            {"path": self._write(f"video.{int(s)}-{int(e)}.mp4"), "start": s, "end": e}
+            for s, e in windows
+        ]
+
+
+class FakeAudioExtractor:
+    def extract(self, video_path):
+        path = os.path.splitext(video_path)[0] + ".wav"
+        with open(path, "wb") as fh:
+            fh.write(b"\0" * 50)
+        return path
+
+
+class FakeTranscriber:
+    def transcribe(self, audio_path, model_size):
+        return {"text": " hi", "segments": [{"id": 0, "start": 0.0, "end": 20.0, "text": " hi"}]}
+
+
+class FakeDeduplicator:
+    def __init__(self, plan):
+        self._plan = plan
+
+    def plan(self, url, audio_path):
+        return self._plan
+
+
+class FakeAnalyzer:
+    def __init__(self, clips):
+        self.clips = clips
+
+    def analyze(self, transcript, interesting_prompt):
+        return Clips(clips=self.clips)
+
+
+class PromptAnalyzer:
+    """One clip per prompt, at the time given for it."""
+
+    def __init__(self, starts):
+        self.starts = starts
+        self.prompts = []
+
+    def analyze(self, transcript, interesting_prompt):
+        self.prompts.append(interesting_prompt)
+        start = self.starts[interesting_prompt]
+        return Clips(clips=[Clip(start_time=start, end_time=start + 10, segment_ids=[0], reason="", title="c")])
+
+
+class FakeClipGenerator:
+    def __init__(self):
+        self.calls = []
+
+    def generate(self, video_path, segments):
+        self.calls.append((os.path.basename(video_path), [c.title for c in segments.clips]))
+        return [f"{c.title}.mp4" for c in segments.clips]
+
+
+CLIPS = [
+    Clip(start_time=10.0, end_time=20.0, segment_ids=[0], reason="", title="a"),
+    Clip(start_time=500.0, end_time=510.0, segment_ids=[1], reason="", title="b"),
+]
+
+
+class VideoPipelineTestCase(unittest.TestCase):
+    def setUp(self):
+        self._tempdir = tempfile.TemporaryDirectory()
+        self._cwd = os.getcwd()
+        os.chdir(self._tempdir.name)   # the pipeline writes its outputs under the CWD
+
+    def tearDown(self):
+        os.chdir(self._cwd)
+        self._tempdir.cleanup()
+
+    def _pipeline(self, video_mode="parallel", clips=CLIPS, storage=None, deduplicator=None):
+        self.downloader = FakeDownloader(self._tempdir.name)
+        self.clip_generator = FakeClipGenerator()
+        return VideoPipeline(
+            downloader=self.downloader,
+            audio_extractor=FakeAudioExtractor(),
+            transcriber=FakeTranscriber(),
+            analyzer=FakeAnalyzer(clips),
+            clip_generator=self.clip_generator,
+            video_mode=video_mode,
+            storage=storage,
+            deduplicator=deduplicator,
+        )
+
+    def test_parallel_mode_cuts_clips_from_full_video(self):
+        result = self._pipeline("parallel").run("https://youtu.be/abc")
+
+        self.assertEqual(sorted(self.downloader.calls), ["audio", "video"])
+        self.assertEqual(self.clip_generator.calls, [("video.mp4", ["a", "b"])])
+        self.assertEqual(result["clips"], ["a.mp4", "b.mp4"])
+
+    def test_on_demand_mode_skips_video_without_clips(self):
+        result = self._pipeline("on-demand", clips=[]).run("https://youtu.be/abc")
+
+        self.assertEqual(self.downloader.calls, ["audio"])
+        self.assertIsNone(result["video"])
+        self.assertEqual(result["clips"], [])
+
+    def test_sections_mode_cuts_each_window(self):
+        result = self._pipeline("sections").run("https://youtu.be/abc")
+
+        self.assertEqual(self.downloader.calls, ["audio", "sections"])
+        self.assertEqual(len(result["video_sections"]), 2)
+        self.assertEqual([titles for _, titles in self.clip_generator.calls], [["a"], ["b"]])
+
+    def test_every_stage_is_measured(self):
+        result = self._pipeline("on-demand").run("https://youtu.be/abc")
+
+        stages = [m["stage"] for m in result["metrics"]]
+        self.assertEqual(
+            stages,
+            ["download_audio", "extract_audio", "transcribe", "analyze", "download_video", "generate_clips"],
+        )
+        download_audio = result["metrics"][0]
+        self.assertEqual(download_audio["bytes_processed"], 100)
+
+    def test_intermediates_are_released_after_the_run(self):
+        storage = StorageManager({self._tempdir.name: 1}, grace_seconds=0)
+        result = self._pipeline("on-demand", storage=storage).run("https://youtu.be/abc")
+
+        self.assertFalse(os.path.exists(result["video"]))
+        self.assertFalse(os.path.exists(result["audio"]))
+        self.assertEqual(storage.usage()[self._tempdir.name]["pinned"], 0)
+
+    def test_duplicate_audio_reuses_the_stored_transcript(self):
+        plan = ReusePlan(20.0, [Overlap(7, 0.0, 20.0, 3.0)], [{"start": 0.0, "end": 20.0, "text": " old"}])
+        result = self._pipeline("on-demand", deduplicator=FakeDeduplicator(plan)).run("https://youtu.be/abc")
+
+        stages = [m["stage"] for m in result["metrics"]]
+        self.assertIn("fingerprint", stages)
+        self.assertNotIn("transcribe", stages)
+        self.assertEqual(result["transcript"]["segments"][0]["text"], " old")
+
+    def test_every_prompt_is_analysed_and_cut_in_one_pass(self):
+        self.downloader = FakeDownloader(self._tempdir.name)
+        self.clip_generator = FakeClipGenerator()
+        analyzer = PromptAnalyzer({"jokes": 0.0, "fights": 5.0, "facts": 30.0})
+        pipeline = VideoPipeline(
+            downloader=self.downloader,
+            audio_extractor=FakeAudioExtractor(),
+            transcriber=FakeTranscriber(),
+            analyzer=analyzer,
+            clip_generator=self.clip_generator,
+            prompts={"humor": "jokes", "conflict": "fights", "educational": "facts"},
+        )
+
+        result = pipeline.run("https://youtu.be/abc")
+
+        self.assertEqual(sorted(analyzer.prompts), ["facts", "fights", "jokes"])
+        self.assertEqual(sorted(result["profiles"]), ["conflict", "educational", "humor"])
+        # the conflict clip overlaps the humor clip and is dropped
+        self.assertEqual(self.clip_generator.calls, [("video.mp4", ["humor - c", "educational - c"])])
+
+    def test_unknown_video_mode_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self._pipeline("streaming")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import pstats
+import tempfile
+import time
+import unittest
+
+from profiling import StageProfiler, profile_pipeline
+
+
+class BusyStage:
+    calls = 0
+
+    def work(self, seconds: float) -> str:
+        end = time.perf_counter() + seconds
+        while time.perf_counter() < end:
+            pass
+        self.calls += 1
+        return "done"
+
+
+class PipelineStub:
+    def __init__(self):
+        self.downloader = BusyStage()
+        self.audio_extractor = None
+        self.transcriber = None
+        self.speech_analyzer = None
+        self.segment_scorer = None
+        self.analyzer = None
+        self.clip_generator = BusyStage()
+        self.deduplicator = BusyStage()
+
+
+class StageProfilerTestCase(unittest.TestCase):
+    def setUp(self):
+        self._tempdir = tempfile.TemporaryDirectory()
+        self.dir = self._tempdir.name
+
+    def tearDown(self):
+        self._tempdir.cleanup()
+
+    def test_cprofile_capture_is_written_per_video(self):
+        profiler = StageProfiler("cprofile", self.dir)
+        stage = profiler.wrap("downloader", BusyStage())
+
+        with profiler.video("abc"):
+            self.assertEqual(stage.work(0.01), "done")
+
+        path = os.path.join(self.dir, "abc", "downloader.work.prof")
+        stats = pstats.Stats(path)
+        self.assertTrue(any(func[2] == "work" for func in stats.stats))
+
+    def test_sampling_capture_is_folded_stacks(self):
+        profiler = StageProfiler("sampling", self.dir, interval=0.001)
+        stage = profiler.wrap("analyzer", BusyStage())
+
+        with profiler.video("abc"):
+            stage.work(0.1)
+
+        with open(os.path.join(self.dir, "abc", "analyzer.work.folded")) as fh:
+            lines = fh.read().splitlines()
+        self.assertTrue(lines)
+        stack, count = lines[0].rsplit(" ", 1)
+        self.assertIn("work (test_profiling.py", stack.split(";")[-1])
+        self.assertGreater(int(count), 0)
+
+    def test_repeated_calls_get_numbered_captures(self):
+        profiler = StageProfiler("cprofile", self.dir)
+        stage = profiler.wrap("clip_generator", BusyStage())
+        with profiler.video("abc"):
+            stage.work(0)
+            stage.work(0)
+        self.assertEqual(
+            sorted(os.listdir(os.path.join(self.dir, "abc"))),
+            ["clip_generator.work.1.prof", "clip_generator.work.prof"],
+        )
+
+    def test_profile_pipeline_wraps_present_stages_only(self):
+        pipeline = profile_pipeline(PipelineStub(), StageProfiler("cprofile", self.dir))
+        self.assertIsNone(pipeline.transcriber)
+        self.assertEqual(pipeline.downloader.work(0), "done")
+        self.assertEqual(pipeline.downloader.calls, 1)
+        pipeline.deduplicator.work(0)
+        self.assertTrue(os.path.exists(os.path.join(self.dir, "unknown", "deduplicator.work.prof")))
+
+    def test_unknown_mode_is_rejected(self):
+        with self.assertRaises(ValueError):
+            StageProfiler("perf")
+
+
+if __name__ == "__main__":
+    unittest.main()
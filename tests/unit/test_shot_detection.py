@@ -0,0 +1,88 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+import shot_detection
+from models.clip import Clip, Clips
+from shot_detection import (
+    ShotBoundaries,
+    frame_histograms,
+    shot_boundaries,
+    shot_boundaries_from_histograms,
+    snap_clips,
+)
+
+
+def frames(*colours, per_shot=8):
+    """Solid-colour shots of ``per_shot`` frames each, with a little noise."""
+    rng = np.random.default_rng(0)
+    out = []
+    for colour in colours:
+        shot = np.empty((per_shot, 36, 64, 3), dtype=np.uint8)
+        shot[:] = colour
+        noise = rng.integers(0, 3, shot.shape, dtype=np.uint8)
+        out.append(shot + noise)
+    return np.concatenate(out)
+
+
+def clip(start, end):
+    return Clip(start_time=start, end_time=end, segment_ids=[0], reason="r", title=f"c{start}")
+
+
+class HistogramTestCase(unittest.TestCase):
+    def test_histograms_are_normalised_per_channel(self):
+        hist = frame_histograms(frames((10, 128, 250), per_shot=2))
+
+        self.assertEqual(hist.shape, (2, 48))
+        np.testing.assert_allclose(hist.sum(axis=1), 3.0)
+        self.assertEqual(hist[0, 0], 1.0)             # red 10 -> bin 0
+        self.assertEqual(hist[0, 16 + 8], 1.0)        # green 128 -> bin 8
+        self.assertEqual(hist[0, 32 + 15], 1.0)       # blue 250 -> bin 15
+
+    def test_detects_cuts_between_shots(self):
+        hist = frame_histograms(frames((0, 0, 0), (200, 50, 50), (200, 50, 50), (20, 200, 90)))
+
+        # 4 frames per second sampled: cuts at frame 8 and 24
+        self.assertEqual(shot_boundaries_from_histograms(hist, fps=4), [2.0, 6.0])
+
+    def test_flashes_shorter_than_min_seconds_are_ignored(self):
+        hist = frame_histograms(frames((0, 0, 0), (250, 250, 250), (0, 0, 0), per_shot=2))
+
+        self.assertEqual(shot_boundaries_from_histograms(hist, fps=4, min_seconds=1.0), [0.5])
+
+
+class SnapClipsTestCase(unittest.TestCase):
+    def test_snaps_to_shots_then_keyframes(self):
+        boundaries = ShotBoundaries(shots=[9.5, 20.4, 40.0], keyframes=[0.0, 14.8, 30.0])
+        clips = Clips(clips=[clip(10.0, 20.0), clip(15.0, 25.0), clip(39.5, 40.2)])
+
+        snapped = snap_clips(clips, boundaries, tolerance=1.0)
+
+        self.assertEqual(
+            [(c.start_time, c.end_time) for c in snapped.clips],
+            [(9.5, 20.4), (14.8, 25.0), (39.5, 40.2)],   # last one would collapse
+        )
+        self.assertEqual(snapped.clips[0].title, "c10.0")
+
+
+class ShotCacheTestCase(unittest.TestCase):
+    def test_boundaries_are_cached_per_video(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            video = os.path.join(tempdir, "abc.mp4")
+            with open(video, "wb") as fh:
+                fh.write(b"x" * 100)
+            detected = ShotBoundaries([1.0], [0.0, 2.0])
+            with patch.object(shot_detection, "detect_shot_boundaries", return_value=detected) as detect:
+                first = shot_boundaries(video, os.path.join(tempdir, "cache"))
+                second = shot_boundaries(video, os.path.join(tempdir, "cache"))
+
+        self.assertEqual(detect.call_count, 1)
+        self.assertEqual(first, second)
+        self.assertEqual(second.keyframes, [0.0, 2.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
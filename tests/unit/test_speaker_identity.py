@@ -0,0 +1,69 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models.analytics import Base
+from crud.crud import channel_crud, speaker_voice_crud
+from speaker_identity import SpeakerIndex, identify_speakers
+
+
+class SpeakerIdentityTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.engine = create_engine(
+            "sqlite:///:memory:",
+            echo=False,
+            future=True,
+        )
+        cls.SessionLocal = sessionmaker(
+            autocommit=False,
+            autoflush=False,
+            bind=cls.engine,
+            future=True,
+        )
+
+    def setUp(self):
+        Base.metadata.drop_all(bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+        self.db = self.SessionLocal()
+        self.channel = channel_crud.create(self.db, {"handle": "@pod"})
+
+    def tearDown(self):
+        self.db.close()
+
+    # --- tests ---
+
+    def test_index_matches_nearest_voice_above_threshold(self):
+        index = SpeakerIndex(["a", "b"], np.array([[1.0, 0.0], [0.0, 1.0]]))
+        matches = index.match(np.array([[0.1, 2.0], [1.0, 1.0], [np.nan, 0.0]]), threshold=0.8)
+        self.assertEqual(matches[0][0], 1)
+        self.assertIsNone(matches[1])
+        self.assertIsNone(matches[2])
+
+    def test_unknown_voices_are_named_once_then_resolved_locally(self):
+        host = np.array([1.0, 0.0, 0.0], dtype=np.float32)
+        guest = np.array([0.0, 1.0, 0.0], dtype=np.float32)
+        transcript = {"segments": [{"start": 0.0, "text": "hi", "speaker": "SPEAKER_00"}]}
+
+        with mock.patch("speaker_identity.name_speakers", return_value={"SPEAKER_00": "Joe"}) as llm:
+            names = identify_speakers(self.db, self.channel.id, ["SPEAKER_00"], np.stack([host]), transcript)
+        self.assertEqual(names, {"SPEAKER_00": "Joe"})
+        llm.assert_called_once()
+
+        with mock.patch("speaker_identity.name_speakers", return_value={"SPEAKER_00": None}) as llm:
+            names = identify_speakers(
+                self.db,
+                self.channel.id,
+                ["SPEAKER_01", "SPEAKER_00"],
+                np.stack([host * 0.9 + 0.05, guest]),
+                transcript,
+            )
+        self.assertEqual(names, {"SPEAKER_01": "Joe"})
+        llm.assert_called_once_with(transcript, ["SPEAKER_00"])
+
+        stored = speaker_voice_crud.get_by_channel(self.db, self.channel.id)
+        self.assertEqual(len(stored), 1)
+        self.assertEqual(stored[0].samples, 2)
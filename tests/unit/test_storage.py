@@ -0,0 +1,106 @@
+import os
+import tempfile
+import time
+import unittest
+from collections import namedtuple
+from unittest import mock
+
+import storage as storage_module
+from storage import MB, StorageManager, audio_scratch_dir
+
+
+class StorageManagerTestCase(unittest.TestCase):
+    def setUp(self):
+        self._tempdir = tempfile.TemporaryDirectory()
+        self.dir = self._tempdir.name
+
+    def tearDown(self):
+        self._tempdir.cleanup()
+
+    def _file(self, name: str, size: int, age: float) -> str:
+        path = os.path.join(self.dir, name)
+        with open(path, "wb") as fh:
+            fh.write(b"\0" * size)
+        stamp = time.time() - age
+        os.utime(path, (stamp, stamp))
+        return path
+
+    def test_least_recently_used_files_are_evicted_first(self):
+        oldest = self._file("a.mp4", 100, age=3000)
+        older = self._file("b.mp4", 100, age=2000)
+        newest = self._file("c.mp4", 100, age=1000)
+        storage = StorageManager({self.dir: 150}, grace_seconds=0)
+
+        freed = storage.enforce()
+
+        self.assertEqual(freed, 200)
+        self.assertFalse(os.path.exists(oldest))
+        self.assertFalse(os.path.exists(older))
+        self.assertTrue(os.path.exists(newest))
+
+    def test_pinned_and_recent_files_are_kept(self):
+        pinned = self._file("a.mp4", 100, age=3000)
+        recent = self._file("b.mp4.part", 100, age=10)
+        storage = StorageManager({self.dir: 50}, grace_seconds=60)
+        storage.pin(pinned)
+
+        self.assertEqual(storage.enforce(), 0)
+        self.assertTrue(os.path.exists(pinned))
+        self.assertTrue(os.path.exists(recent))
+
+        storage.release(pinned)
+        os.utime(pinned, (time.time() - 3000,) * 2)
+        self.assertEqual(storage.enforce(), 100)
+        self.assertFalse(os.path.exists(pinned))
+
+    def test_release_with_delete_waits_for_last_pin(self):
+        path = self._file("a.wav", 10, age=0)
+        storage = StorageManager({self.dir: 0})
+        storage.pin(path)
+        storage.pin(path)
+
+        storage.release(path, delete=True)
+        self.assertTrue(os.path.exists(path))
+        storage.release(path, delete=True)
+        self.assertFalse(os.path.exists(path))
+
+    def test_usage_reports_files_bytes_and_pins(self):
+        path = self._file("a.mp4", 100, age=0)
+        self._file("b.mp4", 50, age=0)
+        storage = StorageManager({self.dir: 1000})
+        storage.pin(path)
+
+        self.assertEqual(
+            storage.usage()[self.dir],
+            {"files": 2, "bytes": 150, "quota_bytes": 1000, "pinned": 1},
+        )
+
+
+class AudioScratchDirTestCase(unittest.TestCase):
+    def setUp(self):
+        self._tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tempdir.cleanup)
+        self.scratch = os.path.join(self._tempdir.name, "scratch")
+        usage = namedtuple("usage", "total used free")(2048 * MB, 0, 2048 * MB)
+        for patcher in (
+            mock.patch.object(storage_module, "AUDIO_SCRATCH_DIR", self.scratch),
+            mock.patch.object(storage_module, "SCRATCH_MIN_FREE_BYTES", 512 * MB),
+            mock.patch.object(storage_module.shutil, "disk_usage", return_value=usage),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_in_flight_extractions_reserve_their_size(self):
+        with audio_scratch_dir(690 * MB, "audio") as first, audio_scratch_dir(690 * MB, "audio") as second:
+            with audio_scratch_dir(690 * MB, "audio") as third:
+                self.assertEqual((first, second, third), (self.scratch, self.scratch, "audio"))
+        with audio_scratch_dir(1536 * MB, "audio") as after:
+            self.assertEqual(after, self.scratch)
+
+    def test_too_large_or_unknown_size_goes_to_disk(self):
+        with audio_scratch_dir(1537 * MB, "audio") as large, audio_scratch_dir(None, "audio") as unknown:
+            self.assertEqual((large, unknown), ("audio", "audio"))
+
+
+if __name__ == "__main__":
+    unittest.main()
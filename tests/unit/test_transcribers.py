@@ -0,0 +1,37 @@
+import unittest
+from collections import namedtuple
+
+from benchmark_transcription import word_error_rate
+from transcribers import _to_whisper_schema, get_backend
+
+Segment = namedtuple(
+    "Segment",
+    "id seek start end text tokens temperature avg_logprob compression_ratio no_speech_prob words",
+)
+Word = namedtuple("Word", "start end word probability")
+
+
+class TranscribersTestCase(unittest.TestCase):
+    def test_faster_whisper_segments_match_whisper_schema(self):
+        segments = [
+            Segment(1, 0, 0.0, 1.5, " Hello", [1, 2], 0.0, -0.2, 1.1, 0.01,
+                    [Word(0.0, 1.5, " Hello", 0.9)]),
+            Segment(2, 0, 1.5, 3.0, " world.", [3], 0.0, -0.3, 1.2, 0.02, None),
+        ]
+
+        result = _to_whisper_schema(iter(segments), "en")
+
+        self.assertEqual(result["text"], " Hello world.")
+        self.assertEqual(result["language"], "en")
+        self.assertEqual([s["id"] for s in result["segments"]], [0, 1])
+        self.assertEqual(result["segments"][0]["words"][0]["word"], " Hello")
+        self.assertNotIn("words", result["segments"][1])
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            get_backend("does-not-exist")
+
+    def test_word_error_rate(self):
+        self.assertEqual(word_error_rate("Hello, world!", "hello world"), 0.0)
+        self.assertAlmostEqual(word_error_rate("a b c d", "a x c"), 0.5)
+        self.assertEqual(word_error_rate("", ""), 0.0)
@@ -0,0 +1,73 @@
+import unittest
+
+import numpy as np
+
+from transcript_merge import (
+    assign_speakers,
+    compact_segments,
+    diarization_to_turns,
+    format_speaker_transcript,
+    merge_speakers,
+)
+
+
+class TranscriptMergeTestCase(unittest.TestCase):
+    def setUp(self):
+        self.turns = [
+            (0.0, 4.0, "SPEAKER_00"),
+            (4.0, 9.0, "SPEAKER_01"),
+            (8.5, 12.0, "SPEAKER_00"),
+            (9.0, 10.0, "SPEAKER_00"),  # overlaps its own previous turn
+        ]
+
+    def test_assign_by_maximum_overlap(self):
+        speakers = assign_speakers(
+            np.array([0.0, 3.0, 8.0, 20.0]),
+            np.array([3.0, 8.0, 12.0, 21.0]),
+            self.turns,
+        )
+        self.assertEqual(speakers, ["SPEAKER_00", "SPEAKER_01", "SPEAKER_00", None])
+
+    def test_turns_from_dicts(self):
+        turns = diarization_to_turns([{"start": 1, "end": 2, "speaker": "A"}])
+        self.assertEqual(turns, [(1.0, 2.0, "A")])
+
+    def test_merge_labels_segments_and_words(self):
+        transcript = {
+            "text": "hello there general kenobi",
+            "segments": [
+                {
+                    "id": 0, "start": 2.0, "end": 8.0, "text": " hello there",
+                    "words": [
+                        {"word": "hello", "start": 2.5, "end": 3.0},
+                        {"word": "there", "start": 4.5, "end": 5.5},
+                    ],
+                },
+                {"id": 1, "start": 9.5, "end": 11.0, "text": " general kenobi"},
+            ],
+        }
+
+        merged = merge_speakers(transcript, self.turns)
+
+        self.assertNotIn("speaker", transcript["segments"][0])
+        self.assertEqual([s["speaker"] for s in merged["segments"]], ["SPEAKER_01", "SPEAKER_00"])
+        self.assertEqual(
+            [w["speaker"] for w in merged["segments"][0]["words"]],
+            ["SPEAKER_00", "SPEAKER_01"],
+        )
+
+        self.assertEqual(
+            compact_segments(merged["segments"])[1],
+            {"id": 1, "start": 9.5, "end": 11.0, "speaker": "SPEAKER_00", "text": "general kenobi"},
+        )
+
+    def test_format_joins_consecutive_speaker_lines(self):
+        transcript = {"segments": [
+            {"start": 0.0, "text": " a", "speaker": "S1"},
+            {"start": 61.0, "text": " b", "speaker": "S1"},
+            {"start": 3725.0, "text": " c", "speaker": "S2"},
+        ]}
+        self.assertEqual(
+            format_speaker_transcript(transcript),
+            "[00:00:00] S1: a b\n[01:02:05] S2: c",
+        )
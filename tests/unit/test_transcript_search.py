@@ -0,0 +1,108 @@
+import unittest
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from crud.crud import channel_crud, transcript_crud, video_crud
+from models.analytics import Base
+from models.clip import Clips
+from transcript_search import TranscriptSearchIndex, hits_to_clips, tokenize
+from transcript_store import CompactTranscript
+
+
+def compact(*texts, step=5.0):
+    return CompactTranscript.from_transcript({"segments": [
+        {"start": i * step, "end": i * step + 4.0, "text": text} for i, text in enumerate(texts)
+    ]})
+
+
+class TranscriptSearchIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.index = TranscriptSearchIndex()
+        self.index.add(1, compact(" We love open source.", " Closed doors.", " Source of truth, open late."))
+        self.index.add(2, compact(" Nothing here.", " OPEN SOURCE rocks!"))
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize(" Open-Source, ÜBER!"), ["open", "source", "über"])
+
+    def test_all_terms_must_match(self):
+        hits = self.index.search("open source")
+
+        self.assertEqual([(h.video_id, h.segment_id) for h in hits], [(1, 0), (1, 2), (2, 1)])
+        self.assertEqual(hits[2].start, 5.0)
+
+    def test_phrase(self):
+        hits = self.index.search("open source", phrase=True)
+
+        self.assertEqual([(h.video_id, h.segment_id) for h in hits], [(1, 0), (2, 1)])
+
+    def test_phrase_matches_whole_tokens_only(self):
+        self.index.add(3, compact(" source code, open the door, reopen sources"))
+
+        self.assertEqual(len(self.index.search("open source", video_ids=[3])), 1)
+        self.assertEqual(self.index.search("open source", phrase=True, video_ids=[3]), [])
+        self.assertEqual(len(self.index.search("the door", phrase=True, video_ids=[3])), 1)
+
+    def test_time_range_and_video_filter(self):
+        self.assertEqual([h.segment_id for h in self.index.search("open", start=6.0)], [2, 1])
+        self.assertEqual([h.video_id for h in self.index.search("open", video_ids=[2])], [2])
+        self.assertEqual(self.index.search("missing"), [])
+        self.assertEqual(self.index.search("  "), [])
+
+    def test_reindex_replaces_video(self):
+        self.index.add(2, compact(" Only closed things now."))
+
+        self.assertEqual([h.video_id for h in self.index.search("open source")], [1, 1])
+        self.assertEqual([h.video_id for h in self.index.search("closed")], [1, 2])
+        self.assertEqual(len(self.index), 4)
+
+
+class HitsToClipsTestCase(unittest.TestCase):
+    def test_clips_per_video_with_merged_neighbours(self):
+        index = TranscriptSearchIndex()
+        index.add(1, compact(" cats", " dogs", " cats", " birds", " birds", " birds", " cats"))
+        index.add(2, compact(" cats"))
+
+        clips = hits_to_clips(index.search("cats"), "cats", pad=3.5)
+
+        self.assertIsInstance(clips[1], Clips)
+        # hits at 0-4 and 10-14 overlap once padded; 30-34 stands alone
+        self.assertEqual(
+            [(c.start_time, c.end_time, c.segment_ids) for c in clips[1].clips],
+            [(0.0, 17.5, [0, 1, 2]), (26.5, 37.5, [6])],
+        )
+        self.assertEqual(len(clips[2].clips), 1)
+        self.assertNotEqual(clips[1].clips[0].title, clips[1].clips[1].title)
+        # both videos have a hit at 0s; the cut files must not collide
+        self.assertNotEqual(clips[1].clips[0].title, clips[2].clips[0].title)
+
+
+class TranscriptSearchFromDbTestCase(unittest.TestCase):
+    def test_from_db_filters_by_channel(self):
+        engine = create_engine("sqlite:///:memory:", future=True)
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine, future=True)()
+        videos = []
+        for handle in ("@a", "@b"):
+            channel = channel_crud.create(db, {"handle": handle})
+            video = video_crud.create(db, {
+                "channel_id": channel.id,
+                "title": handle,
+                "views": 1,
+                "published_at": datetime(2024, 1, 1),
+                "url": f"https://youtu.be/{handle}",
+            })
+            transcript_crud.save(db, video.id, compact(" hello world").to_transcript())
+            videos.append(video)
+
+        everything = TranscriptSearchIndex.from_db(db)
+        only_a = TranscriptSearchIndex.from_db(db, videos[0].channel_id)
+        db.close()
+
+        self.assertEqual(len(everything.search("hello")), 2)
+        self.assertEqual([h.video_id for h in only_a.search("hello")], [videos[0].id])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from crud.crud import channel_crud, transcript_crud, video_crud
+from models.analytics import Base
+from transcript_store import CompactTranscript, pack_transcript
+
+
+def transcript(n: int = 6, speakers: bool = True):
+    segments = []
+    for i in range(n):
+        seg = {"id": i, "start": i * 2.0, "end": i * 2.0 + 1.5, "text": f" Satz {i} ünïcode."}
+        if speakers and i % 3:
+            seg["speaker"] = f"SPEAKER_0{i % 2}"
+        segments.append(seg)
+    return {"text": "".join(s["text"] for s in segments), "segments": segments, "language": "de"}
+
+
+class CompactTranscriptTestCase(unittest.TestCase):
+    def test_round_trip(self):
+        original = transcript()
+        restored = CompactTranscript.from_transcript(original).to_transcript()
+
+        self.assertEqual(restored, original)
+
+    def test_pack_is_columnar(self):
+        packed = pack_transcript(transcript(4))
+
+        self.assertEqual(packed["segment_count"], 4)
+        self.assertEqual(len(packed["starts"]), 4 * 4)      # float32
+        self.assertEqual(len(packed["speaker_ids"]), 4 * 2)  # int16
+        self.assertEqual(packed["speakers"], ["SPEAKER_01", "SPEAKER_00"])
+        self.assertAlmostEqual(packed["duration"], 7.5)
+
+    def test_time_range_access(self):
+        compact = CompactTranscript.from_transcript(transcript(6))
+
+        # segments: [0,1.5) [2,3.5) [4,5.5) [6,7.5) [8,9.5) [10,11.5)
+        self.assertEqual([s["id"] for s in compact.segments(3.0, 6.5)], [1, 2, 3])
+        self.assertEqual([s["id"] for s in compact.segments(1.6, 1.9)], [])
+        self.assertEqual([s["id"] for s in compact.segments(11.0)], [5])
+        self.assertEqual(compact.text_between(0.0, 2.5), " Satz 0 ünïcode. Satz 1 ünïcode.")
+
+    def test_overlapping_segments(self):
+        compact = CompactTranscript.from_transcript({"segments": [
+            {"start": 0.0, "end": 10.0, "text": " long"},
+            {"start": 1.0, "end": 2.0, "text": " short"},
+            {"start": 3.0, "end": 4.0, "text": " later"},
+        ]})
+
+        self.assertEqual([s["text"] for s in compact.segments(5.0, 6.0)], [" long"])
+        self.assertEqual([s["text"] for s in compact.segments(3.5, 3.6)], [" long", " later"])
+
+    def test_empty(self):
+        compact = CompactTranscript.from_transcript({"segments": []})
+
+        self.assertEqual(len(compact), 0)
+        self.assertEqual(compact.segments(0, 10), [])
+
+
+class TranscriptCRUDTestCase(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite:///:memory:", future=True)
+        Base.metadata.create_all(bind=engine)
+        self.db = sessionmaker(bind=engine, future=True)()
+        channel = channel_crud.create(self.db, {"handle": "@pod"})
+        self.video = video_crud.create(self.db, {
+            "channel_id": channel.id,
+            "title": "t",
+            "views": 1,
+            "published_at": datetime(2024, 1, 1),
+            "url": "https://youtu.be/t",
+        })
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_save_and_load(self):
+        transcript_crud.save(self.db, self.video.id, transcript())
+
+        loaded = transcript_crud.load(self.db, self.video.id)
+        self.assertEqual(loaded.to_transcript(), transcript())
+        self.assertEqual(loaded.language, "de")
+
+    def test_save_replaces_existing(self):
+        transcript_crud.save(self.db, self.video.id, transcript(6))
+        transcript_crud.save(self.db, self.video.id, transcript(2))
+
+        self.assertEqual(len(transcript_crud.get_multi_by(self.db, video_id=self.video.id)), 1)
+        self.assertEqual(len(transcript_crud.load(self.db, self.video.id)), 2)
+
+    def test_missing_transcript(self):
+        self.assertIsNone(transcript_crud.load(self.db, self.video.id))
+
+
+if __name__ == "__main__":
+    unittest.main()
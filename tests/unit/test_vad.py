@@ -0,0 +1,64 @@
+import unittest
+
+import numpy as np
+
+from vad import detect_speech_regions, gate_audio, remap_transcript, to_original_time
+
+SR = 16000
+
+
+def _tone(seconds, freq=1000.0, amplitude=0.3):
+    t = np.arange(int(seconds * SR)) / SR
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+def _silence(seconds):
+    rng = np.random.default_rng(0)
+    return (rng.standard_normal(int(seconds * SR)) * 1e-4).astype(np.float32)
+
+
+class VADTestCase(unittest.TestCase):
+    def test_detects_speech_band_bursts_only(self):
+        audio = np.concatenate([
+            _silence(5), _tone(2), _silence(5),
+            _tone(2, freq=60.0),          # low hum outside the speech band
+            _silence(3), _tone(3), _silence(2),
+        ])
+
+        regions = detect_speech_regions(audio, SR)
+
+        self.assertEqual(len(regions), 2)
+        self.assertAlmostEqual(regions[0][0], 4.8, delta=0.1)
+        self.assertAlmostEqual(regions[0][1], 7.2, delta=0.1)
+        self.assertAlmostEqual(regions[1][0], 16.8, delta=0.1)
+
+    def test_gate_and_remap_round_trip(self):
+        audio = np.arange(20 * SR, dtype=np.float32)
+        regions = [(2.0, 4.0), (10.0, 13.0)]
+
+        gated, gated_starts = gate_audio(audio, regions, SR, gap_seconds=0.5)
+
+        self.assertEqual(len(gated), int(5.0 * SR + 2 * 0.5 * SR))
+        self.assertEqual(gated_starts.tolist(), [0.0, 2.5])
+        np.testing.assert_allclose(
+            to_original_time(np.array([0.0, 1.0, 2.2, 2.5, 4.0]), regions, gated_starts),
+            [2.0, 3.0, 4.0, 10.0, 11.5],
+        )
+
+    def test_remap_transcript_segments_and_words(self):
+        regions = [(2.0, 4.0), (10.0, 13.0)]
+        gated_starts = np.array([0.0, 2.5])
+        transcript = {"text": "a b", "segments": [
+            {"id": 0, "start": 0.5, "end": 1.5, "text": " a",
+             "words": [{"word": " a", "start": 0.5, "end": 1.0}]},
+            {"id": 1, "start": 3.0, "end": 4.5, "text": " b"},
+        ]}
+
+        remapped = remap_transcript(transcript, regions, gated_starts)
+
+        self.assertEqual(transcript["segments"][1]["start"], 3.0)
+        self.assertEqual(
+            [(s["start"], s["end"]) for s in remapped["segments"]],
+            [(2.5, 3.5), (10.5, 12.0)],
+        )
+        self.assertEqual(remapped["segments"][0]["words"][0]["end"], 3.0)
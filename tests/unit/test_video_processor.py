@@ -0,0 +1,154 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from unittest import mock
+
+import numpy as np
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from crud.crud import channel_crud, speaker_voice_crud, stage_metric_crud, transcript_crud, video_crud
+from models.analytics import Base
+from video_processor import BackfillProgress, VideoProcessingService
+
+TRANSCRIPT = {
+    "text": " Hello there.",
+    "segments": [{"id": 0, "start": 0.0, "end": 1.5, "text": " Hello there."}],
+    "language": "en",
+}
+
+
+class FakeRunner:
+    def __init__(self, failing=()):
+        self.urls = []
+        self.preloaded = 0
+        self.failing = failing
+        self.extra = {}
+
+    def preload(self):
+        self.preloaded += 1
+
+    def run(self, url):
+        self.urls.append(url)
+        if url in self.failing:
+            raise RuntimeError("download failed")
+        return {"transcript": TRANSCRIPT, **self.extra, "metrics": [{
+            "stage": "download_audio",
+            "wall_seconds": 1.0,
+            "cpu_seconds": 0.5,
+            "peak_rss_bytes": 1024,
+            "gpu_peak_bytes": None,
+            "bytes_processed": 10,
+        }]}
+
+
+class VideoProcessingServiceTestCase(unittest.TestCase):
+    def setUp(self):
+        # a file, so every backfill worker thread gets its own connection
+        tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tempdir.cleanup)
+        engine = create_engine(f"sqlite:///{os.path.join(tempdir.name, 'test.db')}", future=True)
+        self.addCleanup(engine.dispose)
+        Base.metadata.create_all(bind=engine)
+        self.SessionLocal = sessionmaker(bind=engine, future=True)
+        self.db = self.SessionLocal()
+        self.channel = channel_crud.create(self.db, {"handle": "@pod"})
+        for title, views in (("small", 10), ("big", 1000)):
+            video_crud.create(self.db, {
+                "channel_id": self.channel.id,
+                "title": title,
+                "views": views,
+                "published_at": datetime(2024, 1, 1),
+                "url": f"https://youtu.be/{title}",
+            })
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_processes_most_viewed_video_and_stores_metrics(self):
+        runner = FakeRunner()
+        video = VideoProcessingService(runner).process_next_for_channel(self.db, "@pod")
+
+        self.assertEqual(video.title, "big")
+        self.assertEqual(runner.urls, ["https://youtu.be/big"])
+        self.assertIsNotNone(video_crud.get(self.db, video.id).processed_at)
+        (metric,) = stage_metric_crud.get_by_video(self.db, video.id)
+        self.assertEqual(metric.stage, "download_audio")
+        self.assertEqual(transcript_crud.load(self.db, video.id).to_transcript(), TRANSCRIPT)
+
+    def test_known_voices_are_named_without_the_llm(self):
+        host = np.array([1.0, 0.0, 0.0], dtype=np.float32)
+        speaker_voice_crud.create(self.db, {
+            "channel_id": self.channel.id, "name": "Joe", "embedding": host.tobytes(), "dim": 3,
+        })
+        runner = FakeRunner()
+        runner.extra = {
+            "transcript": {**TRANSCRIPT, "segments": [{**TRANSCRIPT["segments"][0], "speaker": "SPEAKER_00"}]},
+            "speaker_labels": ["SPEAKER_00"],
+            "speaker_embeddings": np.stack([host * 2]),
+        }
+
+        with mock.patch("speaker_identity.name_speakers") as llm:
+            video = VideoProcessingService(runner).process_next_for_channel(self.db, "@pod")
+
+        llm.assert_not_called()
+        stored = transcript_crud.load(self.db, video.id).to_transcript()
+        self.assertEqual(stored["segments"][0]["speaker"], "Joe")
+        (voice,) = speaker_voice_crud.get_by_channel(self.db, self.channel.id)
+        self.assertEqual(voice.samples, 2)
+
+    def test_unknown_channel_is_skipped(self):
+        runner = FakeRunner()
+        self.assertIsNone(VideoProcessingService(runner).process_next_for_channel(self.db, "@nope"))
+        self.assertEqual(runner.urls, [])
+
+    def _add_videos(self, n):
+        for i in range(n):
+            video_crud.create(self.db, {
+                "channel_id": self.channel.id,
+                "title": f"v{i}",
+                "views": 100 + i,
+                "published_at": datetime(2024, 1, 1),
+                "url": f"https://youtu.be/v{i}",
+            })
+
+    def test_backfill_processes_top_videos_and_resumes(self):
+        self._add_videos(4)   # views: big 1000, v3..v0 103..100, small 10
+        runner = FakeRunner(failing={"https://youtu.be/v3"})
+        service = VideoProcessingService(runner)
+
+        progress = service.backfill(self.SessionLocal, "@pod", top=3, workers=2)
+
+        self.assertEqual(runner.preloaded, 1)
+        self.assertEqual(sorted(runner.urls), ["https://youtu.be/big", "https://youtu.be/v2", "https://youtu.be/v3"])
+        self.assertEqual((progress.done, progress.failed), (3, 1))
+        self.db.expire_all()
+        processed = {v.title for v in video_crud.get_by_channel(self.db, self.channel.id) if v.processed_at}
+        self.assertEqual(processed, {"big", "v2"})
+
+        # a second run only retries what is still unprocessed
+        runner.failing = set()
+        runner.urls = []
+        progress = service.backfill(self.SessionLocal, "@pod", top=3, workers=2)
+
+        self.assertEqual(runner.urls, ["https://youtu.be/v3"])
+        self.assertEqual((progress.done, progress.failed), (1, 0))
+
+    def test_backfill_progress_estimates_remaining_time(self):
+        now = [0.0]
+        progress = BackfillProgress(4, clock=lambda: now[0])
+        self.assertIsNone(progress.eta_seconds())
+
+        now[0] = 60.0
+        progress.update(True)
+        now[0] = 120.0
+        line = progress.update(False)
+
+        self.assertEqual(progress.eta_seconds(), 120.0)
+        self.assertEqual(line, "[2/4] 1 failed, 2m00s elapsed, ETA 2m00s")
+
+
+if __name__ == "__main__":
+    unittest.main()